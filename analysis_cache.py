@@ -0,0 +1,79 @@
+# analysis_cache.py
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+class AnalysisCache:
+    """
+    In-process LRU cache of parsed and analyzed source code, keyed by source hash.
+
+    The cache is bounded both by entry count and by the total size of the
+    cached sources; the parsed ASTs it holds grow roughly linearly with the
+    source size, so ``max_source_bytes`` is the memory knob. Cached values are
+    shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 256, max_source_bytes: int = 8 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_source_bytes = max_source_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._source_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(code: str) -> str:
+        return hashlib.sha256(code.encode('utf-8')).hexdigest()
+
+    def get_or_compute(self, code: str, compute: Callable[[str], Any]) -> Any:
+        """
+        Return the cached result for ``code`` or compute and store it.
+
+        Exceptions raised by ``compute`` propagate and nothing is cached.
+        """
+        key = self.key(code)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        result = compute(code)
+        size = len(code.encode('utf-8'))
+        if size > self.max_source_bytes:
+            return result
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (result, size)
+                self._source_bytes += size
+                while len(self._entries) > self.max_entries or self._source_bytes > self.max_source_bytes:
+                    _, (_, evicted_size) = self._entries.popitem(last=False)
+                    self._source_bytes -= evicted_size
+                    self.evictions += 1
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._source_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'source_bytes': self._source_bytes
+            }
+
+# Shared by every session and component in the process
+analysis_cache = AnalysisCache()
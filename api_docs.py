@@ -1,104 +1,351 @@
 # api_docs.py
 import ast
-import inspect
-from typing import Dict, List, Any
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 import logging
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from code_analyzer import CodeAnalyzer, FunctionNode, dotted_name
 
 logger = logging.getLogger(__name__)
 
+HTTP_METHODS = ('get', 'post', 'put', 'delete', 'patch', 'options', 'head', 'trace')
+
+# Calls that create something routes can be registered on, by last name component
+ROUTER_FACTORIES = frozenset({'APIRouter', 'FastAPI'})
+
+# Endpoint parameters FastAPI fills in itself rather than from the request
+FRAMEWORK_PARAMETER_TYPES = frozenset({'Request', 'Response', 'BackgroundTasks', 'WebSocket'})
+DEPENDENCY_MARKERS = frozenset({'Depends', 'Security'})
+
+# Below this many files the process pool costs more than it saves
+PARALLEL_MIN_FILES = 8
+
 @dataclass
 class APIEndpoint:
     path: str
     method: str
-    description: str
+    description: Dict[str, Any]
     parameters: List[Dict[str, Any]]
     response: Dict[str, Any]
     auth_required: bool
 
+@dataclass
+class ModuleRoutes:
+    """Routers, include_router calls and routes found in one module, before prefixes are applied"""
+    module: str = ''
+    # Router variable -> its own prefix
+    routers: Dict[str, str] = field(default_factory=dict)
+    # (parent reference, included router reference, include prefix)
+    includes: List[Tuple[str, str, str]] = field(default_factory=list)
+    # Local name -> qualified name it was imported as
+    imports: Dict[str, str] = field(default_factory=dict)
+    # (reference to the router the route is registered on, endpoint)
+    routes: List[Tuple[str, APIEndpoint]] = field(default_factory=list)
+
+    def qualify(self, reference: str) -> str:
+        """Qualified name of a router referenced as ``reference`` in this module"""
+        head, _, rest = reference.partition('.')
+        if head in self.imports:
+            return self.imports[head] + ('.' + rest if rest else '')
+        return f"{self.module}.{reference}" if self.module else reference
+
+def _string(node: Optional[ast.AST]) -> Optional[str]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+def _keyword(call: ast.Call, name: str) -> Optional[ast.AST]:
+    for keyword in call.keywords:
+        if keyword.arg == name:
+            return keyword.value
+    return None
+
+class RouteCollector:
+    """
+    Collect a module's routes in one pass over its statements.
+
+    Only statement lists are traversed (module, class and function bodies and
+    the bodies of compound statements, so app factories are covered);
+    expressions are inspected only where a router, include_router call or
+    route decorator can appear.
+    """
+
+    def __init__(self, module: str = '', is_package: bool = False):
+        self.routes = ModuleRoutes(module)
+        self.is_package = is_package
+
+    def collect(self, tree: ast.Module) -> ModuleRoutes:
+        self.statements(tree.body)
+        return self.routes
+
+    def statements(self, body: List[ast.stmt], class_name: Optional[str] = None):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                if node.decorator_list:
+                    self.function(node, class_name)
+                self.statements(node.body)
+            elif isinstance(node, ast.ClassDef):
+                self.statements(node.body, node.name)
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                self.assign(node)
+            elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+                self.call(node.value)
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        self.routes.imports[alias.asname] = alias.name
+                    else:
+                        head = alias.name.partition('.')[0]
+                        self.routes.imports[head] = head
+            elif isinstance(node, ast.ImportFrom):
+                base = self.import_base(node)
+                for alias in node.names:
+                    self.routes.imports[alias.asname or alias.name] = f"{base}.{alias.name}" if base else alias.name
+            else:
+                for name in ('body', 'orelse', 'finalbody'):
+                    self.statements(getattr(node, name, None) or [], class_name)
+                for handler in getattr(node, 'handlers', None) or []:
+                    self.statements(handler.body, class_name)
+
+    def import_base(self, node: ast.ImportFrom) -> str:
+        """Absolute module a (possibly relative) from-import reads from"""
+        if not node.level:
+            return node.module or ''
+        parts = self.routes.module.split('.') if self.routes.module else []
+        # A package's own module is its __init__, so one level up is the package itself
+        keep = len(parts) - node.level + (1 if self.is_package else 0)
+        base = '.'.join(parts[:max(keep, 0)])
+        if node.module:
+            base = f"{base}.{node.module}" if base else node.module
+        return base
+
+    def assign(self, node):
+        value = node.value
+        if not isinstance(value, ast.Call):
+            return
+        factory = dotted_name(value.func)
+        if factory is None or factory.rpartition('.')[2] not in ROUTER_FACTORIES:
+            return
+        prefix = _string(_keyword(value, 'prefix')) or ''
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        for target in targets:
+            name = dotted_name(target)
+            if name:
+                self.routes.routers[name] = prefix
+
+    def call(self, node: ast.Call):
+        function = node.func
+        if not (isinstance(function, ast.Attribute) and function.attr == 'include_router'):
+            return
+        parent = dotted_name(function.value)
+        child = dotted_name(node.args[0]) if node.args else dotted_name(_keyword(node, 'router'))
+        if parent and child:
+            self.routes.includes.append((parent, child, _string(_keyword(node, 'prefix')) or ''))
+
+    def function(self, node: FunctionNode, class_name: Optional[str]):
+        """Record one endpoint per route decorator on ``node``"""
+        routes = []
+        auth_required = False
+        for decorator in node.decorator_list:
+            target = decorator.func if isinstance(decorator, ast.Call) else decorator
+            name = dotted_name(target)
+            if name is None:
+                continue
+            owner, _, attribute = name.rpartition('.')
+            if attribute == 'requires_auth':
+                auth_required = True
+            elif owner and isinstance(decorator, ast.Call):
+                path = _string(decorator.args[0]) if decorator.args else _string(_keyword(decorator, 'path'))
+                if path is None:
+                    continue
+                if attribute in HTTP_METHODS:
+                    routes.append((owner, path, attribute))
+                elif attribute == 'api_route':
+                    methods = _keyword(decorator, 'methods')
+                    names = [_string(item) for item in methods.elts] \
+                        if isinstance(methods, (ast.List, ast.Tuple, ast.Set)) else ['GET']
+                    routes.extend((owner, path, method.lower()) for method in names if method)
+        if not routes:
+            return
+
+        docstring = ast.get_docstring(node)
+        description = APIDocumentationGenerator._parse_docstring(docstring or '')
+        parameters, uses_security = self.parameters(node, class_name)
+        response = {}
+        if node.returns:
+            response['type'] = APIDocumentationGenerator._get_type_hint(node.returns)
+        for owner, path, method in routes:
+            self.routes.routes.append((owner, APIEndpoint(
+                path=path,
+                method=method,
+                description=description,
+                parameters=parameters,
+                response=response,
+                auth_required=auth_required or uses_security
+            )))
+
+    @staticmethod
+    def parameters(node: FunctionNode, class_name: Optional[str]) -> Tuple[List[Dict[str, Any]], bool]:
+        """Request parameters of an endpoint, and whether it depends on a Security() dependency"""
+        arguments = node.args
+        positional = arguments.posonlyargs + arguments.args
+        defaults = [None] * (len(positional) - len(arguments.defaults)) + list(arguments.defaults)
+        pairs = list(zip(positional, defaults)) + list(zip(arguments.kwonlyargs, arguments.kw_defaults))
+        if class_name and positional:
+            pairs = pairs[1:]  # self/cls
+        parameters = []
+        security = False
+        for arg, default in pairs:
+            if isinstance(default, ast.Call):
+                marker = (dotted_name(default.func) or '').rpartition('.')[2]
+                if marker in DEPENDENCY_MARKERS:
+                    # Injected dependencies are not request parameters
+                    security = security or marker == 'Security'
+                    continue
+            param_type = APIDocumentationGenerator._get_type_hint(arg.annotation) if arg.annotation else None
+            if param_type in FRAMEWORK_PARAMETER_TYPES:
+                continue
+            parameters.append({
+                'name': arg.arg,
+                'type': param_type,
+                'required': default is None
+            })
+        return parameters, security
+
+def extract_module_routes(code: str, module: str = '', is_package: bool = False) -> ModuleRoutes:
+    """
+    Collect the routes of one module; raises SyntaxError for invalid code.
+
+    The tree comes from the shared analysis cache, so a snippet that is also
+    documented is parsed only once.
+    """
+    return RouteCollector(module, is_package).collect(CodeAnalyzer.parse(code))
+
+def resolve_endpoints(modules: List[ModuleRoutes]) -> List[APIEndpoint]:
+    """
+    Apply router prefixes and include_router prefixes to every route.
+
+    A router included several times (or by several parents) contributes its
+    routes once per full prefix, as FastAPI does. Routers that are never
+    included are treated as mounted at the root. Endpoints with the same
+    method and full path are kept once, first definition wins.
+    """
+    own_prefix: Dict[str, str] = {}
+    for module in modules:
+        for name, prefix in module.routers.items():
+            own_prefix[module.qualify(name)] = prefix
+    parents: Dict[str, List[Tuple[str, str]]] = {}
+    for module in modules:
+        for parent, child, prefix in module.includes:
+            parents.setdefault(module.qualify(child), []).append((module.qualify(parent), prefix))
+
+    resolved: Dict[str, List[str]] = {}
+
+    def prefixes(router: str, visiting: frozenset) -> List[str]:
+        if router in resolved:
+            return resolved[router]
+        own = own_prefix.get(router, '')
+        result = []
+        for parent, include_prefix in parents.get(router, ()):
+            if parent in visiting:
+                logger.error(f"Circular include_router involving {router}")
+                continue
+            result.extend(outer + include_prefix + own for outer in prefixes(parent, visiting | {router}))
+        resolved[router] = result = list(dict.fromkeys(result)) or [own]
+        return result
+
+    endpoints = []
+    seen = set()
+    for module in modules:
+        for owner, endpoint in module.routes:
+            for prefix in prefixes(module.qualify(owner), frozenset()):
+                path = (prefix + endpoint.path) or '/'
+                key = (endpoint.method, path)
+                if key in seen:
+                    continue
+                seen.add(key)
+                endpoints.append(endpoint if path == endpoint.path else
+                                 APIEndpoint(path, endpoint.method, endpoint.description, endpoint.parameters,
+                                             endpoint.response, endpoint.auth_required))
+    return endpoints
+
+def _extract_file(task: Tuple[str, str, bool]):
+    """
+    Read and extract one file (runs in a worker process).
+
+    Returns the ModuleRoutes, None if the file cannot define routes, or the
+    exception raised while reading or parsing it.
+    """
+    path, module, is_package = task
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            code = f.read()
+        # Cheap text test that skips parsing modules without routers or routes
+        if '@' not in code and 'include_router' not in code and 'APIRouter' not in code and 'FastAPI' not in code:
+            return None
+        # Package files are not analyzed anywhere else, so they bypass the analysis cache
+        return RouteCollector(module, is_package).collect(ast.parse(code))
+    except Exception as e:
+        return e
+
+def module_name(root: str, path: str) -> Tuple[str, bool]:
+    """Dotted module name of ``path`` relative to ``root`` and whether it is a package __init__"""
+    parts = os.path.splitext(os.path.relpath(path, root))[0].split(os.sep)
+    is_package = parts[-1] == '__init__'
+    if is_package:
+        parts = parts[:-1]
+    return '.'.join(parts), is_package
+
 class APIDocumentationGenerator:
     def __init__(self):
-        self.endpoints = []
+        self.endpoints: List[APIEndpoint] = []
     
     def parse_fastapi_app(self, code: str):
-        """Parse FastAPI application code to extract API endpoints"""
+        """Parse FastAPI application code to extract API endpoints, replacing any previous results"""
         try:
-            tree = ast.parse(code)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.ClassDef):
-                    self._parse_router_class(node)
-                elif isinstance(node, ast.FunctionDef):
-                    self._parse_endpoint(node)
+            self.endpoints = resolve_endpoints([extract_module_routes(code)])
         except Exception as e:
+            self.endpoints = []
             logger.error(f"Error parsing FastAPI app: {str(e)}")
     
-    def _parse_router_class(self, node: ast.ClassDef):
-        """Parse FastAPI router class"""
-        for item in node.body:
-            if isinstance(item, ast.FunctionDef):
-                self._parse_endpoint(item, class_name=node.name)
-    
-    def _parse_endpoint(self, node: ast.FunctionDef, class_name: str = None):
-        """Parse individual endpoint function"""
-        try:
-            # Extract path from decorators
-            path = None
-            method = None
-            auth_required = False
-            
-            for decorator in node.decorator_list:
-                if isinstance(decorator, ast.Call):
-                    if hasattr(decorator.func, 'attr'):
-                        method = decorator.func.attr.lower()
-                        # Extract path from args or keywords
-                        for arg in decorator.args:
-                            if isinstance(arg, ast.Str):
-                                path = arg.s
-                        for kw in decorator.keywords:
-                            if kw.arg == 'path':
-                                path = kw.value.s
-                    elif isinstance(decorator.func, ast.Name):
-                        if decorator.func.id == 'requires_auth':
-                            auth_required = True
-            
-            if path and method:
-                # Parse docstring
-                docstring = ast.get_docstring(node)
-                description = self._parse_docstring(docstring) if docstring else ""
-                
-                # Parse parameters
-                parameters = []
-                for arg in node.args.args[1:]:  # Skip self/cls
-                    param_type = None
-                    if arg.annotation:
-                        param_type = self._get_type_hint(arg.annotation)
-                    parameters.append({
-                        'name': arg.arg,
-                        'type': param_type,
-                        'required': True  # Could be enhanced by checking defaults
-                    })
-                
-                # Parse return type
-                response = {}
-                if node.returns:
-                    response['type'] = self._get_type_hint(node.returns)
-                
-                # Create endpoint
-                endpoint = APIEndpoint(
-                    path=path,
-                    method=method,
-                    description=description,
-                    parameters=parameters,
-                    response=response,
-                    auth_required=auth_required
-                )
-                
-                self.endpoints.append(endpoint)
-        except Exception as e:
-            logger.error(f"Error parsing endpoint: {str(e)}")
+    def parse_package(self, root: str, processes: Optional[int] = None):
+        """
+        Extract the endpoints of every module below ``root``, replacing any previous results.
+        
+        Modules are parsed in a process pool, then router prefixes and
+        include_router calls are resolved across the whole package, so routers
+        defined in one module and included in another get their full paths.
+        
+        Args:
+            root (str): Directory containing the API's top-level package;
+                module names are relative to it, so absolute imports such as
+                ``from app.routers import users`` resolve
+            processes (int, optional): Worker processes; defaults to the CPU count
+        """
+        from batch_documenter import BatchDocumenter
+        
+        tasks = [(path,) + module_name(root, path) for path in BatchDocumenter.discover(root)]
+        modules = []
+        
+        def collect(results):
+            for (path, _, _), result in zip(tasks, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error parsing {path}: {str(result)}")
+                elif result is not None:
+                    modules.append(result)
+        
+        if len(tasks) < PARALLEL_MIN_FILES or processes == 1:
+            collect(_extract_file(task) for task in tasks)
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                collect(pool.map(_extract_file, tasks,
+                                 chunksize=max(1, len(tasks) // ((processes or os.cpu_count() or 1) * 4))))
+        self.endpoints = resolve_endpoints(modules)
     
-    def _parse_docstring(self, docstring: str) -> Dict[str, str]:
+    @staticmethod
+    def _parse_docstring(docstring: str) -> Dict[str, Any]:
         """Parse docstring to extract structured information"""
         sections = {
             'description': '',
@@ -132,16 +379,19 @@ class APIDocumentationGenerator:
         
         return sections
     
-    def _get_type_hint(self, node: ast.AST) -> str:
+    @staticmethod
+    def _get_type_hint(node: ast.AST) -> str:
         """Convert AST type annotation to string representation"""
         if isinstance(node, ast.Name):
             return node.id
         elif isinstance(node, ast.Subscript):
-            value = self._get_type_hint(node.value)
-            slice_value = self._get_type_hint(node.slice)
+            value = APIDocumentationGenerator._get_type_hint(node.value)
+            slice_value = APIDocumentationGenerator._get_type_hint(node.slice)
             return f"{value}[{slice_value}]"
         elif isinstance(node, ast.Constant):
             return str(node.value)
+        elif isinstance(node, ast.Attribute):
+            return dotted_name(node) or "Any"
         return "Any"
     
     def generate_openapi_spec(self) -> Dict[str, Any]:
@@ -0,0 +1,287 @@
+# batch_documenter.py
+import argparse
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from code_analyzer import CodeAnalyzer
+from doc_cache import ERROR_PREFIXES
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = '.batch_state.jsonl'
+INDEX_FILE = 'index.md'
+
+# Directories that never contain first-party sources worth documenting
+SKIP_DIRS = {'.git', '__pycache__', '.venv', 'venv', 'env', 'node_modules', 'build', 'dist',
+             '.tox', '.nox', '.mypy_cache', '.pytest_cache', 'site-packages'}
+
+# Batch runs started from the web UI may only read and write below this directory
+WORKSPACE_ROOT = os.getenv('DOCGEN_WORKSPACE_ROOT', os.path.join(tempfile.gettempdir(), 'docgen_workspace'))
+
+
+def workspace_path(path: str, root: Optional[str] = None) -> str:
+    """
+    Resolve ``path`` inside the workspace, rejecting anything that escapes it.
+
+    Relative paths are taken relative to the workspace root, and symlinks are
+    resolved before the check, so neither ``..`` nor a link can leave it.
+
+    Args:
+        path (str): Path entered by the user
+        root (str, optional): Workspace root; defaults to WORKSPACE_ROOT
+
+    Returns:
+        str: The resolved absolute path
+
+    Raises:
+        ValueError: If the path resolves outside the workspace
+    """
+    root = os.path.realpath(root or WORKSPACE_ROOT)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"{path} is outside the workspace {root}")
+    return resolved
+
+
+def _analyze_file(path: str, prepare: Callable[[str], Any]) -> Tuple[str, str, Dict[str, Any], str, Any]:
+    """
+    Read, hash and analyze one source file (runs in a worker process).
+
+    ``prepare`` is the generator's ``preparer()``; it computes the cache key
+    and chunks here, sharing this process's parse, so the documenting thread
+    does not parse the file again.
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    source = raw.decode('utf-8', errors='replace')
+    functions, classes, relationships = CodeAnalyzer.analyze_code_structure(source)
+    analysis = {
+        'functions': functions,
+        'classes': classes,
+        'relationships': relationships
+    }
+    return path, source, analysis, hashlib.sha256(raw).hexdigest(), prepare(source)
+
+
+def _file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+@dataclass
+class BatchReport:
+    files_total: int = 0
+    documented: int = 0
+    skipped: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def files_per_second(self) -> float:
+        return self.documented / self.elapsed if self.elapsed else 0.0
+
+
+class BatchDocumenter:
+    """
+    Document every Python module below a directory.
+
+    Files are analyzed in a process pool, and the LLM calls are fanned out
+    over a bounded thread pool; the generator's backend throttles every
+    provider call, map-reduce chunks included, to the provider's rate. Each
+    module is written to ``<output_dir>/<module path>.md`` and an index is
+    written to ``<output_dir>/index.md``. Completed files are appended to a
+    state file so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, generator, output_dir: str = 'batch_docs', max_workers: int = 4,
+                 analysis_workers: Optional[int] = None):
+        self.generator = generator
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.analysis_workers = analysis_workers
+        self.state_path = os.path.join(output_dir, STATE_FILE)
+
+    @staticmethod
+    def discover(root: str) -> List[str]:
+        """Return all Python files below ``root``, sorted; links pointing outside it are skipped"""
+        real_root = os.path.realpath(root)
+        files = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS and not d.startswith('.')]
+            for filename in filenames:
+                if filename.endswith('.py'):
+                    path = os.path.join(dirpath, filename)
+                    if os.path.islink(path) and \
+                            os.path.commonpath([real_root, os.path.realpath(path)]) != real_root:
+                        continue
+                    files.append(path)
+        return sorted(files)
+
+    def load_state(self) -> Dict[str, Dict[str, str]]:
+        """Return completed files from previous runs, keyed by relative path"""
+        state = {}
+        if not os.path.exists(self.state_path):
+            return state
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a truncated final line behind
+                    continue
+                state[record['path']] = record
+        return state
+
+    def _record(self, state_file, record: Dict[str, str]):
+        state_file.write(json.dumps(record) + '\n')
+        state_file.flush()
+        os.fsync(state_file.fileno())
+
+    def _document(self, root: str, path: str, source: str, analysis: Dict[str, Any],
+                  digest: str, prepared) -> Dict[str, str]:
+        """Generate and write the Markdown for one module (runs in a worker thread)"""
+        documentation = self.generator.generate_documentation(source, analysis, prepared=prepared)
+        if not documentation or documentation.startswith(ERROR_PREFIXES):
+            raise RuntimeError(documentation or 'Empty documentation')
+
+        rel_path = os.path.relpath(path, root)
+        output_rel = os.path.splitext(rel_path)[0] + '.md'
+        output_path = os.path.join(self.output_dir, output_rel)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(f"# {rel_path}\n\n{documentation}\n")
+        return {'path': rel_path, 'hash': digest, 'output': output_rel}
+
+    def write_index(self, state: Dict[str, Dict[str, str]]):
+        lines = ["# Module Index\n"]
+        for rel_path in sorted(state):
+            output = state[rel_path]['output'].replace(os.sep, '/')
+            lines.append(f"- [{rel_path}]({output})")
+        with open(os.path.join(self.output_dir, INDEX_FILE), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def run(self, root: str, progress_callback: Optional[Callable[[int, int], None]] = None) -> BatchReport:
+        """
+        Document all Python files below ``root``.
+
+        Args:
+            root (str): Directory to document
+            progress_callback (callable, optional): Called with (done, total) after each file
+
+        Returns:
+            BatchReport: Counts, elapsed time and throughput of the run
+        """
+        start = time.perf_counter()
+        os.makedirs(self.output_dir, exist_ok=True)
+        state = self.load_state()
+        report = BatchReport()
+
+        pending = []
+        for path in self.discover(root):
+            report.files_total += 1
+            rel_path = os.path.relpath(path, root)
+            previous = state.get(rel_path)
+            if (previous and os.path.exists(os.path.join(self.output_dir, previous['output']))
+                    and previous['hash'] == _file_hash(path)):
+                report.skipped += 1
+                continue
+            pending.append(path)
+
+        done = report.skipped
+        if progress_callback:
+            progress_callback(done, report.files_total)
+
+        # Bound the number of analyzed-but-undocumented files held in memory
+        max_in_flight = self.max_workers * 2
+        prepare = self.generator.preparer()
+        # Spawn analysis workers rather than fork a process with live threads
+        with open(self.state_path, 'a', encoding='utf-8') as state_file, \
+                ProcessPoolExecutor(max_workers=self.analysis_workers,
+                                    mp_context=multiprocessing.get_context('spawn')) as analysis_pool, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as llm_pool:
+            remaining = iter(pending)
+            analyzing = {}
+            documenting = {}
+
+            def fill():
+                while len(analyzing) + len(documenting) < max_in_flight:
+                    path = next(remaining, None)
+                    if path is None:
+                        return
+                    analyzing[analysis_pool.submit(_analyze_file, path, prepare)] = path
+
+            fill()
+            while analyzing or documenting:
+                finished, _ = wait(list(analyzing) + list(documenting), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future in analyzing:
+                        path = analyzing.pop(future)
+                        try:
+                            _, source, analysis, digest, prepared = future.result()
+                        except Exception as e:
+                            report.failed += 1
+                            report.errors[path] = str(e)
+                            logger.error(f"Error analyzing {path}: {str(e)}")
+                            done += 1
+                            continue
+                        documenting[llm_pool.submit(
+                            self._document, root, path, source, analysis, digest, prepared
+                        )] = path
+                    else:
+                        path = documenting.pop(future)
+                        done += 1
+                        try:
+                            record = future.result()
+                        except Exception as e:
+                            report.failed += 1
+                            report.errors[path] = str(e)
+                            logger.error(f"Error documenting {path}: {str(e)}")
+                            continue
+                        self._record(state_file, record)
+                        state[record['path']] = record
+                        report.documented += 1
+                    if progress_callback:
+                        progress_callback(done, report.files_total)
+                fill()
+
+        self.write_index(state)
+        report.elapsed = time.perf_counter() - start
+        logger.info(
+            f"Batch documented {report.documented} files ({report.skipped} skipped, "
+            f"{report.failed} failed) in {report.elapsed:.1f}s, {report.files_per_second:.2f} files/sec"
+        )
+        return report
+
+    def run_repository(self, git_manager, progress_callback: Optional[Callable[[int, int], None]] = None) -> BatchReport:
+        """Document the working tree of the repository loaded by a GitManager"""
+        return self.run(git_manager.repo.working_tree_dir, progress_callback)
+
+
+if __name__ == "__main__":
+    from document_generator import DocumentGenerator
+    from llm_backends import create_backend
+
+    parser = argparse.ArgumentParser(description="Generate documentation for every module in a directory")
+    parser.add_argument('root', help="Directory to document")
+    parser.add_argument('--output', default='batch_docs', help="Output directory for Markdown files")
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent LLM requests")
+    parser.add_argument('--rate', type=float, default=None,
+                        help="Maximum LLM requests per second per provider (default: the provider's limit)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # The backend comes from DOCGEN_BACKEND and throttles each provider it calls
+    generator = DocumentGenerator(create_backend(requests_per_second=args.rate))
+    documenter = BatchDocumenter(generator, output_dir=args.output, max_workers=args.workers)
+    result = documenter.run(args.root)
+    print(f"Documented {result.documented}/{result.files_total} files "
+          f"({result.skipped} skipped, {result.failed} failed) at {result.files_per_second:.2f} files/sec")
@@ -0,0 +1,120 @@
+# benchmarks/bench_api_docs.py
+"""
+Endpoint extraction on a synthetic FastAPI package: the previous extractor
+(full structure visit of every function, no router prefixes) against the
+statement-level RouteCollector, on one large module and on a multi-file
+package parsed serially and in a process pool:
+
+    python -m benchmarks.bench_api_docs
+    python -m benchmarks.bench_api_docs --endpoints 5000 --modules 100
+"""
+import argparse
+import ast
+import os
+import tempfile
+import time
+
+from api_docs import APIDocumentationGenerator, APIEndpoint, RouteCollector, resolve_endpoints
+from code_analyzer import collect_structure
+
+
+def router_module(module: int, endpoints: int, router: str = 'router') -> str:
+    lines = ["from fastapi import APIRouter, Depends", "from typing import Dict, List", "",
+             f"{router} = APIRouter(prefix=\"/resource{module}\")", ""]
+    for number in range(endpoints):
+        method = ('get', 'post', 'put', 'delete')[number % 4]
+        lines += [
+            f"@{router}.{method}(\"/items{number}/{{item_id}}\")",
+            f"async def endpoint_{module}_{number}(item_id: int, limit: int = 10, db=Depends(get_db)) -> Dict[str, int]:",
+            f"    \"\"\"Handle item {number} of resource {module}.",
+            "",
+            "    Parameters:",
+            "    item_id: Identifier of the item",
+            "    \"\"\"",
+            "    result = {}",
+            "    for i in range(limit):",
+            "        if i % 2:",
+            "            result[str(i)] = await db.fetch(item_id, i)",
+            "        else:",
+            "            result[str(i)] = helper(item_id, i)",
+            "    return result",
+            "",
+        ]
+    return '\n'.join(lines) + '\n'
+
+
+def main_module(modules: int) -> str:
+    lines = ["from fastapi import FastAPI", "from .routers import " + ", ".join(f"r{m}" for m in range(modules)),
+             "", "app = FastAPI()"]
+    lines += [f"app.include_router(r{m}.router, prefix=\"/api/v1\")" for m in range(modules)]
+    return '\n'.join(lines) + '\n'
+
+
+def legacy_extract(code: str):
+    """The previous parse_fastapi_app: every function visited, paths taken as written"""
+    endpoints = []
+    functions = (node for node in ast.walk(collect_structure(code).tree)
+                 if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)))
+    for node in functions:
+        path = method = None
+        for decorator in node.decorator_list:
+            if isinstance(decorator, ast.Call) and hasattr(decorator.func, 'attr'):
+                method = decorator.func.attr.lower()
+                for arg in decorator.args:
+                    if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                        path = arg.value
+        if path and method:
+            docstring = ast.get_docstring(node)
+            description = APIDocumentationGenerator._parse_docstring(docstring) if docstring else ""
+            parameters = [{'name': arg.arg, 'type': APIDocumentationGenerator._get_type_hint(arg.annotation)
+                           if arg.annotation else None, 'required': True} for arg in node.args.args[1:]]
+            response = {'type': APIDocumentationGenerator._get_type_hint(node.returns)} if node.returns else {}
+            endpoints.append(APIEndpoint(path, method, description, parameters, response, False))
+    return endpoints
+
+
+def timed(fn, *args, repeat: int = 3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API endpoint extraction")
+    parser.add_argument('--endpoints', type=int, default=1000)
+    parser.add_argument('--modules', type=int, default=50)
+    args = parser.parse_args()
+    per_module = args.endpoints // args.modules
+
+    # Distinct router names, as one module holding many routers would have
+    single = ''.join(router_module(module, per_module, f"router{module}") for module in range(args.modules))
+    print(f"{args.modules * per_module} endpoints, {len(single) / 1e6:.1f} MB of source")
+    legacy, legacy_endpoints = timed(legacy_extract, single)
+    # Parsed directly: extract_module_routes would serve repeats from the analysis cache
+    current, endpoints = timed(lambda code: resolve_endpoints([RouteCollector().collect(ast.parse(code))]), single)
+    print(f"one module:  legacy {legacy:.3f}s ({len(legacy_endpoints)} endpoints), "
+          f"single pass {current:.3f}s ({len(endpoints)} endpoints), {legacy / current:.1f}x")
+
+    with tempfile.TemporaryDirectory() as directory:
+        routers = os.path.join(directory, 'app', 'routers')
+        os.makedirs(routers)
+        for path in (os.path.join(directory, 'app', '__init__.py'), os.path.join(routers, '__init__.py')):
+            open(path, 'w').close()
+        with open(os.path.join(directory, 'app', 'main.py'), 'w') as f:
+            f.write(main_module(args.modules))
+        for module in range(args.modules):
+            with open(os.path.join(routers, f"r{module}.py"), 'w') as f:
+                f.write(router_module(module, per_module))
+
+        generator = APIDocumentationGenerator()
+        for processes in sorted({1, os.cpu_count() or 1}):
+            elapsed, _ = timed(generator.parse_package, directory, processes)
+            print(f"package, {processes} process(es): {elapsed:.3f}s, {len(generator.endpoints)} endpoints, "
+                  f"e.g. {generator.endpoints[0].method.upper()} {generator.endpoints[0].path}")
+
+
+if __name__ == "__main__":
+    main()
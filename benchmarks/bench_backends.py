@@ -0,0 +1,78 @@
+# benchmarks/bench_backends.py
+"""
+Run the same prompt load against several LLM backends and compare latency and throughput.
+
+Without arguments it runs entirely offline: the fake backend and the OpenAI
+backend pointed at the local stub server. Real providers can be added:
+
+    python -m benchmarks.bench_backends
+    python -m benchmarks.bench_backends --backends fake openai ollama --requests 50 --concurrency 8
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.bench_code_analyzer import make_module
+from llm_backends import FakeBackend, OllamaBackend, OpenAIBackend, RoutingBackend
+from benchmarks.stub_llm_server import serve_in_thread
+
+
+def build_backends(names, stub_latency: float):
+    backends = {}
+    for name in names:
+        if name == 'fake':
+            backends[name] = FakeBackend(latency=stub_latency)
+        elif name == 'stub':
+            _, url = serve_in_thread(latency=stub_latency)
+            backends[name] = OpenAIBackend(api_key='stub', base_url=url)
+        elif name == 'openai':
+            backends[name] = OpenAIBackend()
+        elif name == 'ollama':
+            backends[name] = OllamaBackend()
+        elif name == 'routed':
+            _, url = serve_in_thread(latency=stub_latency * 4)
+            backends[name] = RoutingBackend(FakeBackend(latency=stub_latency),
+                                            OpenAIBackend(api_key='stub', base_url=url), threshold_tokens=800)
+    return backends
+
+
+def run_load(backend, prompts, concurrency: int, stream: bool) -> float:
+    def call(prompt):
+        if stream:
+            return ''.join(backend.stream(prompt))
+        return backend.complete(prompt)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, prompts))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM backends head-to-head")
+    parser.add_argument('--backends', nargs='+', default=['fake', 'stub', 'routed'])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.05, help="Simulated latency for offline backends")
+    parser.add_argument('--stream', action='store_true', help="Use streaming requests")
+    args = parser.parse_args()
+
+    # Mix of small and large snippets so routing has something to decide
+    prompts = [make_module(1 + i % 4, 1 + (i * 7) % 12) for i in range(args.requests)]
+
+    def seconds(value):
+        return f"{value:.3f}s" if value is not None else '-'
+
+    print(f"{'backend':>10} {'wall':>8} {'req/s':>8}  {'served by':<28} {'requests':>8} {'p50':>8} "
+          f"{'p95':>8} {'ttft p50':>9} {'errors':>7}")
+    for name, backend in build_backends(args.backends, args.latency).items():
+        wall = run_load(backend, prompts, args.concurrency, args.stream)
+        # A routed backend reports one row per backend it routed to
+        for number, (backend_id, metrics) in enumerate(backend.all_metrics().items()):
+            lead = f"{name:>10} {wall:>7.2f}s {args.requests / wall:>8.1f}" if number == 0 else ' ' * 28
+            print(f"{lead}  {backend_id:<28} {metrics['requests']:>8} {seconds(metrics['latency_p50']):>8} "
+                  f"{seconds(metrics['latency_p95']):>8} {seconds(metrics['first_token_p50']):>9} "
+                  f"{metrics['errors']:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_code_analyzer.py
+"""
+Compare the single-pass StructureVisitor with the previous ast.walk-based analysis.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_code_analyzer
+"""
+import ast
+import time
+
+from code_analyzer import StructureVisitor
+
+
+def make_module(classes: int, methods: int) -> str:
+    """Build a synthetic module with imports, decorated classes, methods and calls"""
+    lines = ["import os", "import sys", "from typing import List, Dict", ""]
+    for c in range(classes):
+        lines.append("@dataclass")
+        lines.append(f"class Service{c}(Base):")
+        lines.append(f"    \"\"\"Service number {c}\"\"\"")
+        for m in range(methods):
+            lines.append("    @router.get(\"/items/{item_id}\")")
+            lines.append(f"    def method_{m}(self, item_id: int, query: str = None) -> Dict[str, int]:")
+            lines.append(f"        value = helper_{m}(item_id) + len(query or '')")
+            lines.append("        for i in range(10):")
+            lines.append("            value += os.path.getsize(str(i)) if i % 2 else i")
+            lines.append("        return {'value': value}")
+        lines.append("")
+        lines.append(f"async def handler_{c}(request):")
+        lines.append(f"    return await Service{c}().method_0(1)")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def legacy_structure(tree: ast.AST):
+    """The previous CodeAnalyzer traversal: three full ast.walk passes"""
+    functions = [node.name for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
+    classes = [node.name for node in ast.walk(tree) if isinstance(node, ast.ClassDef)]
+    relationships = {'class_methods': {}, 'function_calls': [], 'imports': []}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            relationships['class_methods'][node.name] = [
+                n.name for n in node.body if isinstance(n, ast.FunctionDef)
+            ]
+        elif isinstance(node, ast.Import):
+            relationships['imports'].extend(n.name for n in node.names)
+    return functions, classes, relationships
+
+
+def legacy_api_walk(tree: ast.AST):
+    """The previous APIDocumentationGenerator traversal: one more ast.walk pass"""
+    nodes = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            nodes.extend(item for item in node.body if isinstance(item, ast.FunctionDef))
+        elif isinstance(node, ast.FunctionDef):
+            nodes.append(node)
+    return nodes
+
+
+def best_of(func, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    print(f"{'module':>22} {'lines':>8} {'legacy':>10} {'visitor':>10} {'speedup':>8}")
+    for classes, methods in [(20, 10), (100, 20), (200, 40)]:
+        code = make_module(classes, methods)
+
+        def legacy():
+            legacy_structure(ast.parse(code))
+            legacy_api_walk(ast.parse(code))
+
+        def single_pass():
+            StructureVisitor().collect(ast.parse(code))
+
+        legacy_time = best_of(legacy)
+        visitor_time = best_of(single_pass)
+        label = f"{classes} classes x {methods}"
+        print(f"{label:>22} {code.count(chr(10)) + 1:>8} {legacy_time * 1000:>8.1f}ms "
+              f"{visitor_time * 1000:>8.1f}ms {legacy_time / visitor_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
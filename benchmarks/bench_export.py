@@ -0,0 +1,92 @@
+# benchmarks/bench_export.py
+"""
+Compare the original PDF export (whole-document FPDF buffer, 80-character
+cells, temp file read back for download) with the streaming export.
+
+Reports wall time and peak Python heap (tracemalloc) for each:
+
+    python -m benchmarks.bench_export
+    python -m benchmarks.bench_export --size-mb 2 --skip-legacy
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from fpdf import FPDF
+
+from export_utils import DocumentExporter
+
+WORDS = ("the function returns a dictionary of parsed values for each module and raises "
+         "ValueError when the input is empty; see `parse_config` and “process_items” — "
+         "arguments are optional").split()
+
+
+def make_documentation(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    section = 0
+    while total < size:
+        section += 1
+        block = [f"## `function_{section}(arg_{section}, *args)`", ""]
+        for _ in range(rng.randint(1, 4)):
+            block.append(' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 120))))
+            block.append("")
+        text = '\n'.join(block) + '\n'
+        parts.append(text)
+        total += len(text)
+    return ''.join(parts)
+
+
+def legacy_export(documentation: str) -> bytes:
+    """The export path before streaming, including main.py's temp-file round trip"""
+    sanitized = DocumentExporter.sanitize_text(documentation)
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    for line in sanitized.split('\n'):
+        for chunk in [line[i:i + 80] for i in range(0, len(line), 80)]:
+            pdf.cell(0, 10, txt=chunk, ln=True)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'legacy.pdf')
+        pdf.output(path)
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+def measure(fn, documentation: str):
+    """Time an untraced run, then repeat under tracemalloc for the peak heap"""
+    start = time.perf_counter()
+    data = fn(documentation)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(documentation)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF export of large documentation")
+    parser.add_argument('--size-mb', type=float, default=10.0)
+    parser.add_argument('--skip-legacy', action='store_true',
+                        help="Only run the streaming export")
+    args = parser.parse_args()
+
+    documentation = make_documentation(int(args.size_mb * 1024 * 1024))
+    print(f"{len(documentation) / 1e6:.1f} MB of documentation, {documentation.count(chr(10))} lines")
+    print(f"{'export':>10} {'seconds':>9} {'MB/s':>7} {'peak heap':>10} {'pdf size':>9}")
+    runs = [('streaming', DocumentExporter.export_pdf_bytes)]
+    if not args.skip_legacy:
+        runs.insert(0, ('legacy', legacy_export))
+    for name, fn in runs:
+        elapsed, peak, size = measure(fn, documentation)
+        print(f"{name:>10} {elapsed:>9.2f} {len(documentation) / 1e6 / elapsed:>7.2f} "
+              f"{peak / 1e6:>8.1f}MB {size / 1e6:>7.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
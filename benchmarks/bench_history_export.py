@@ -0,0 +1,61 @@
+# benchmarks/bench_history_export.py
+"""
+Throughput and parent-process memory of the bulk history ZIP export, with a
+single rendering process against the full process pool:
+
+    python -m benchmarks.bench_history_export
+    python -m benchmarks.bench_history_export --entries 2000 --formats md,pdf
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_markdown_export import make_markdown
+from history_export import HistoryExporter
+from history_manager import HistoryManager
+
+
+def populate(history: HistoryManager, entries: int, doc_size: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(entries):
+        documentation = make_markdown(doc_size, seed=rng.randrange(1 << 30))
+        code = f"def function_{i}(value):\n    return process_items(value, {i})\n"
+        history.add_entry('bench', code, documentation)
+
+
+def run(history: HistoryManager, path: str, formats, processes: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    report = HistoryExporter(history, processes=processes).export('bench', path, formats)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return report, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk history export")
+    parser.add_argument('--entries', type=int, default=300)
+    parser.add_argument('--doc-kb', type=int, default=8, help="Size of each entry's documentation")
+    parser.add_argument('--formats', default='md,pdf,docx')
+    args = parser.parse_args()
+    formats = [name.strip() for name in args.formats.split(',') if name.strip()]
+
+    with tempfile.TemporaryDirectory() as directory:
+        history = HistoryManager(os.path.join(directory, 'history.db'))
+        populate(history, args.entries, args.doc_kb * 1024)
+        pool_size = os.cpu_count() or 1
+        print(f"{args.entries} entries of {args.doc_kb} KB, formats {','.join(formats)}, {pool_size} CPUs")
+        print(f"{'processes':>9} {'seconds':>9} {'entries/s':>10} {'parent peak':>12} {'zip size':>9}")
+        for processes in sorted({1, pool_size}):
+            path = os.path.join(directory, f"export_{processes}.zip")
+            report, elapsed, peak = run(history, path, formats, processes)
+            print(f"{processes:>9} {elapsed:>9.2f} {report.entries / elapsed:>10.1f} "
+                  f"{peak / 1e6:>10.1f}MB {os.path.getsize(path) / 1e6:>7.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_history_search.py
+"""
+Measure full-text search latency over a large documentation history.
+
+Builds a synthetic history database (indexing is the slow part; reuse the
+file with --db to measure repeatedly), then times ranked searches for one
+user:
+
+    python -m benchmarks.bench_history_search
+    python -m benchmarks.bench_history_search --entries 1000000 --db /tmp/history_1m.db
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from history_manager import HistoryManager
+from history_search import index_entry
+
+WORDS = ("parse load save render fetch update delete validate export import cache token user "
+         "session history document report stream batch queue notify search index config").split()
+
+
+def populate(history: HistoryManager, entries: int, users: int, seed: int = 0):
+    """Insert index rows directly in large batches; bodies are shared so only the index grows"""
+    rng = random.Random(seed)
+    code_hash = history.blobs.db.write(lambda conn: history.blobs.put("def placeholder():\n    pass\n"))
+    batch = 5000
+    for start in range(0, entries, batch):
+        def insert(conn, start=start):
+            for entry_id in range(start + 1, min(start + batch, entries) + 1):
+                name = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{entry_id % 997}"
+                class_name = f"{rng.choice(WORDS).title()}{rng.choice(WORDS).title()}Manager"
+                code = f"class {class_name}:\n    def {name}(self, {rng.choice(WORDS)}):\n        return None\n"
+                documentation = (f"## {name}\n\n" +
+                                 " ".join(rng.choice(WORDS) for _ in range(40)))
+                username = f"user{entry_id % users}"
+                conn.execute(
+                    'INSERT INTO documentation_history (id, username, code_hash, documentation_hash, created_at, '
+                    'title, size) VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, ?, ?)',
+                    (entry_id, username, code_hash, code_hash, f"class {class_name}", len(code) + len(documentation))
+                )
+                index_entry(conn, entry_id, username, f"class {class_name}", code, documentation)
+        history.db.write(insert)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history full-text search")
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--db', help="History database to build or reuse")
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    directory = tempfile.TemporaryDirectory()
+    path = args.db or os.path.join(directory.name, 'history.db')
+    history = HistoryManager(path)
+    existing = history.db.execute('SELECT COUNT(*) FROM documentation_history').fetchone()[0]
+    if existing < args.entries:
+        start = time.perf_counter()
+        populate(history, args.entries, args.users)
+        print(f"Indexed {args.entries} entries in {time.perf_counter() - start:.1f}s")
+
+    rng = random.Random(1)
+    queries = [rng.choice(["history", "cache manager", "parse_load", "SessionQueue", "validate exp", "token"])
+               for _ in range(args.queries)]
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        history.search(f"user{rng.randrange(args.users)}", query)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"{args.queries} searches over {max(existing, args.entries)} entries: "
+          f"p50 {timings[len(timings) // 2] * 1000:.1f}ms, p95 {timings[int(0.95 * len(timings))] * 1000:.1f}ms, "
+          f"max {timings[-1] * 1000:.1f}ms")
+    directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_history_storage.py
+"""
+Compare inline TEXT history rows with the compressed, deduplicated blob store.
+
+Entries are near-duplicates (the same modules resubmitted with small edits),
+which is what real history looks like:
+
+    python -m benchmarks.bench_history_storage
+    python -m benchmarks.bench_history_storage --entries 20000 --duplicate-ratio 0.5
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.bench_code_analyzer import make_module
+from history_manager import HistoryManager
+
+
+def make_entries(count: int, duplicate_ratio: float, seed: int = 0):
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        if entries and rng.random() < duplicate_ratio:
+            code, documentation = rng.choice(entries)
+        else:
+            code = make_module(1 + i % 3, 2 + i % 9).replace('value', f"value_{i}")
+            documentation = "\n\n".join(
+                f"## `{line.strip()}`\n\nThis function takes the following parameters and returns the result "
+                f"for entry {i}." for line in code.splitlines() if line.strip().startswith('def ')
+            )
+        entries.append((code, documentation))
+    return entries
+
+
+def inline_store(path: str, entries):
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE documentation_history (id INTEGER PRIMARY KEY, username TEXT, code TEXT, '
+                 'documentation TEXT, created_at DATETIME)')
+    start = time.perf_counter()
+    for code, documentation in entries:
+        conn.execute('INSERT INTO documentation_history (username, code, documentation, created_at) '
+                     'VALUES (?, ?, ?, CURRENT_TIMESTAMP)', ('bench', code, documentation))
+        conn.commit()
+    write = time.perf_counter() - start
+    start = time.perf_counter()
+    for (entry_id,) in conn.execute('SELECT id FROM documentation_history').fetchall():
+        conn.execute('SELECT code, documentation FROM documentation_history WHERE id=?', (entry_id,)).fetchone()
+    read = time.perf_counter() - start
+    conn.close()
+    return write, read
+
+
+def blob_store(path: str, entries):
+    history = HistoryManager(path)
+    start = time.perf_counter()
+    ids = [history.add_entry('bench', code, documentation) for code, documentation in entries]
+    write = time.perf_counter() - start
+    start = time.perf_counter()
+    for entry_id in ids:
+        history.get_entry('bench', entry_id)
+    read = time.perf_counter() - start
+    history.db.execute('VACUUM')
+    history.db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    return write, read
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark history body storage")
+    parser.add_argument('--entries', type=int, default=3000)
+    parser.add_argument('--duplicate-ratio', type=float, default=0.4,
+                        help="Fraction of entries that resubmit an earlier body")
+    args = parser.parse_args()
+
+    entries = make_entries(args.entries, args.duplicate_ratio)
+    raw_bytes = sum(len(code) + len(documentation) for code, documentation in entries)
+    print(f"{args.entries} entries, {raw_bytes / 1e6:.1f} MB of text")
+    print(f"{'layout':>8} {'db size':>10} {'writes/s':>10} {'reads/s':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, store in (('inline', inline_store), ('blobs', blob_store)):
+            path = os.path.join(directory, f"{name}.db")
+            write, read = store(path, entries)
+            print(f"{name:>8} {os.path.getsize(path) / 1e6:>8.2f}MB {len(entries) / write:>10.0f} "
+                  f"{len(entries) / read:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_notifications.py
+"""
+Compare the per-rerun notification query before and after indexing and caching.
+
+Fills a notifications table for many users, then times what the sidebar
+does on every rerun: previously all of a user's notifications filtered in
+Python without an index, now a cached, indexed unread count:
+
+    python -m benchmarks.bench_notifications
+    python -m benchmarks.bench_notifications --users 100000 --per-user 10
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from collaboration import CollaborationManager
+
+LEGACY_SCHEMA = ('CREATE TABLE notifications (id INTEGER PRIMARY KEY AUTOINCREMENT, user TEXT, message TEXT, '
+                 'read BOOLEAN, created_at DATETIME)')
+
+
+def fill(conn: sqlite3.Connection, users: int, per_user: int, seed: int = 0):
+    rng = random.Random(seed)
+    rows = ((f"user{rng.randrange(users)}", "Document shared with you", rng.random() < 0.8, '2024-01-01 00:00:00')
+            for _ in range(users * per_user))
+    conn.executemany('INSERT INTO notifications (user, message, read, created_at) VALUES (?, ?, ?, ?)', rows)
+
+
+def timed(fn, users, samples: int, seed: int = 1):
+    rng = random.Random(seed)
+    picks = [f"user{rng.randrange(users)}" for _ in range(samples)]
+    start = time.perf_counter()
+    for user in picks:
+        fn(user)
+    return (time.perf_counter() - start) / samples * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark notification unread counts")
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--per-user', type=int, default=10)
+    parser.add_argument('--samples', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        legacy = sqlite3.connect(os.path.join(directory, 'legacy.db'))
+        legacy.execute(LEGACY_SCHEMA)
+        fill(legacy, args.users, args.per_user)
+        legacy.commit()
+
+        manager = CollaborationManager(os.path.join(directory, 'collaboration.db'))
+        manager.db.write(lambda conn: fill(conn, args.users, args.per_user))
+        print(f"{args.users} users, {args.users * args.per_user} notifications")
+
+        def legacy_unread(user):
+            rows = legacy.execute('SELECT * FROM notifications WHERE user=? ORDER BY created_at DESC',
+                                  (user,)).fetchall()
+            return len([row for row in rows if not row[3]])
+
+        print(f"{'query':>28} {'ms/rerun':>9}")
+        print(f"{'legacy full fetch + filter':>28} {timed(legacy_unread, args.users, max(args.samples // 20, 5)):>9.3f}")
+        print(f"{'indexed count (cold cache)':>28} {timed(manager.count_unread, args.users, args.samples, seed=2):>9.3f}")
+        print(f"{'indexed count (warm cache)':>28} {timed(manager.count_unread, args.users, args.samples, seed=2):>9.3f}")
+        page = lambda user: manager.get_notifications(user, 20, unread_only=True)
+        print(f"{'unread page of 20':>28} {timed(page, args.users, args.samples):>9.3f}")
+
+        start = time.perf_counter()
+        for i in range(args.samples):
+            manager.mark_notifications_read(f"user{i}")
+        print(f"{'bulk mark read':>28} {(time.perf_counter() - start) / args.samples * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# benchmarks/bench_sanitize.py
+"""
+Compare the original sanitize_text (one str.replace per mapping plus a regex
+pass) with the single-pass Latin-1 mapping, on multi-MB documentation with
+a realistic mix of ASCII, typographic punctuation, accents and symbols:
+
+    python -m benchmarks.bench_sanitize
+    python -m benchmarks.bench_sanitize --size-mb 20 --non-ascii 0.05
+"""
+import argparse
+import random
+import re
+import time
+
+from export_utils import DocumentExporter
+
+LEGACY_REPLACEMENTS = {
+    '—': '--', '–': '-', '‘': "'", '’': "'", '“': '"', '”': '"',
+    '•': '*', '…': '...', '©': '(c)', '®': '(R)', '™': '(TM)',
+}
+
+NON_ASCII = list('—–‘’“”•…éü©→≤'
+                 'āﬁＡ中文✓') + ['\U0001f680']
+
+
+def legacy_sanitize(text: str) -> str:
+    for unicode_char, replacement in LEGACY_REPLACEMENTS.items():
+        text = text.replace(unicode_char, replacement)
+    return re.sub(r'[^\x00-\xff]', ' ', text)
+
+
+def make_text(size: int, non_ascii: float, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = "the function returns parsed values for each module and raises ValueError".split()
+    parts = []
+    total = 0
+    while total < size:
+        word = rng.choice(words)
+        if rng.random() < non_ascii * 8:
+            word += rng.choice(NON_ASCII)
+        parts.append(word)
+        total += len(word) + 1
+    return ' '.join(parts)
+
+
+def best_of(fn, text: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF text sanitizing")
+    parser.add_argument('--size-mb', type=float, default=10.0)
+    parser.add_argument('--non-ascii', type=float, default=0.005,
+                        help="Approximate fraction of non-ASCII characters")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    text = make_text(int(args.size_mb * 1024 * 1024), args.non_ascii)
+    ascii_text = text.encode('ascii', 'ignore').decode('ascii')
+    print(f"{len(text) / 1e6:.1f} MB, {sum(ord(c) > 127 for c in text) / len(text):.2%} non-ASCII")
+    print(f"{'input':>9} {'legacy s':>9} {'current s':>10} {'speedup':>8}")
+    for name, sample in (('mixed', text), ('ascii', ascii_text)):
+        legacy = best_of(legacy_sanitize, sample, args.repeat)
+        current = best_of(DocumentExporter.sanitize_text, sample, args.repeat)
+        # ASCII input returns immediately, which is too fast to time meaningfully
+        speedup = f"{legacy / current:.1f}x" if current > 1e-4 else '-'
+        print(f"{name:>9} {legacy:>9.3f} {current:>10.3f} {speedup:>8}")
+
+    # Both must produce Latin-1; they differ only where a closer equivalent exists
+    assert DocumentExporter.sanitize_text(text).encode('latin-1')
+    differences = {char: (legacy_sanitize(char), DocumentExporter.sanitize_text(char))
+                   for char in NON_ASCII if legacy_sanitize(char) != DocumentExporter.sanitize_text(char)}
+    print("changed mappings:", ', '.join(f"{char!r}: {old!r} -> {new!r}"
+                                         for char, (old, new) in differences.items()))
+
+
+if __name__ == "__main__":
+    main()
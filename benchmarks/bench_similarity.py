@@ -0,0 +1,101 @@
+# benchmarks/bench_similarity.py
+"""
+Measure similarity lookups against a large MinHash/LSH index.
+
+The index is filled with random signatures (distinct code) plus real
+signatures of randomly generated modules; lookups use copies of those
+modules with renamed identifiers and an added statement, and report latency
+and recall:
+
+    python -m benchmarks.bench_similarity
+    python -m benchmarks.bench_similarity --entries 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from db import get_database
+from similarity_index import NUM_PERM, SimilarityIndex, signature
+
+
+STATEMENTS = [
+    "    {var} = {arg}.{attr}({other})",
+    "    if {var} > {arg}.{attr}:\n        return None",
+    "    for {other} in {arg}.{attr}():\n        {var}.append({other})",
+    "    {var} = [{other}.{attr} for {other} in {arg}]",
+    "    with open({arg}) as {other}:\n        {var} = {other}.{attr}()",
+    "    try:\n        {var} = {arg}.{attr}\n    except KeyError:\n        {var} = {other}",
+    "    {var} += len({arg}.{attr})",
+    "    logger.{attr}({var}, {arg})",
+]
+ATTRIBUTES = ("get items keys values append extend read write split strip lower upper info debug warning "
+              "encode decode load dump parse fetch commit close").split()
+
+
+def random_module(rng: random.Random) -> str:
+    lines = []
+    for f in range(rng.randint(1, 4)):
+        lines.append(f"def function_{f}(arg, other=None):")
+        lines.append("    var = []")
+        for _ in range(rng.randint(3, 8)):
+            lines.append(rng.choice(STATEMENTS).format(var='var', arg='arg', other='other',
+                                                       attr=rng.choice(ATTRIBUTES)))
+        lines.append("    return var")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def variant(code: str, rng: random.Random) -> str:
+    """Rename identifiers and add a statement, as a resubmission of the same code would"""
+    renamed = code.replace('var', f"result_{rng.randrange(1000)}").replace('other', 'item')
+    return renamed.replace("    return ", "    print(arg)\n    return ", 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark similarity index lookups")
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--originals', type=int, default=200, help="Real modules stored and looked up")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        db = get_database(os.path.join(directory, 'similarity.db'))
+        db.write(SimilarityIndex.create_tables)
+
+        start = time.perf_counter()
+        batch = 10000
+        for first in range(0, args.entries, batch):
+            def fill(conn, first=first):
+                for entry_id in range(first + 1, min(first + batch, args.entries) + 1):
+                    sig = tuple(rng.getrandbits(32) for _ in range(NUM_PERM))
+                    SimilarityIndex.add(conn, entry_id, sig, 'bench')
+            db.write(fill)
+
+        originals = [random_module(rng) for _ in range(args.originals)]
+        signatures = [signature(code) for code in originals]
+
+        def add_originals(conn):
+            for offset, sig in enumerate(signatures):
+                SimilarityIndex.add(conn, args.entries + offset + 1, sig, 'bench')
+        db.write(add_originals)
+        print(f"Indexed {args.entries + args.originals} entries in {time.perf_counter() - start:.1f}s")
+
+        timings = []
+        found = 0
+        conn = db.connection()
+        for offset, code in enumerate(originals):
+            query = signature(variant(code, rng))
+            start = time.perf_counter()
+            matches = SimilarityIndex.lookup(conn, query, 'bench', 0.6)
+            timings.append(time.perf_counter() - start)
+            found += bool(matches) and matches[0][0] == args.entries + offset + 1
+        timings.sort()
+        print(f"lookups: p50 {timings[len(timings) // 2] * 1000:.2f}ms, "
+              f"p95 {timings[int(0.95 * len(timings))] * 1000:.2f}ms; "
+              f"recall of edited copies {found / len(originals):.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_site_builder.py
+"""
+Full and incremental build times of the static HTML site for a large batch
+run: a full build, a rebuild with nothing changed, a rebuild after editing a
+few modules, and one after adding a module that other pages link to:
+
+    python -m benchmarks.bench_site_builder
+    python -m benchmarks.bench_site_builder --modules 1000 --edits 50
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_markdown_export import sentence
+from site_builder import SiteBuilder, batch_pages
+
+
+def module_markdown(rng: random.Random, module: int, modules: int, functions: int) -> str:
+    lines = [f"# pkg/sub_{module % 50}/module_{module}.py", "", sentence(rng, 20, 60), ""]
+    for number in range(functions):
+        # Most modules call into a few others, so pages link across the site
+        other = rng.randrange(modules)
+        lines += [f"## `func_{module}_{number}(value, *args)`", "", sentence(rng, 20, 80),
+                  f"Delegates to `func_{other}_{rng.randrange(functions)}()` and `helper_{module % 7}`.", "",
+                  "### Parameters", "", f"- `value` (int): {sentence(rng, 4, 12)}", "",
+                  "```python", f"def func_{module}_{number}(value, *args):", "    return value", "```", ""]
+    return '\n'.join(lines) + '\n'
+
+
+def write_module(docs_dir: str, module: int, text: str):
+    path = os.path.join(docs_dir, 'pkg', f"sub_{module % 50}", f"module_{module}.md")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def timed_build(builder: SiteBuilder, docs_dir: str):
+    start = time.perf_counter()
+    report = builder.build(batch_pages(docs_dir))
+    return time.perf_counter() - start, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark static site builds")
+    parser.add_argument('--modules', type=int, default=5000)
+    parser.add_argument('--functions', type=int, default=4, help="Documented functions per module")
+    parser.add_argument('--edits', type=int, default=10, help="Modules changed before the incremental build")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        docs_dir = os.path.join(directory, 'docs')
+        total_bytes = 0
+        for module in range(args.modules):
+            text = module_markdown(rng, module, args.modules, args.functions)
+            total_bytes += len(text)
+            write_module(docs_dir, module, text)
+        builder = SiteBuilder(os.path.join(directory, 'site'))
+        print(f"{args.modules} modules, {total_bytes / 1e6:.1f} MB of Markdown")
+
+        def show(label, elapsed, report):
+            print(f"{label:>22} {elapsed:>8.2f}s  rendered {report.rendered:>5}  relinked {report.relinked:>4}  "
+                  f"unchanged {report.unchanged:>5}")
+
+        show("full build", *timed_build(builder, docs_dir))
+        show("no changes", *timed_build(builder, docs_dir))
+        for module in rng.sample(range(args.modules), args.edits):
+            write_module(docs_dir, module, module_markdown(rng, module, args.modules, args.functions))
+        show(f"{args.edits} modules edited", *timed_build(builder, docs_dir))
+        # Defines helper_0, which a seventh of all pages reference
+        write_module(docs_dir, args.modules, f"# pkg/helpers.py\n\n## helper_0\n\n{sentence(rng, 10, 20)}\n")
+        show("linked module added", *timed_build(builder, docs_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/bench_sqlite_load.py
+"""
+Simulate concurrent Streamlit sessions writing and reading history and notifications.
+
+Compares the previous access pattern (a connection per session in rollback
+journal mode, committing every insert) with the shared WAL database layer
+and its batched writer:
+
+    python -m benchmarks.bench_sqlite_load
+    python -m benchmarks.bench_sqlite_load --sessions 64 --iterations 50
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from collaboration import CollaborationManager
+from history_manager import HistoryManager
+
+CODE = "def handler(request):\n    return {'status': 'ok'}\n" * 20
+DOCUMENTATION = "## handler\n\nReturns the status of the service.\n" * 20
+
+
+class LegacySession:
+    """One session's connections, used the way the stores used them before the shared layer"""
+
+    def __init__(self, directory: str):
+        self.history = sqlite3.connect(os.path.join(directory, 'legacy_history.db'))
+        self.collaboration = sqlite3.connect(os.path.join(directory, 'legacy_collaboration.db'))
+
+    @staticmethod
+    def create(directory: str):
+        conn = sqlite3.connect(os.path.join(directory, 'legacy_history.db'))
+        conn.execute('CREATE TABLE documentation_history (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, '
+                     'code TEXT, documentation TEXT, created_at DATETIME)')
+        conn.commit()
+        conn = sqlite3.connect(os.path.join(directory, 'legacy_collaboration.db'))
+        conn.execute('CREATE TABLE notifications (id INTEGER PRIMARY KEY AUTOINCREMENT, user TEXT, message TEXT, '
+                     'read BOOLEAN, created_at DATETIME)')
+        conn.commit()
+
+    def iteration(self, user: str):
+        self.history.execute('INSERT INTO documentation_history (username, code, documentation, created_at) '
+                             'VALUES (?, ?, ?, ?)', (user, CODE, DOCUMENTATION, datetime.now()))
+        self.history.commit()
+        self.history.execute('SELECT * FROM documentation_history WHERE username=? ORDER BY created_at DESC '
+                             'LIMIT 10', (user,)).fetchall()
+        self.collaboration.execute('INSERT INTO notifications (user, message, read, created_at) VALUES (?, ?, ?, ?)',
+                                   (user, 'Document shared with you', False, datetime.now()))
+        self.collaboration.commit()
+        self.collaboration.execute('SELECT * FROM notifications WHERE user=? ORDER BY created_at DESC',
+                                   (user,)).fetchall()
+
+
+class SharedSession:
+    def __init__(self, directory: str):
+        self.history = HistoryManager(os.path.join(directory, 'history.db'))
+        self.collaboration = CollaborationManager(os.path.join(directory, 'collaboration.db'))
+
+    def iteration(self, user: str):
+        self.history.add_entry(user, CODE, DOCUMENTATION)
+        self.history.get_history_page(user, 10)
+        self.collaboration.add_notification(user, 'Document shared with you')
+        self.collaboration.get_notifications(user)
+
+
+def run(session_factory, sessions: int, iterations: int):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(index: int):
+        session = session_factory()
+        for _ in range(iterations):
+            start = time.perf_counter()
+            try:
+                session.iteration(f"user{index}")
+            except sqlite3.Error as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    latencies.sort()
+    p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else float('nan')
+    return wall, len(latencies), p95, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the SQLite stores with concurrent sessions")
+    parser.add_argument('--sessions', type=int, default=32)
+    parser.add_argument('--iterations', type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions x {args.iterations} iterations "
+          f"(each: history insert + page read + notification insert + notification read)")
+    print(f"{'layer':>8} {'wall':>8} {'iter/s':>8} {'p95':>8} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        LegacySession.create(directory)
+        layers = (('legacy', lambda: LegacySession(directory)), ('shared', lambda: SharedSession(directory)))
+        for name, factory in layers:
+            wall, completed, p95, errors = run(factory, args.sessions, args.iterations)
+            print(f"{name:>8} {wall:>7.2f}s {completed / wall:>8.1f} {p95 * 1000:>6.1f}ms {len(errors):>7}")
+            if errors:
+                print(f"{'':>8} first error: {errors[0]}")
+        history = HistoryManager(os.path.join(directory, 'history.db'))
+        print(f"shared history writer: {history.db.stats()['writes_per_commit']:.1f} writes per commit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/stub_llm_server.py
+"""
+Local stand-in for an OpenAI-compatible chat completions endpoint.
+
+Lets the LLM client, backends and load tests run without network access:
+
+    python -m benchmarks.stub_llm_server --port 8765 --latency 0.2 --rate-limit-every 5
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub streamlit run main.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+
+class StubCompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    token_delay = 0.0
+    rate_limit_every = 0
+    malformed_stream = False
+    requests = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        cls = type(self)
+        with cls.lock:
+            cls.requests += 1
+            count = cls.requests
+
+        if not self.path.endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'Not found'}})
+            return
+        if self.headers.get('Authorization') in (None, 'Bearer ', 'Bearer invalid'):
+            self._send_json(401, {'error': {'message': 'Invalid API key'}})
+            return
+        if cls.rate_limit_every and count % cls.rate_limit_every == 0:
+            self._send_json(429, {'error': {'message': 'Rate limit reached'}}, {'Retry-After': '0.05'})
+            return
+
+        time.sleep(cls.latency)
+        prompt = payload['messages'][-1]['content']
+        content = f"## Documentation\n\nStub documentation for a prompt of {len(prompt)} characters."
+
+        if not payload.get('stream'):
+            self._send_json(200, {'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}}]})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for number, word in enumerate(content.split(' ')):
+            event = {'choices': [{'index': 0, 'delta': {'content': word + ' '}}]}
+            self._write_chunk(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+            if cls.malformed_stream and number == 0:
+                self._write_chunk(b"data: {\"choices\": [\n\n")
+            time.sleep(cls.token_delay)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+
+def serve_in_thread(port: int = 0, **options) -> Tuple[ThreadingHTTPServer, str]:
+    """Start a stub server on a background thread; returns (server, base_url)"""
+    handler = type('ConfiguredStubHandler', (StubCompletionHandler,), dict(options, requests=0))
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a stub OpenAI-compatible completions API")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds before the first byte")
+    parser.add_argument('--token-delay', type=float, default=0.0, help="Seconds between streamed chunks")
+    parser.add_argument('--rate-limit-every', type=int, default=0, help="Answer every Nth request with 429")
+    parser.add_argument('--malformed-stream', action='store_true', help="Send a broken event after the first chunk")
+    args = parser.parse_args()
+
+    server, url = serve_in_thread(args.port, latency=args.latency, token_delay=args.token_delay,
+                                  rate_limit_every=args.rate_limit_every, malformed_stream=args.malformed_stream)
+    print(f"Stub LLM API listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,191 @@
+# blob_store.py
+import hashlib
+import sqlite3
+import threading
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from db import Database
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Preset dictionary shared by every compressed body. Short snippets compress
+# poorly on their own; priming the compressor with the boilerplate that
+# recurs in Python code and generated Markdown documentation fixes that.
+# The bytes are part of the on-disk format: never edit them in place, add a
+# new dictionary and codec name instead.
+DICTIONARY_V1 = (
+    "## Documentation\n\n## Overview\n\n## Functions\n\n## Classes\n\n## Parameters\n\n"
+    "## Returns\n\n## Raises\n\n## Example\n\n## Usage\n\n### Parameters\n\n### Returns\n\n"
+    "**Parameters:**\n- `self`\n**Returns:**\n**Raises:**\n**Example:**\n```python\n```\n"
+    "This function takes the following parameters and returns the result.\n"
+    "This class provides methods to manage and process the data.\n"
+    "    Args:\n    Returns:\n    Raises:\n        ValueError: If the input is invalid.\n"
+    "import os\nimport sys\nimport json\nimport logging\nimport sqlite3\nfrom typing import "
+    "Any, Dict, List, Optional, Tuple\nfrom datetime import datetime\n"
+    "logger = logging.getLogger(__name__)\n\n"
+    "class \ndef __init__(self, \n        self.\n    def \n    async def \n"
+    "        return \n        if \n        for \n in \n        try:\n        except Exception as e:\n"
+    "            logger.error(f\"Error: {str(e)}\")\n            return None\n"
+    "        with open(\n\nif __name__ == \"__main__\":\n    main()\n"
+    "True\nFalse\nNone\nself\nprint(\n"
+).encode('utf-8')
+
+# Bodies shorter than this are stored as-is; compression would not pay off
+MIN_COMPRESS_BYTES = 64
+
+CODECS = ('raw', 'zlib-d1', 'zstd-d1')
+
+_zstd_dict = zstandard.ZstdCompressionDict(DICTIONARY_V1, dict_type=zstandard.DICT_TYPE_RAWCONTENT) \
+    if zstandard is not None else None
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def compress_text(text: str) -> Tuple[str, bytes]:
+    """
+    Compress text with the best available codec.
+
+    Returns:
+        tuple: (codec name, compressed bytes)
+    """
+    data = text.encode('utf-8')
+    if len(data) < MIN_COMPRESS_BYTES:
+        return 'raw', data
+    if _zstd_dict is not None:
+        return 'zstd-d1', zstandard.ZstdCompressor(level=9, dict_data=_zstd_dict).compress(data)
+    compressor = zlib.compressobj(level=9, zdict=DICTIONARY_V1)
+    return 'zlib-d1', compressor.compress(data) + compressor.flush()
+
+def decompress_text(codec: str, data: bytes) -> str:
+    if codec == 'raw':
+        return bytes(data).decode('utf-8')
+    if codec == 'zlib-d1':
+        decompressor = zlib.decompressobj(zdict=DICTIONARY_V1)
+        return (decompressor.decompress(data) + decompressor.flush()).decode('utf-8')
+    if codec == 'zstd-d1':
+        if zstandard is None:
+            raise RuntimeError("This body was compressed with zstd; install the 'zstandard' package to read it")
+        return zstandard.ZstdDecompressor(dict_data=_zstd_dict).decompress(data).decode('utf-8')
+    raise ValueError(f"Unknown blob codec '{codec}'")
+
+@dataclass
+class PreparedBlob:
+    """A body hashed and compressed ahead of the write that stores it; no data if already stored"""
+    digest: str
+    codec: Optional[str] = None
+    size: int = 0
+    data: Optional[bytes] = None
+
+class BlobStore:
+    """
+    Content-addressed, compressed text storage inside an existing SQLite database.
+
+    Bodies are keyed by their SHA-256, so storing a body that already exists
+    only costs a primary-key lookup, and identical submissions share one row.
+    Writes go through the caller's connection and are committed by the caller,
+    so a blob and the row referencing it land in the same transaction.
+
+    With a ``Database``, call ``prepare`` before ``Database.write`` and
+    ``store`` inside it: compression then runs on the session's own thread
+    instead of the single writer thread that every session's writes share.
+    """
+
+    def __init__(self, db: Union[sqlite3.Connection, Database]):
+        # With a Database, every call uses the calling thread's connection
+        # (the writer's when called from inside Database.write)
+        self.db = db
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        return self.db.connection() if isinstance(self.db, Database) else self.db
+
+    @staticmethod
+    def create_table(conn: sqlite3.Connection):
+        conn.execute(
+            '''CREATE TABLE IF NOT EXISTS blobs
+               (hash TEXT PRIMARY KEY,
+                codec TEXT,
+                size INTEGER,
+                data BLOB)'''
+        )
+
+    def prepare(self, text: str) -> PreparedBlob:
+        """Hash and compress ``text`` on the calling thread; bodies already stored are only hashed"""
+        digest = content_hash(text)
+        # Blobs are never deleted, so one seen here is still there when the write runs
+        if self.conn.execute('SELECT 1 FROM blobs WHERE hash=?', (digest,)).fetchone() is not None:
+            return PreparedBlob(digest)
+        codec, data = compress_text(text)
+        return PreparedBlob(digest, codec, len(text), data)
+
+    def store(self, blob: PreparedBlob) -> str:
+        """Insert a prepared body (if new) through the current connection and return its hash"""
+        if blob.data is not None:
+            self.conn.execute(
+                'INSERT OR IGNORE INTO blobs (hash, codec, size, data) VALUES (?, ?, ?, ?)',
+                (blob.digest, blob.codec, blob.size, blob.data)
+            )
+        return blob.digest
+
+    def put(self, text: str) -> str:
+        """Store ``text`` (if new) and return its hash"""
+        return self.store(self.prepare(text))
+
+    def get(self, digest: str) -> Optional[str]:
+        row = self.conn.execute('SELECT codec, data FROM blobs WHERE hash=?', (digest,)).fetchone()
+        if row is None:
+            return None
+        return decompress_text(row[0], row[1])
+
+    def get_many(self, digests: Iterable[str]) -> Dict[str, str]:
+        """Fetch several bodies in one query; missing hashes are left out"""
+        digests = list(set(digests))
+        if not digests:
+            return {}
+        placeholders = ', '.join('?' for _ in digests)
+        rows = self.conn.execute(
+            f'SELECT hash, codec, data FROM blobs WHERE hash IN ({placeholders})',
+            digests
+        ).fetchall()
+        return {digest: decompress_text(codec, data) for digest, codec, data in rows}
+
+class FileBlobStore:
+    """The same content-addressed storage as ``BlobStore``, as one file per body in a directory"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _find(self, digest: str) -> Optional[Path]:
+        for codec in CODECS:
+            path = self.directory / f"{digest}.{codec}"
+            if path.exists():
+                return path
+        return None
+
+    def put(self, text: str) -> str:
+        digest = content_hash(text)
+        if self._find(digest) is not None:
+            return digest
+        # Compressed outside the lock so concurrent writers of different bodies do not wait on each other
+        codec, data = compress_text(text)
+        with self._lock:
+            if self._find(digest) is None:
+                path = self.directory / f"{digest}.{codec}"
+                temp_path = self.directory / f"{digest}.{codec}.tmp"
+                temp_path.write_bytes(data)
+                temp_path.replace(path)
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        path = self._find(digest)
+        if path is None:
+            return None
+        return decompress_text(path.suffix[1:], path.read_bytes())
@@ -1,12 +1,153 @@
 # code_analyzer.py
 import ast
-from typing import Tuple, List, Dict
+import copy
+from dataclasses import dataclass, field
+from typing import Tuple, List, Dict, Optional, Union
 import logging
+from analysis_cache import analysis_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+FunctionNode = Union[ast.FunctionDef, ast.AsyncFunctionDef]
+
+@dataclass
+class CodeStructure:
+    """Everything CodeAnalyzer and APIDocumentationGenerator need from one parse"""
+    functions: List[str] = field(default_factory=list)
+    async_functions: List[str] = field(default_factory=list)
+    classes: List[str] = field(default_factory=list)
+    class_methods: Dict[str, List[str]] = field(default_factory=dict)
+    imports: List[str] = field(default_factory=list)
+    from_imports: List[str] = field(default_factory=list)
+    function_calls: List[str] = field(default_factory=list)
+    decorators: Dict[str, List[str]] = field(default_factory=dict)
+    # The parsed module itself, so other components can reuse it instead of re-parsing
+    tree: Optional[ast.Module] = None
+
+    def relationships(self) -> Dict:
+        return {
+            'class_methods': self.class_methods,
+            'function_calls': self.function_calls,
+            'imports': self.imports,
+            'from_imports': self.from_imports,
+            'async_functions': self.async_functions,
+            'decorators': self.decorators
+        }
+
+def dotted_name(node: ast.AST) -> Optional[str]:
+    """Return 'a.b.c' for Name/Attribute chains and None for anything else"""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+        return '.'.join(reversed(parts))
+    return None
+
+class StructureVisitor(ast.NodeVisitor):
+    """Collects a CodeStructure in a single traversal of the tree"""
+
+    def __init__(self):
+        self.structure = CodeStructure()
+        self._calls = {}
+        # Innermost enclosing definition: (is_class, name)
+        self._scope = []
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        structure = self.structure
+        structure.classes.append(node.name)
+        structure.class_methods[node.name] = []
+        self._record_decorators(node.name, node.decorator_list)
+        self._scope.append((True, node.name))
+        self.generic_visit(node)
+        self._scope.pop()
+
+    def visit_FunctionDef(self, node: FunctionNode):
+        structure = self.structure
+        structure.functions.append(node.name)
+        if isinstance(node, ast.AsyncFunctionDef):
+            structure.async_functions.append(node.name)
+
+        class_name = None
+        if self._scope and self._scope[-1][0]:
+            class_name = self._scope[-1][1]
+            structure.class_methods[class_name].append(node.name)
+        self._record_decorators(f"{class_name}.{node.name}" if class_name else node.name, node.decorator_list)
+
+        self._scope.append((False, node.name))
+        self.generic_visit(node)
+        self._scope.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Import(self, node: ast.Import):
+        self.structure.imports.extend(alias.name for alias in node.names)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        module = '.' * node.level + (node.module or '')
+        self.structure.from_imports.extend(f"{module}.{alias.name}" for alias in node.names)
+
+    def visit_Call(self, node: ast.Call):
+        name = dotted_name(node.func)
+        if name:
+            self._calls[name] = None
+        self.generic_visit(node)
+
+    def _record_decorators(self, name: str, decorator_list: List[ast.expr]):
+        if not decorator_list:
+            return
+        names = []
+        for decorator in decorator_list:
+            target = decorator.func if isinstance(decorator, ast.Call) else decorator
+            names.append(dotted_name(target) or ast.dump(target))
+        self.structure.decorators[name] = names
+
+    def collect(self, tree: ast.AST) -> CodeStructure:
+        self.visit(tree)
+        self.structure.function_calls = list(self._calls)
+        return self.structure
+
+def collect_structure(code: str) -> CodeStructure:
+    tree = ast.parse(code)
+    structure = StructureVisitor().collect(tree)
+    structure.tree = tree
+    return structure
+
 class CodeAnalyzer:
+    @staticmethod
+    def analyze(code: str) -> CodeStructure:
+        """
+        Parse Python code once and collect its full structure.
+        
+        Results are memoized in the process-wide analysis cache, so the same
+        source is parsed only once no matter how many components analyze it.
+        The returned structure is shared and must not be modified.
+        
+        Args:
+            code (str): Python source code
+            
+        Returns:
+            CodeStructure with functions, classes, methods, imports, calls and decorators
+            
+        Raises:
+            SyntaxError: If the code cannot be parsed
+        """
+        return analysis_cache.get_or_compute(code, collect_structure)
+
+    @staticmethod
+    def parse(code: str) -> ast.Module:
+        """
+        Return the parsed tree of ``code`` from the shared analysis cache.
+        
+        The tree is shared with every other caller and must not be modified.
+        
+        Raises:
+            SyntaxError: If the code cannot be parsed
+        """
+        return CodeAnalyzer.analyze(code).tree
+
     @staticmethod
     def analyze_code_structure(code: str) -> Tuple[List[str], List[str], Dict]:
         """
@@ -16,28 +157,12 @@ class CodeAnalyzer:
             code (str): Python source code
             
         Returns:
-            Tuple containing lists of function names, class names, and their relationships
+            Tuple containing lists of function names, class names, and their relationships.
+            These are copies, so callers may modify them without affecting the cache.
         """
         try:
-            tree = ast.parse(code)
-            functions = [node.name for node in ast.walk(tree) if isinstance(node, ast.FunctionDef)]
-            classes = [node.name for node in ast.walk(tree) if isinstance(node, ast.ClassDef)]
-            
-            # Analyze relationships and dependencies
-            relationships = {
-                'class_methods': {},
-                'function_calls': [],
-                'imports': []
-            }
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.ClassDef):
-                    methods = [n.name for n in node.body if isinstance(n, ast.FunctionDef)]
-                    relationships['class_methods'][node.name] = methods
-                elif isinstance(node, ast.Import):
-                    relationships['imports'].extend(n.name for n in node.names)
-                    
-            return functions, classes, relationships
+            structure = CodeAnalyzer.analyze(code)
+            return list(structure.functions), list(structure.classes), copy.deepcopy(structure.relationships())
         except Exception as e:
             logger.error(f"Error analyzing code: {str(e)}")
-            return [], [], {}
\ No newline at end of file
+            return [], [], {}
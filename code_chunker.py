@@ -0,0 +1,181 @@
+# code_chunker.py
+import ast
+import hashlib
+import math
+import textwrap
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from code_analyzer import CodeAnalyzer
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+# Rough characters-per-token ratio for source code when tiktoken is unavailable
+CHARS_PER_TOKEN = 3.5
+
+def estimate_tokens(text: str) -> int:
+    """Return the (estimated) number of model tokens in ``text``"""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+@dataclass
+class CodeChunk:
+    name: str
+    kind: str  # 'module', 'class', 'method' or 'function'
+    source: str
+    start_line: int
+    end_line: int
+    tokens: int = field(init=False)
+
+    def __post_init__(self):
+        self.tokens = estimate_tokens(self.source)
+
+def _node_start(node: ast.stmt) -> int:
+    decorators = getattr(node, 'decorator_list', None)
+    if decorators:
+        return min(d.lineno for d in decorators)
+    return node.lineno
+
+def _slice(lines: List[str], start: int, end: int) -> str:
+    return ''.join(lines[start - 1:end])
+
+def _split_lines(name: str, kind: str, lines: List[str], start: int, end: int,
+                 max_tokens: int) -> List[CodeChunk]:
+    """Split a line range that has no usable AST boundaries into budget-sized pieces"""
+    chunks = []
+    part_start = start
+    part_tokens = 0
+    for lineno in range(start, end + 1):
+        line_tokens = estimate_tokens(lines[lineno - 1])
+        if part_tokens and part_tokens + line_tokens > max_tokens:
+            chunks.append((part_start, lineno - 1))
+            part_start, part_tokens = lineno, 0
+        part_tokens += line_tokens
+    chunks.append((part_start, end))
+    if len(chunks) == 1:
+        return [CodeChunk(name, kind, _slice(lines, start, end), start, end)]
+    return [
+        CodeChunk(f"{name} (part {i})", kind, _slice(lines, s, e), s, e)
+        for i, (s, e) in enumerate(chunks, 1)
+    ]
+
+def _symbol_chunks(node: ast.stmt, lines: List[str], max_tokens: int, prefix: str = '',
+                   split_classes: bool = False) -> List[CodeChunk]:
+    """Chunk one top-level definition, descending into classes that exceed the budget"""
+    start, end = _node_start(node), node.end_lineno
+    name = prefix + node.name
+    is_class = isinstance(node, ast.ClassDef)
+    kind = 'class' if is_class else ('method' if prefix else 'function')
+    source = _slice(lines, start, end)
+    if estimate_tokens(source) <= max_tokens and not (is_class and split_classes):
+        return [CodeChunk(name, kind, source, start, end)]
+    if not is_class:
+        return _split_lines(name, kind, lines, start, end, max_tokens)
+
+    # Split class: the class header and attributes form one chunk, each method another
+    chunks = []
+    header_lines = []
+    cursor = start
+    for item in node.body:
+        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            item_start = _node_start(item)
+            header_lines.append(_slice(lines, cursor, item_start - 1))
+            chunks.extend(_symbol_chunks(item, lines, max_tokens, f"{name}.", split_classes))
+            cursor = item.end_lineno + 1
+    header_lines.append(_slice(lines, cursor, end))
+    header = ''.join(header_lines)
+    if header.strip():
+        chunks.insert(0, CodeChunk(name, 'class', header, start, end))
+    return chunks
+
+def chunk_code(code: str, max_tokens: int, pack: bool = True, split_classes: bool = False) -> List[CodeChunk]:
+    """
+    Split Python source along class/function boundaries to fit a token budget.
+
+    Module-level statements between definitions are grouped into 'module'
+    chunks. Classes that exceed the budget are split into their methods, and
+    single functions that still exceed it are split by lines. With ``pack``,
+    adjacent small chunks are merged so that each chunk uses as much of the
+    budget as possible. With ``split_classes``, every class is split into its
+    methods regardless of size, giving one chunk per symbol.
+
+    Args:
+        code (str): Python source code
+        max_tokens (int): Token budget per chunk
+        pack (bool): Merge adjacent chunks that fit the budget together
+        split_classes (bool): Always split classes into header and method chunks
+
+    Returns:
+        List of CodeChunk in source order
+    """
+    lines = code.splitlines(keepends=True)
+    try:
+        tree = CodeAnalyzer.parse(code)
+    except SyntaxError:
+        return _split_lines('<module>', 'module', lines, 1, len(lines), max_tokens) if lines else []
+
+    chunks = []
+    module_start: Optional[int] = None
+    module_end = 0
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            if module_start is not None:
+                chunks.extend(_split_lines('<module>', 'module', lines, module_start, module_end, max_tokens))
+                module_start = None
+            chunks.extend(_symbol_chunks(node, lines, max_tokens, split_classes=split_classes))
+        else:
+            if module_start is None:
+                module_start = node.lineno
+            module_end = node.end_lineno
+    if module_start is not None:
+        chunks.extend(_split_lines('<module>', 'module', lines, module_start, module_end, max_tokens))
+
+    if not pack:
+        return chunks
+
+    packed = []
+    for chunk in chunks:
+        if packed and packed[-1].tokens + chunk.tokens <= max_tokens:
+            previous = packed[-1]
+            packed[-1] = CodeChunk(
+                f"{previous.name}, {chunk.name}", 'module',
+                previous.source + chunk.source, previous.start_line, chunk.end_line
+            )
+        else:
+            packed.append(chunk)
+    return packed
+
+def chunk_fingerprint(chunk: CodeChunk) -> str:
+    """
+    Hash a chunk's AST dump so that formatting and comment edits do not count as changes.
+
+    Chunks that do not parse on their own (line-split parts) are hashed on
+    their whitespace-normalized source instead.
+    """
+    source = textwrap.dedent(chunk.source)
+    try:
+        material = ast.dump(ast.parse(source))
+    except SyntaxError:
+        material = ' '.join(source.split())
+    return hashlib.sha256(f"{chunk.kind}\x00{material}".encode('utf-8')).hexdigest()
+
+def interface_fingerprint(chunk: CodeChunk) -> str:
+    """
+    Like chunk_fingerprint, but function and method bodies are left out
+    (docstrings are kept), so edits inside a function do not change it.
+    """
+    if chunk.kind not in ('function', 'method'):
+        return chunk_fingerprint(chunk)
+    try:
+        tree = ast.parse(textwrap.dedent(chunk.source))
+    except SyntaxError:
+        return chunk_fingerprint(chunk)
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            node.body = node.body[:1] if ast.get_docstring(node, clean=False) is not None else []
+    return hashlib.sha256(f"{chunk.kind}\x00interface\x00{ast.dump(tree)}".encode('utf-8')).hexdigest()
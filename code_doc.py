@@ -1,5 +1,4 @@
 import streamlit as st
-import ollama
 import ast
 import json
 from datetime import datetime
@@ -9,7 +8,10 @@ import git
 import os
 from pathlib import Path
 import hashlib
-from typing import Optional, Dict, List
+import time
+from typing import Optional, Dict, List, Iterator
+from llm_backends import OllamaBackend
+from blob_store import FileBlobStore
 
 # Authentication and User Management
 class UserManager:
@@ -46,9 +48,40 @@ class UserManager:
 
 # Documentation History Manager
 class DocumentationHistory:
+    """
+    Per-user history as small JSON index files that reference compressed,
+    deduplicated bodies in a shared blob directory.
+    """
+    # Written once every entry has been moved to the blob store
+    MIGRATION_MARKER = ".blobs_migrated"
+
     def __init__(self, history_path: str = "doc_history"):
         self.history_path = Path(history_path)
         self.history_path.mkdir(exist_ok=True)
+        self.blobs = FileBlobStore(self.history_path / "blobs")
+        self._migrate_inline_entries()
+
+    def _migrate_inline_entries(self):
+        """Move code/documentation of entries written before blob storage into the blob store"""
+        marker = self.history_path / self.MIGRATION_MARKER
+        if marker.exists():
+            return
+        for file in self.history_path.glob("*/*.json"):
+            with open(file, 'r') as f:
+                data = json.load(f)
+            if 'code' not in data:
+                continue
+            entry = {
+                'timestamp': data['timestamp'],
+                'code_hash': self.blobs.put(data['code']),
+                'documentation_hash': self.blobs.put(data['documentation'])
+            }
+            temp_file = file.with_suffix('.json.tmp')
+            with open(temp_file, 'w') as f:
+                json.dump(entry, f)
+            temp_file.replace(file)
+        # New entries are always written in the blob format, so one pass is enough
+        marker.touch()
 
     def save_documentation(self, username: str, code: str, documentation: str) -> str:
         timestamp = datetime.now().isoformat()
@@ -60,8 +93,8 @@ class DocumentationHistory:
         with open(user_path / f"{doc_id}.json", 'w') as f:
             json.dump({
                 'timestamp': timestamp,
-                'code': code,
-                'documentation': documentation
+                'code_hash': self.blobs.put(code),
+                'documentation_hash': self.blobs.put(documentation)
             }, f)
         
         return doc_id
@@ -76,6 +109,9 @@ class DocumentationHistory:
             with open(file, 'r') as f:
                 data = json.load(f)
                 data['id'] = file.stem
+                if 'code_hash' in data:
+                    data['code'] = self.blobs.get(data['code_hash']) or ''
+                    data['documentation'] = self.blobs.get(data['documentation_hash']) or ''
                 history.append(data)
         
         return sorted(history, key=lambda x: x['timestamp'], reverse=True)
@@ -169,6 +205,7 @@ class ErrorHandler:
 user_manager = UserManager()
 history_manager = DocumentationHistory()
 git_manager = GitManager()
+ollama_backend = OllamaBackend(model="deepseek-r1:1.5b")
 
 # Streamlit UI Components
 def render_login_ui():
@@ -193,9 +230,8 @@ def render_login_ui():
             else:
                 st.error("Username already exists!")
 
-def generate_documentation(code_input: str) -> str:
-    """Generate documentation using Ollama"""
-    prompt = f"""
+def build_prompt(code_input: str) -> str:
+    return f"""
     Analyze this Python code and generate comprehensive documentation:
     {code_input}
     
@@ -207,13 +243,19 @@ def generate_documentation(code_input: str) -> str:
     
     Format the response in markdown.
     """
-    
-    response = ollama.chat(
-        model="deepseek-r1:1.5b",
-        messages=[{"role": "user", "content": prompt}]
-    )
-    
-    return response['message']['content']
+
+def generate_documentation(code_input: str) -> str:
+    """Generate documentation using Ollama"""
+    return ollama_backend.complete(build_prompt(code_input))
+
+def generate_documentation_stream(code_input: str) -> Iterator[str]:
+    """Generate documentation using Ollama, yielding chunks as they arrive"""
+    start = time.perf_counter()
+    st.session_state['time_to_first_token'] = None
+    for content in ollama_backend.stream(build_prompt(code_input)):
+        if st.session_state['time_to_first_token'] is None:
+            st.session_state['time_to_first_token'] = time.perf_counter() - start
+        yield content
 
 def render_main_ui():
     st.title("Enhanced GPT-Based Documentation Generator")
@@ -228,8 +270,11 @@ def render_main_ui():
                 # Analyze code
                 functions, classes, imports = analyze_code_structure(code_input)
                 
-                # Generate documentation
-                doc_output = generate_documentation(code_input)
+                # Generate documentation, rendering chunks as they stream in
+                st.write("### Generated Documentation:")
+                doc_output = st.write_stream(generate_documentation_stream(code_input))
+                if st.session_state.get('time_to_first_token') is not None:
+                    st.caption(f"First token after {st.session_state['time_to_first_token']:.2f}s")
                 
                 # Save to history
                 doc_id = history_manager.save_documentation(
@@ -253,9 +298,6 @@ def render_main_ui():
                     'imports': imports
                 })
                 
-                st.write("### Generated Documentation:")
-                st.markdown(doc_output)
-                
                 # Export options
                 st.write("### Export Documentation")
                 export_format = st.selectbox("Choose format:", ["PDF", "DOCX"])
@@ -1,16 +1,62 @@
 # collaboration.py
-import sqlite3
 from datetime import datetime
-from typing import List, Dict
+from typing import Callable, List, Dict, Iterable, Optional
 import json
 import logging
+import threading
+
+from db import get_database
+from notification_broker import NotificationBroker, notification_broker
 
 logger = logging.getLogger(__name__)
 
-class CollaborationManager:
+class UnreadCounts:
+    """
+    Per-user unread notification counts, cached in memory until the next write.
+    
+    Each user has a generation number that every invalidation bumps; a count
+    computed while a write was committing is not stored, so the cache never
+    keeps a value older than the latest write.
+    """
+    
     def __init__(self):
-        self.conn = sqlite3.connect('collaboration.db', check_same_thread=False)
-        self.create_tables()
+        self._counts: Dict[str, int] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, user: str, compute: Callable[[], int]) -> int:
+        with self._lock:
+            if user in self._counts:
+                self.hits += 1
+                return self._counts[user]
+            self.misses += 1
+            generation = self._generations.get(user, 0)
+        count = compute()
+        with self._lock:
+            if self._generations.get(user, 0) == generation:
+                self._counts[user] = count
+        return count
+    
+    def invalidate(self, users: Iterable[str]):
+        with self._lock:
+            for user in users:
+                self._counts.pop(user, None)
+                self._generations[user] = self._generations.get(user, 0) + 1
+
+# One cache per database file, shared by every CollaborationManager in the process
+_unread_counts: Dict[str, UnreadCounts] = {}
+_unread_counts_lock = threading.Lock()
+
+class CollaborationManager:
+    def __init__(self, db_path: str = 'collaboration.db', broker: Optional[NotificationBroker] = None):
+        self.db = get_database(db_path)
+        # Sessions subscribe here instead of polling the notifications table
+        self.broker = broker if broker is not None else notification_broker
+        with _unread_counts_lock:
+            self.unread_counts = _unread_counts.setdefault(self.db.path, UnreadCounts())
+        self.db.setup('collaboration', self.create_tables)
     
     def create_tables(self):
         """Create necessary tables for collaboration features"""
@@ -35,21 +81,32 @@ class CollaborationManager:
                 user TEXT,
                 message TEXT,
                 read BOOLEAN,
-                created_at DATETIME)'''
+                created_at DATETIME)''',
+            
+            # Unread counts and paging by id are answered from this index alone
+            '''CREATE INDEX IF NOT EXISTS idx_notifications_user_read
+               ON notifications (user, read, id)''',
+            
+            '''CREATE INDEX IF NOT EXISTS idx_comments_doc
+               ON comments (doc_id, created_at)''',
+            
+            '''CREATE INDEX IF NOT EXISTS idx_shared_docs_doc
+               ON shared_docs (doc_id)'''
         ]
         
-        for query in queries:
-            self.conn.execute(query)
-        self.conn.commit()
+        def create(conn):
+            for query in queries:
+                conn.execute(query)
+        
+        self.db.write(create)
     
     def share_document(self, doc_id: str, owner: str, shared_with: str, permissions: Dict):
         """Share a document with another user"""
         try:
-            self.conn.execute(
+            self.db.write(lambda conn: conn.execute(
                 'INSERT INTO shared_docs (doc_id, owner, shared_with, permissions, created_at) VALUES (?, ?, ?, ?, ?)',
                 (doc_id, owner, shared_with, json.dumps(permissions), datetime.now())
-            )
-            self.conn.commit()
+            ))
             
             # Create notification
             self.add_notification(
@@ -64,14 +121,13 @@ class CollaborationManager:
     def add_comment(self, doc_id: str, user: str, comment: str):
         """Add a comment to a document"""
         try:
-            self.conn.execute(
+            self.db.write(lambda conn: conn.execute(
                 'INSERT INTO comments (doc_id, user, comment, created_at) VALUES (?, ?, ?, ?)',
                 (doc_id, user, comment, datetime.now())
-            )
-            self.conn.commit()
+            ))
             
             # Get document owner
-            cursor = self.conn.execute(
+            cursor = self.db.execute(
                 'SELECT owner FROM shared_docs WHERE doc_id=?',
                 (doc_id,)
             )
@@ -90,7 +146,7 @@ class CollaborationManager:
     def get_comments(self, doc_id: str) -> List[Dict]:
         """Get all comments for a document"""
         try:
-            cursor = self.conn.execute(
+            cursor = self.db.execute(
                 'SELECT * FROM comments WHERE doc_id=? ORDER BY created_at DESC',
                 (doc_id,)
             )
@@ -108,31 +164,83 @@ class CollaborationManager:
             return []
     
     def add_notification(self, user: str, message: str):
-        """Add a notification for a user"""
+        """Add a notification for a user (queued; committed with the next write batch)"""
+        return self.add_notifications([user], message)
+    
+    def add_notifications(self, users: Iterable[str], message: str):
+        """Send the same notification to several users in one write"""
+        users = list(users)
         try:
-            self.conn.execute(
+            created_at = datetime.now()
+            future = self.db.write(lambda conn: conn.executemany(
                 'INSERT INTO notifications (user, message, read, created_at) VALUES (?, ?, ?, ?)',
-                (user, message, False, datetime.now())
-            )
-            self.conn.commit()
+                [(user, message, False, created_at) for user in users]
+            ), wait=False)
+            # Runs once the batch holding the insert has committed
+            future.add_done_callback(lambda done: self._notified(done, users, message))
             return True
         except Exception as e:
             logger.error(f"Error adding notification: {str(e)}")
             return False
     
-    def get_notifications(self, user: str) -> List[Dict]:
-        """Get all notifications for a user"""
+    def _notified(self, future, users: List[str], message: str):
+        if future.exception() is not None:
+            return
+        self.unread_counts.invalidate(users)
+        for user in users:
+            self.broker.publish(user, {'type': 'notification', 'message': message})
+    
+    def _marked_read(self, user: str):
+        self.unread_counts.invalidate([user])
+        # Lets the user's other sessions update their unread count
+        self.broker.publish(user, {'type': 'read'})
+    
+    def count_unread(self, user: str) -> int:
+        """Number of unread notifications, from the in-memory cache when possible"""
+        def compute():
+            try:
+                return self.db.execute(
+                    'SELECT COUNT(*) FROM notifications WHERE user=? AND read=0',
+                    (user,)
+                ).fetchone()[0]
+            except Exception as e:
+                logger.error(f"Error counting notifications: {str(e)}")
+                return 0
+        return self.unread_counts.get(user, compute)
+    
+    def get_notifications(self, user: str, limit: int = 20, before_id: Optional[int] = None,
+                          unread_only: bool = False) -> List[Dict]:
+        """
+        Get a page of a user's notifications, newest first.
+        
+        Args:
+            user (str): Recipient
+            limit (int): Page size
+            before_id (int, optional): Id of the last notification of the previous page
+            unread_only (bool): Only return unread notifications
+            
+        Returns:
+            list: Notification dicts with id, message, read and created_at
+        """
+        conditions = ['user=?']
+        params = [user]
+        if unread_only:
+            conditions.append('read=0')
+        if before_id is not None:
+            conditions.append('id<?')
+            params.append(before_id)
         try:
-            cursor = self.conn.execute(
-                'SELECT * FROM notifications WHERE user=? ORDER BY created_at DESC',
-                (user,)
+            cursor = self.db.execute(
+                f'SELECT id, message, read, created_at FROM notifications WHERE {" AND ".join(conditions)} '
+                f'ORDER BY id DESC LIMIT ?',
+                (*params, limit)
             )
             return [
                 {
                     'id': row[0],
-                    'message': row[2],
-                    'read': row[3],
-                    'created_at': row[4]
+                    'message': row[1],
+                    'read': row[2],
+                    'created_at': row[3]
                 }
                 for row in cursor.fetchall()
             ]
@@ -142,13 +250,42 @@ class CollaborationManager:
     
     def mark_notification_read(self, notification_id: int):
         """Mark a notification as read"""
+        def update(conn):
+            row = conn.execute('SELECT user FROM notifications WHERE id=?', (notification_id,)).fetchone()
+            conn.execute('UPDATE notifications SET read=1 WHERE id=?', (notification_id,))
+            return row[0] if row else None
+        
         try:
-            self.conn.execute(
-                'UPDATE notifications SET read=? WHERE id=?',
-                (True, notification_id)
-            )
-            self.conn.commit()
+            user = self.db.write(update)
+            if user is not None:
+                self._marked_read(user)
             return True
         except Exception as e:
             logger.error(f"Error marking notification read: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+    
+    def mark_notifications_read(self, user: str, notification_ids: Optional[List[int]] = None) -> int:
+        """
+        Mark several (by default all) of a user's notifications as read in one write.
+        
+        Returns:
+            int: Number of notifications that changed
+        """
+        def update(conn):
+            if notification_ids is None:
+                cursor = conn.execute('UPDATE notifications SET read=1 WHERE user=? AND read=0', (user,))
+            else:
+                placeholders = ', '.join('?' for _ in notification_ids)
+                cursor = conn.execute(
+                    f'UPDATE notifications SET read=1 WHERE user=? AND read=0 AND id IN ({placeholders})',
+                    (user, *notification_ids)
+                )
+            return cursor.rowcount
+        
+        try:
+            changed = self.db.write(update)
+            self._marked_read(user)
+            return changed
+        except Exception as e:
+            logger.error(f"Error marking notifications read: {str(e)}")
+            return 0
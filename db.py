@@ -0,0 +1,165 @@
+# db.py
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+# Applied to every connection. WAL lets readers run while a write is in
+# progress; synchronous=NORMAL is durable across application crashes in WAL
+# mode and only fsyncs at checkpoints.
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA busy_timeout=5000',
+    'PRAGMA cache_size=-16000',
+    'PRAGMA temp_store=MEMORY',
+)
+
+def connect(path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Open a connection with the shared pragmas applied"""
+    conn = sqlite3.connect(path, timeout=5.0, check_same_thread=check_same_thread)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+class Database:
+    """
+    Shared access to one SQLite file from many Streamlit sessions.
+
+    Reads use a connection per thread, so sessions never share a cursor or
+    wait on each other's queries. Writes are functions handed to a single
+    writer thread, which runs everything queued at that moment inside one
+    transaction (each write in its own savepoint, so one failure does not
+    undo the others) and commits once. Concurrent sessions therefore share
+    commits instead of queueing on the database lock.
+    """
+
+    def __init__(self, path: str, max_batch: int = 256):
+        self.path = path
+        self.max_batch = max_batch
+        self.batches = 0
+        self.writes = 0
+        self._local = threading.local()
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._setup_done = set()
+        self._setup_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_loop, name=f"sqlite-writer:{os.path.basename(path)}",
+                                        daemon=True)
+        self._writer.start()
+
+    def connection(self) -> sqlite3.Connection:
+        """Connection owned by the calling thread (the writer thread's inside ``write``)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = connect(self.path)
+            self._local.conn = conn
+        return conn
+
+    def execute(self, sql: str, params=()) -> sqlite3.Cursor:
+        """Run a read query on the calling thread's connection"""
+        return self.connection().execute(sql, params)
+
+    def write(self, fn: Callable[[sqlite3.Connection], Any], wait: bool = True) -> Any:
+        """
+        Run ``fn(conn)`` in the next write batch.
+
+        Args:
+            fn (callable): Performs the writes; must not commit or roll back
+            wait (bool): Block until the batch is committed and return fn's
+                result (re-raising its exception). Otherwise return the
+                Future immediately; failures are logged.
+
+        Returns:
+            The value returned by ``fn``, or a Future when ``wait`` is False
+        """
+        future = Future()
+        self._queue.put((fn, future))
+        if not wait:
+            future.add_done_callback(self._log_failure)
+            return future
+        return future.result()
+
+    def setup(self, name: str, fn: Callable[[], Any]):
+        """
+        Run schema creation/migrations once per process, however many managers are created.
+
+        ``fn`` takes no arguments and issues its own ``write`` calls, so a long
+        migration can commit in several batches.
+        """
+        with self._setup_lock:
+            if name in self._setup_done:
+                return
+            fn()
+            self._setup_done.add(name)
+
+    @staticmethod
+    def _log_failure(future: Future):
+        if future.exception() is not None:
+            logger.error(f"Background database write failed: {str(future.exception())}")
+
+    def _write_loop(self):
+        conn = self.connection()
+        conn.isolation_level = None  # transactions are managed explicitly below
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._run_batch(conn, batch)
+
+    def _run_batch(self, conn: sqlite3.Connection, batch):
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for fn, future in batch:
+                conn.execute('SAVEPOINT batch_write')
+                try:
+                    results.append((future, fn(conn), None))
+                    conn.execute('RELEASE batch_write')
+                except Exception as e:
+                    conn.execute('ROLLBACK TO batch_write')
+                    conn.execute('RELEASE batch_write')
+                    results.append((future, None, e))
+            conn.execute('COMMIT')
+        except Exception as e:
+            logger.error(f"Error committing write batch: {str(e)}")
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for fn, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.writes += len(batch)
+        # Only report success once the data is committed
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'writes': self.writes,
+            'batches': self.batches,
+            'writes_per_commit': self.writes / self.batches if self.batches else 0.0
+        }
+
+_databases: Dict[str, Database] = {}
+_databases_lock = threading.Lock()
+
+def get_database(path: str) -> Database:
+    """Return the process-wide ``Database`` for ``path``"""
+    key = os.path.abspath(path)
+    with _databases_lock:
+        database = _databases.get(key)
+        if database is None:
+            database = Database(path)
+            _databases[key] = database
+        return database
@@ -0,0 +1,248 @@
+# doc_cache.py
+import ast
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Any
+
+from blob_store import BlobStore
+from code_analyzer import CodeAnalyzer
+from db import connect
+
+logger = logging.getLogger(__name__)
+
+# Documentation strings starting with one of these are error messages returned
+# by DocumentGenerator and must never be served from the cache.
+ERROR_PREFIXES = ('🛑', '⚠️', '❌')
+
+
+def normalize_code(code: str) -> str:
+    """
+    Normalize source code so that formatting-only edits map to the same key.
+
+    The code is parsed and dumped from its AST, which drops comments and
+    whitespace. Code that does not parse falls back to whitespace collapsing.
+
+    Args:
+        code (str): Python source code
+
+    Returns:
+        str: Normalized representation of the code
+    """
+    try:
+        return ast.dump(CodeAnalyzer.parse(code))
+    except (SyntaxError, ValueError):
+        return ' '.join(code.split())
+
+
+def make_cache_key(code: str, model: str, temperature: float, prompt_version: str) -> str:
+    """Build the content-addressed cache key for a documentation request"""
+    material = f"{prompt_version}\x00{model}\x00{temperature!r}\x00{normalize_code(code)}"
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class DocumentationCache:
+    """
+    Persistent, size-bounded LRU cache of generated documentation.
+
+    Entries are keyed on the normalized code, prompt template version, model
+    name and temperature. Entries older than ``ttl_seconds`` are treated as
+    misses, and the least recently used entries are evicted once either
+    ``max_entries`` or ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, db_path: str = 'documentation_cache.db', max_entries: int = 5000,
+                 max_bytes: int = 200 * 1024 * 1024, ttl_seconds: Optional[float] = 7 * 24 * 3600):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self.conn = connect(db_path, check_same_thread=False)
+        self.create_cache_table()
+
+    def create_cache_table(self):
+        queries = [
+            '''CREATE TABLE IF NOT EXISTS documentation_cache
+               (cache_key TEXT PRIMARY KEY,
+                documentation TEXT,
+                size INTEGER,
+                created_at REAL,
+                last_accessed REAL)''',
+            '''CREATE INDEX IF NOT EXISTS idx_cache_last_accessed
+               ON documentation_cache (last_accessed)''',
+            '''CREATE TABLE IF NOT EXISTS cache_meta
+               (name TEXT PRIMARY KEY,
+                value TEXT)'''
+        ]
+        for query in queries:
+            self.conn.execute(query)
+        self.conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached documentation for ``key`` or None on a miss"""
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT documentation, created_at FROM documentation_cache WHERE cache_key=?',
+                (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            documentation, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self.conn.execute('DELETE FROM documentation_cache WHERE cache_key=?', (key,))
+                self.conn.commit()
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.conn.execute(
+                'UPDATE documentation_cache SET last_accessed=? WHERE cache_key=?',
+                (now, key)
+            )
+            self.conn.commit()
+            self.hits += 1
+            return documentation
+
+    def put(self, key: str, documentation: str):
+        """Store documentation under ``key`` and evict entries over the bounds"""
+        if not documentation or documentation.startswith(ERROR_PREFIXES):
+            return
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO documentation_cache '
+                '(cache_key, documentation, size, created_at, last_accessed) VALUES (?, ?, ?, ?, ?)',
+                (key, documentation, len(documentation.encode('utf-8')), now, now)
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until within bounds"""
+        if self.ttl_seconds is not None:
+            cursor = self.conn.execute(
+                'DELETE FROM documentation_cache WHERE created_at < ?',
+                (time.time() - self.ttl_seconds,)
+            )
+            self.expirations += max(cursor.rowcount, 0)
+
+        count, total = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM documentation_cache'
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        cursor = self.conn.execute(
+            'SELECT cache_key, size FROM documentation_cache ORDER BY last_accessed ASC'
+        )
+        victims = []
+        for cache_key, size in cursor:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((cache_key,))
+            count -= 1
+            total -= size
+        self.conn.executemany('DELETE FROM documentation_cache WHERE cache_key=?', victims)
+        self.evictions += len(victims)
+
+    def warm_start(self, history_db_path: str, model: str, temperature: float,
+                   prompt_version: str) -> int:
+        """
+        Seed the cache from rows already stored in the documentation history.
+
+        History rows do not record which model produced them, so they are
+        imported under the given model, temperature and prompt version. Only
+        rows added since the previous warm start are read.
+
+        Args:
+            history_db_path (str): Path to documentation_history.db
+            model (str): Model name the rows are attributed to
+            temperature (float): Temperature the rows are attributed to
+            prompt_version (str): Prompt template version the rows are attributed to
+
+        Returns:
+            int: Number of entries imported
+        """
+        meta_name = f"warm_start:{history_db_path}:{prompt_version}:{model}:{temperature!r}"
+        with self._lock:
+            row = self.conn.execute('SELECT value FROM cache_meta WHERE name=?', (meta_name,)).fetchone()
+        last_id = int(row[0]) if row else 0
+
+        try:
+            source = sqlite3.connect(history_db_path)
+            columns = {row[1] for row in source.execute('PRAGMA table_info(documentation_history)')}
+            if 'code_hash' in columns:
+                # Bodies live in the compressed blob store
+                blobs = BlobStore(source)
+                rows = [
+                    (entry_id, blobs.get(code_hash) if code_hash else code,
+                     blobs.get(documentation_hash) if documentation_hash else documentation)
+                    for entry_id, code, documentation, code_hash, documentation_hash in source.execute(
+                        'SELECT id, code, documentation, code_hash, documentation_hash FROM documentation_history '
+                        'WHERE id > ? ORDER BY id',
+                        (last_id,)
+                    ).fetchall()
+                ]
+            else:
+                rows = source.execute(
+                    'SELECT id, code, documentation FROM documentation_history WHERE id > ? ORDER BY id',
+                    (last_id,)
+                ).fetchall()
+            source.close()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading history for cache warm start: {str(e)}")
+            return 0
+
+        imported = 0
+        now = time.time()
+        with self._lock:
+            for entry_id, code, documentation in rows:
+                last_id = entry_id
+                if not code or not documentation or documentation.startswith(ERROR_PREFIXES):
+                    continue
+                key = make_cache_key(code, model, temperature, prompt_version)
+                cursor = self.conn.execute(
+                    'INSERT OR IGNORE INTO documentation_cache '
+                    '(cache_key, documentation, size, created_at, last_accessed) VALUES (?, ?, ?, ?, ?)',
+                    (key, documentation, len(documentation.encode('utf-8')), now, 0)
+                )
+                imported += max(cursor.rowcount, 0)
+            self.conn.execute(
+                'INSERT OR REPLACE INTO cache_meta (name, value) VALUES (?, ?)',
+                (meta_name, str(last_id))
+            )
+            self._evict()
+            self.conn.commit()
+
+        logger.info(f"Warm-started documentation cache with {imported} entries")
+        return imported
+
+    def clear(self):
+        with self._lock:
+            self.conn.execute('DELETE FROM documentation_cache')
+            self.conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current cache size"""
+        with self._lock:
+            count, total = self.conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM documentation_cache'
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'entries': count,
+            'bytes': total
+        }
@@ -1,17 +1,108 @@
-import os
+import functools
+import hashlib
 import time
-from typing import Dict, Any
-import openai
-from openai.error import AuthenticationError, RateLimitError, OpenAIError
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, Optional, Iterator, List, Tuple
+from llm_client import LLMError, LLMAuthenticationError, LLMRateLimitError, CircuitOpenError
+from llm_backends import LLMBackend, create_backend
+from doc_cache import DocumentationCache, make_cache_key, ERROR_PREFIXES
+from single_flight import SingleFlight, documentation_flights
+from code_chunker import CodeChunk, chunk_code, estimate_tokens, CHARS_PER_TOKEN
+from similarity_index import SimilarEntry, exact_fingerprint, interface_names
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the prompts below change so cached documentation is not reused
+PROMPT_VERSION = "1"
+
+# Token budget for the code sent in one prompt; larger sources are documented
+# chunk by chunk and then summarized (map-reduce)
+MAX_PROMPT_TOKENS = 3000
+
+# Number of chunk prompts sent concurrently in map-reduce mode
+MAP_WORKERS = 4
+
+# Earlier documentation is returned without calling the model only for code that
+# is the same up to formatting, comments and local names: same functions,
+# classes and arguments and the same literal values, which documentation may
+# quote. REUSE_SIMILARITY only skips that exact comparison for poor matches.
+# Documentation for merely similar code is included in the prompt as an example.
+REUSE_SIMILARITY = 0.9
+REFERENCE_SIMILARITY = 0.6
+
+# How often a request waiting on an identical in-flight generation reports progress
+FOLLOWER_POLL_SECONDS = 1.0
+
+class GenerationInterrupted(RuntimeError):
+    """The session leading a shared generation stopped before it finished."""
+    pass
+
+@dataclass
+class PreparedSource:
+    """
+    Cache key and map-reduce chunks of one source, computed ahead of time.
+
+    ``chunks`` and ``chunk_keys`` are None for sources small enough for a
+    single prompt.
+    """
+    key: str
+    chunks: Optional[List[CodeChunk]] = None
+    chunk_keys: Optional[List[str]] = None
+
+def chunk_cache_key(chunk: CodeChunk, model: str, temperature: float) -> str:
+    return make_cache_key(chunk.source, model, temperature, f"{PROMPT_VERSION}:{chunk.kind}:{chunk.name}")
+
+def prepare_source(code: str, model: str, temperature: float, max_prompt_tokens: int) -> PreparedSource:
+    """
+    Do the parsing work of a documentation request up front.
+
+    Picklable, so batch runs call it in their analysis processes and the
+    generator does not parse the source again.
+    """
+    key = make_cache_key(code, model, temperature, PROMPT_VERSION)
+    if estimate_tokens(code) <= max_prompt_tokens:
+        return PreparedSource(key)
+    chunks = chunk_code(code, max_prompt_tokens)
+    return PreparedSource(key, chunks, [chunk_cache_key(chunk, model, temperature) for chunk in chunks])
 
 class DocumentGenerator:
-    def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("Missing OpenAI API key. Set it as the OPENAI_API_KEY environment variable.")
-        openai.api_key = api_key
+    def __init__(self, backend: Optional[LLMBackend] = None, temperature: float = 0.7,
+                 cache: Optional[DocumentationCache] = None,
+                 max_prompt_tokens: int = MAX_PROMPT_TOKENS, map_workers: int = MAP_WORKERS,
+                 flights: Optional[SingleFlight] = None,
+                 find_similar: Optional[Callable[[str, str, float], Optional[SimilarEntry]]] = None):
+        # The backend is chosen by DOCGEN_BACKEND (OpenAI unless configured otherwise)
+        self.backend = backend if backend is not None else create_backend()
+        # OpenAI keeps the bare model name so existing cache entries stay valid
+        self.model = self.backend.model if self.backend.name == 'openai' else self.backend.identifier
+        self.temperature = temperature
+        self.cache = cache if cache is not None else DocumentationCache()
+        self.max_prompt_tokens = max_prompt_tokens
+        # Concurrent requests for the same content share one generation
+        self.flights = flights if flights is not None else documentation_flights
+        self.map_workers = map_workers
+        # Lookup of a user's similar earlier submissions, e.g. HistoryManager.find_similar
+        self.find_similar = find_similar
+        self.similarity_stats = {'reused': 0, 'referenced': 0}
+        self._stats_lock = threading.Lock()
 
-    def generate_documentation(self, code: str, analysis: Dict[str, Any]) -> str:
+    def cache_key(self, code: str) -> str:
+        return make_cache_key(code, self.model, self.temperature, PROMPT_VERSION)
+
+    def preparer(self) -> Callable[[str], PreparedSource]:
+        """A picklable ``prepare_source`` bound to this generator's settings"""
+        return functools.partial(prepare_source, model=self.model, temperature=self.temperature,
+                                 max_prompt_tokens=self.max_prompt_tokens)
+
+    def warm_cache_from_history(self, history_db_path: str = 'documentation_history.db') -> int:
+        """Seed the documentation cache from previously generated history rows"""
+        return self.cache.warm_start(history_db_path, self.model, self.temperature, PROMPT_VERSION)
+
+    def _build_prompt(self, code: str, analysis: Dict[str, Any],
+                      reference: Optional[SimilarEntry] = None) -> str:
         prompt = f"""Generate detailed technical documentation for the following code:
 
 {code}
@@ -19,27 +110,302 @@ class DocumentGenerator:
 Analysis:
 {analysis}
 """
-        attempt = 0
-        while attempt < 3:
+        if reference is None:
+            return prompt
+        # Spend whatever is left of the prompt budget on the example
+        budget = int((self.max_prompt_tokens - estimate_tokens(code)) * CHARS_PER_TOKEN)
+        if budget <= 0:
+            return prompt
+        return prompt + f"""
+For reference, this documentation was written earlier for similar code. Follow its structure and level of detail, but describe the code above accurately:
+
+{reference.code[:budget // 2]}
+
+{reference.documentation[:budget // 2]}
+"""
+
+    def _count_similar(self, outcome: str):
+        with self._stats_lock:
+            self.similarity_stats[outcome] += 1
+
+    def _similar(self, code: str, username: Optional[str]) -> Tuple[Optional[str], Optional[SimilarEntry]]:
+        """Return (reusable documentation, reference example) from the user's earlier similar code"""
+        if self.find_similar is None or username is None:
+            return None, None
+        match = self.find_similar(username, code, REFERENCE_SIMILARITY)
+        if match is None:
+            return None, None
+        if (match.similarity >= REUSE_SIMILARITY and interface_names(match.code) == interface_names(code)
+                and exact_fingerprint(match.code) == exact_fingerprint(code)):
+            self._count_similar('reused')
+            logger.info(f"Reusing documentation of history entry {match.entry_id} "
+                        f"(similarity {match.similarity:.2f})")
+            return match.documentation, None
+        self._count_similar('referenced')
+        return None, match
+
+    def _resolve(self, code: str, username: Optional[str],
+                 key: Optional[str] = None) -> Tuple[str, Optional[str], Optional[SimilarEntry]]:
+        """
+        Return (cache and flight key, documentation ready to return, reference example) for a request.
+
+        Documentation derived from a user's own history is never shared with
+        other users: reused documentation is returned without caching it, and
+        documentation written with a reference example is cached and
+        coalesced under a key scoped to that user.
+        """
+        key = key or self.cache_key(code)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return key, cached, None
+        reused, reference = self._similar(code, username)
+        if reused is not None:
+            return key, reused, None
+        if reference is not None:
+            key = hashlib.sha256(f"{key}\x00{username}".encode('utf-8')).hexdigest()
+            cached = self.cache.get(key)
+            if cached is not None:
+                return key, cached, None
+        return key, None, reference
+
+    def _build_chunk_prompt(self, chunk: CodeChunk) -> str:
+        return f"""Generate detailed technical documentation for the {chunk.kind} `{chunk.name}`, which is part of a larger Python module:
+
+{chunk.source}
+"""
+
+    def _build_reduce_prompt(self, analysis: Dict[str, Any], chunks: List[CodeChunk],
+                             sections: List[str]) -> str:
+        # Keep the combined section summaries within the prompt budget
+        share = int(self.max_prompt_tokens / max(len(sections), 1) * CHARS_PER_TOKEN)
+        summaries = "\n\n".join(
+            f"### {chunk.name}\n{section[:share]}" for chunk, section in zip(chunks, sections)
+        )
+        return f"""Write an overview of a Python module based on the documentation of its parts below. Describe the module's purpose, its main components and how they work together. Do not repeat the per-part documentation.
+
+Analysis:
+{analysis}
+
+{summaries}
+"""
+
+    def _build_symbols_prompt(self, code: str, analysis: Dict[str, Any], names: List[str]) -> str:
+        headings = "\n".join(f"## {name}" for name in names)
+        return f"""Generate detailed technical documentation for the following code. Start with an overview of the module's purpose and how its parts work together. Then document each of the parts below, in this order, each in its own section starting with a line that contains exactly its heading:
+
+{headings}
+
+{code}
+
+Analysis:
+{analysis}
+"""
+
+    def document_symbols(self, code: str, analysis: Dict[str, Any], names: List[str]) -> Optional[str]:
+        """
+        Document a source and each of its symbols in a single request.
+
+        The response is an overview followed by one ``## <name>`` section per
+        entry of ``names``. Returns None if the source does not fit in one
+        prompt; failures are returned as a user-facing message.
+        """
+        if estimate_tokens(code) > self.max_prompt_tokens:
+            return None
+        key = make_cache_key(code, self.model, self.temperature, f"{PROMPT_VERSION}:symbols")
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        documentation = self._complete(self._build_symbols_prompt(code, analysis, names))
+        if not documentation.startswith(ERROR_PREFIXES):
+            self.cache.put(key, documentation)
+        return documentation
+
+    def _complete(self, prompt: str) -> str:
+        """Send one completion request; failures are returned as a user-facing message"""
+        try:
+            return self.backend.complete(prompt, self.temperature, max_tokens=1024).strip()
+        except LLMError as e:
+            return self._error_message(e)
+
+    def _error_message(self, error: LLMError) -> str:
+        provider = self.backend.display_name
+        if isinstance(error, LLMAuthenticationError):
+            return f"🛑 Invalid {provider} API key. Please check your credentials."
+        if isinstance(error, LLMRateLimitError):
+            return f"⚠️ {provider} rate limit exceeded. Please try again later."
+        if isinstance(error, CircuitOpenError):
+            return f"⚠️ {provider} is currently failing repeatedly. Please try again shortly."
+        return f"❌ {provider} API error: {str(error)}"
+
+    def _stream_completion(self, prompt: str, start: float) -> Iterator[str]:
+        """
+        Stream one completion request, yielding text as it arrives.
+
+        Errors are yielded as a message. The generator returns True when the
+        completion finished successfully and False otherwise.
+        """
+        first = True
+        try:
+            for text in self.backend.stream(prompt, self.temperature, max_tokens=1024):
+                if first:
+                    first = False
+                    logger.info(f"Time to first token: {time.perf_counter() - start:.3f}s")
+                yield text
+            return True
+        except LLMError as e:
+            yield self._error_message(e)
+            return False
+
+    def _document_chunk(self, chunk: CodeChunk, key: Optional[str] = None) -> str:
+        key = key or chunk_cache_key(chunk, self.model, self.temperature)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        section = self._complete(self._build_chunk_prompt(chunk))
+        self.cache.put(key, section)
+        return section
+
+    def document_chunks(self, chunks: List[CodeChunk], keys: Optional[List[str]] = None) -> List[str]:
+        """Document all chunks concurrently (map step), preserving their order"""
+        with ThreadPoolExecutor(max_workers=self.map_workers) as pool:
+            return list(pool.map(self._document_chunk, chunks, keys or [None] * len(chunks)))
+
+    def generate_overview(self, analysis: Dict[str, Any], chunks: List[CodeChunk],
+                          sections: List[str]) -> str:
+        """Summarize documented chunks into a module overview (reduce step)"""
+        return self._complete(self._build_reduce_prompt(analysis, chunks, sections))
+
+    @staticmethod
+    def format_sections(chunks: List[CodeChunk], sections: List[str]) -> str:
+        return "".join(f"\n\n## {chunk.name}\n\n{section}" for chunk, section in zip(chunks, sections))
+
+    def _map_sections(self, code: str, prepared: Optional[PreparedSource] = None):
+        """Chunk the code and document every chunk; returns (chunks, sections, error)"""
+        if prepared is not None and prepared.chunks is not None:
+            chunks, keys = prepared.chunks, prepared.chunk_keys
+        else:
+            chunks, keys = chunk_code(code, self.max_prompt_tokens), None
+        logger.info(f"Documenting {len(chunks)} chunks with map-reduce")
+        sections = self.document_chunks(chunks, keys)
+        error = next((s for s in sections if s.startswith(ERROR_PREFIXES)), None)
+        return chunks, sections, error
+
+    def generate_documentation(self, code: str, analysis: Dict[str, Any], username: Optional[str] = None,
+                               prepared: Optional[PreparedSource] = None) -> str:
+        """
+        Generate documentation, building on ``username``'s earlier similar submissions if given.
+
+        ``prepared`` is the result of ``prepare_source`` for ``code`` with this
+        generator's settings; it saves parsing the source again.
+        """
+        key, ready, reference = self._resolve(code, username, prepared.key if prepared else None)
+        if ready is not None:
+            return ready
+        try:
+            return self.flights.do(key, lambda: self._generate(key, code, analysis, reference, prepared))
+        except GenerationInterrupted:
+            # The streaming request we waited on was abandoned; generate it ourselves
+            return self.generate_documentation(code, analysis, username, prepared)
+
+    def _generate(self, key: str, code: str, analysis: Dict[str, Any],
+                  reference: Optional[SimilarEntry], prepared: Optional[PreparedSource] = None) -> str:
+        if prepared is not None:
+            single_prompt = prepared.chunks is None
+        else:
+            single_prompt = estimate_tokens(code) <= self.max_prompt_tokens
+        if single_prompt:
+            documentation = self._complete(self._build_prompt(code, analysis, reference))
+        else:
+            chunks, sections, error = self._map_sections(code, prepared)
+            if error:
+                return error
+            overview = self.generate_overview(analysis, chunks, sections)
+            if overview.startswith(ERROR_PREFIXES):
+                return overview
+            documentation = overview + self.format_sections(chunks, sections)
+
+        self.cache.put(key, documentation)
+        return documentation
+
+    @staticmethod
+    def _follow(future: Future, on_wait: Optional[Callable[[float], None]]) -> Optional[str]:
+        """Wait for another request's result, or return None if that request was interrupted"""
+        start = time.perf_counter()
+        while True:
             try:
-                response = openai.Completion.create(
-                    model="gpt-3.5-turbo",
-                    prompt=prompt,
-                    temperature=0.7,
-                    max_tokens=1024
-                )
-                return response.choices[0].text.strip()
-
-            except AuthenticationError:
-                return "🛑 Invalid OpenAI API key. Please check your credentials."
-
-            except RateLimitError:
-                attempt += 1
-                if attempt < 3:
-                    wait_time = 2 ** attempt
-                    time.sleep(wait_time)
-                else:
-                    return "⚠️ OpenAI rate limit exceeded. Please try again later."
-
-            except OpenAIError as e:
-                return f"❌ OpenAI API error: {str(e)}"
+                return future.result(timeout=FOLLOWER_POLL_SECONDS)
+            except FutureTimeout:
+                if on_wait is not None:
+                    on_wait(time.perf_counter() - start)
+            except GenerationInterrupted:
+                return None
+
+    def generate_documentation_stream(self, code: str, analysis: Dict[str, Any], username: Optional[str] = None,
+                                      on_wait: Optional[Callable[[float], None]] = None) -> Iterator[str]:
+        """
+        Generate documentation, yielding text chunks as the model produces them.
+
+        Completed documentation is written to the cache, and cache hits are
+        yielded as a single chunk. The generator is shared across sessions, so
+        callers that want the time to first token measure it themselves.
+        Large sources are documented chunk by chunk first; the module overview
+        is then streamed, followed by the per-chunk sections. With a
+        ``username``, that user's earlier similar submissions are reused or
+        included in the prompt as an example.
+
+        When an identical request is already running, its result is yielded
+        once it is ready and ``on_wait`` is called with the seconds waited so
+        far about once per second. If that request is abandoned, this one
+        takes over the generation.
+        """
+        start = time.perf_counter()
+        key, ready, reference = self._resolve(code, username)
+        if ready is not None:
+            yield ready
+            return
+
+        future, leader = self.flights.begin(key)
+        if not leader:
+            # Someone else is generating the same documentation; wait for their result
+            documentation = self._follow(future, on_wait)
+            if documentation is None:
+                yield from self.generate_documentation_stream(code, analysis, username, on_wait)
+            else:
+                yield documentation
+            return
+
+        documentation = None
+        try:
+            parts = []
+            if estimate_tokens(code) <= self.max_prompt_tokens:
+                stream = self._stream_completion(self._build_prompt(code, analysis, reference), start)
+                body = ""
+            else:
+                chunks, sections, error = self._map_sections(code)
+                if error:
+                    documentation = error
+                    yield error
+                    return
+                stream = self._stream_completion(self._build_reduce_prompt(analysis, chunks, sections), start)
+                body = self.format_sections(chunks, sections)
+
+            while True:
+                try:
+                    text = next(stream)
+                except StopIteration as finished:
+                    succeeded = finished.value
+                    break
+                parts.append(text)
+                yield text
+            if not succeeded:
+                documentation = ''.join(parts)
+                return
+            if body:
+                yield body
+            documentation = ''.join(parts).strip() + body
+            self.cache.put(key, documentation)
+        finally:
+            if documentation is None:
+                self.flights.finish(key, error=GenerationInterrupted("Documentation generation was interrupted"))
+            else:
+                self.flights.finish(key, documentation)
@@ -0,0 +1,172 @@
+# export_cache.py
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from export_utils import EXPORTER_VERSION
+
+logger = logging.getLogger(__name__)
+
+# File extension for each export format
+EXPORT_EXTENSIONS = {
+    'PDF': 'pdf',
+    'DOCX': 'docx',
+}
+
+# Files written by DocumentExporter.export_pdf/export_docx when no filename is given
+_TIMESTAMPED_EXPORT = re.compile(r'^documentation_\d{8}_\d{6}\.(pdf|docx)$')
+
+
+def make_export_key(documentation: str, export_format: str, version: str = EXPORTER_VERSION) -> str:
+    """Content-addressed key for one rendering of ``documentation``"""
+    material = f"{version}\x00{export_format}\x00".encode('utf-8') + documentation.encode('utf-8')
+    return hashlib.sha256(material).hexdigest()
+
+
+class ExportCache:
+    """
+    Bounded on-disk LRU cache of rendered PDF/DOCX exports.
+
+    Files are keyed on the documentation text, the format and EXPORTER_VERSION,
+    so a change to the renderer never serves stale files. Recency is the file's
+    modification time, which is refreshed on every hit, so the LRU order
+    survives restarts. The least recently used files are removed once either
+    ``max_entries`` or ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_entries: int = 200,
+                 max_bytes: int = 200 * 1024 * 1024):
+        self.directory = Path(directory or os.path.join(tempfile.gettempdir(), 'docgen_export_cache'))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, int]' = OrderedDict()
+        self._bytes = 0
+        self._load()
+
+    def _load(self):
+        """Index the files already on disk, oldest first, and drop leftovers of interrupted writes"""
+        files = []
+        for path in self.directory.iterdir():
+            if path.suffix == '.tmp':
+                path.unlink(missing_ok=True)
+                continue
+            stat = path.stat()
+            files.append((stat.st_mtime, path.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._bytes += size
+        with self._lock:
+            self._evict()
+
+    def get_or_create(self, documentation: str, export_format: str,
+                      render: Callable[[str], bytes]) -> bytes:
+        """
+        Return the cached export, rendering and storing it on a miss
+
+        Args:
+            documentation (str): Documentation text to export
+            export_format (str): One of EXPORT_EXTENSIONS, e.g. "PDF"
+            render (callable): Produces the file contents from the documentation
+
+        Returns:
+            bytes: The exported file
+        """
+        name = f"{make_export_key(documentation, export_format)}.{EXPORT_EXTENSIONS[export_format]}"
+        path = self.directory / name
+        with self._lock:
+            if name in self._entries:
+                try:
+                    data = path.read_bytes()
+                    os.utime(path)
+                    self._entries.move_to_end(name)
+                    self.hits += 1
+                    return data
+                except OSError:
+                    # Removed behind our back (e.g. temp dir cleaner); render again
+                    self._bytes -= self._entries.pop(name)
+            self.misses += 1
+
+        data = render(documentation)
+        temp_path = self.directory / f"{name}.{threading.get_ident()}.tmp"
+        try:
+            temp_path.write_bytes(data)
+            temp_path.replace(path)
+        except OSError as e:
+            logger.error(f"Error writing export cache file: {str(e)}")
+            temp_path.unlink(missing_ok=True)
+            return data
+        with self._lock:
+            self._bytes -= self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self._bytes += len(data)
+            self._evict()
+        return data
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            name, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                (self.directory / name).unlink(missing_ok=True)
+            except OSError as e:
+                logger.error(f"Error evicting export cache file {name}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes
+            }
+
+
+def cleanup_timestamped_exports(directories=None, max_age_seconds: float = 24 * 3600) -> int:
+    """
+    Delete old ``documentation_<timestamp>.pdf/.docx`` files left by DocumentExporter.
+
+    Args:
+        directories (list, optional): Directories to clean. Defaults to the
+            temp dir and its 'exports' subdirectory, where exports land when
+            no output directory is given.
+        max_age_seconds (float): Only files older than this are removed
+
+    Returns:
+        int: Number of files removed
+    """
+    if directories is None:
+        temp_dir = tempfile.gettempdir()
+        directories = [temp_dir, os.path.join(temp_dir, 'exports')]
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for directory in directories:
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if not _TIMESTAMPED_EXPORT.match(entry.name):
+                continue
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError as e:
+                logger.error(f"Error removing stale export {entry.path}: {str(e)}")
+    if removed:
+        logger.info(f"Removed {removed} stale export files")
+    return removed
@@ -1,47 +1,571 @@
 from docx import Document
-from fpdf import FPDF
+from fpdf import FPDF, FPDF_VERSION
+import codecs
+import io
 import json
 from datetime import datetime
 import os
 import tempfile
-import re
 import logging
+import unicodedata
+import zlib
+from typing import BinaryIO, List, Tuple
+
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.oxml.table import CT_Tbl
+from lxml.etree import SubElement
+
+from markdown_renderer import (CodeBlock, Heading, ListBlock, Paragraph, Quote, Rule, Span, Table,
+                               parsed_document)
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+# Bump whenever the rendered output changes, so cached exports are not reused
+EXPORTER_VERSION = "5"
+
+# Body text layout for PDF exports (points / millimetres)
+PDF_FONT_SIZE = 12
+PDF_LINE_HEIGHT = 6
+PDF_HEADING_SIZES = {1: 18, 2: 15, 3: 13}
+PDF_CODE_FONT_SIZE = 9
+PDF_CODE_LINE_HEIGHT = 4.5
+PDF_LIST_INDENT = 6
+PDF_BLOCK_SPACING = 2
+
+CODE_FONT = 'Courier New'
+CODE_HALF_POINTS = 18
+
+# Characters FPDF's core fonts cannot show, or that read better spelled out
+PDF_REPLACEMENTS = {
+    '\u2014': '--',  # em dash
+    '\u2013': '-',   # en dash
+    '\u2012': '-',   # figure dash
+    '\u2010': '-',   # hyphen
+    '\u2011': '-',   # non-breaking hyphen
+    '\u2212': '-',   # minus sign
+    '\u2018': "'",   # left single quotation mark
+    '\u2019': "'",   # right single quotation mark
+    '\u201a': "'",   # single low-9 quotation mark
+    '\u2032': "'",   # prime
+    '\u201c': '"',   # left double quotation mark
+    '\u201d': '"',   # right double quotation mark
+    '\u201e': '"',   # double low-9 quotation mark
+    '\u2033': '"',   # double prime
+    '\u2022': '*',   # bullet
+    '\u2023': '-',   # triangular bullet
+    '\u25e6': '-',   # white bullet
+    '\u2043': '-',   # hyphen bullet
+    '\u2026': '...', # ellipsis
+    '\u00a9': '(c)', # copyright symbol
+    '\u00ae': '(R)', # registered trademark symbol
+    '\u2122': '(TM)',# trademark symbol
+    '\u2190': '<-',  # leftwards arrow
+    '\u2192': '->',  # rightwards arrow
+    '\u2194': '<->', # left right arrow
+    '\u21d0': '<=',  # leftwards double arrow
+    '\u21d2': '=>',  # rightwards double arrow
+    '\u2264': '<=',  # less-than or equal to
+    '\u2265': '>=',  # greater-than or equal to
+    '\u2260': '!=',  # not equal to
+    '\u2248': '~',   # almost equal to
+    '\u221e': 'inf', # infinity
+    '\u2713': 'v',   # check mark
+    '\u2714': 'v',   # heavy check mark
+    '\u2717': 'x',   # ballot x
+    '\u2718': 'x',   # heavy ballot x
+    '\u200b': '',    # zero width space
+    '\u200c': '',    # zero width non-joiner
+    '\u200d': '',    # zero width joiner
+    '\u2060': '',    # word joiner
+    '\ufeff': '',    # byte order mark
+}
+
+class _Latin1Table(dict):
+    """
+    ``str.translate`` table that maps any text onto Latin-1 for FPDF's core fonts.
+
+    Latin-1 code points map to themselves and PDF_REPLACEMENTS is filled in up
+    front. Any other character is resolved the first time it is seen, to its
+    compatibility decomposition if that is Latin-1 (accented letters, ligatures,
+    full-width forms) or to a space, and the answer is kept for later lookups.
+    """
+
+    def __missing__(self, codepoint: int) -> str:
+        decomposed = unicodedata.normalize('NFKD', chr(codepoint))
+        marks_removed = ''.join(char for char in decomposed if not unicodedata.combining(char))
+        if not marks_removed:
+            replacement = ''  # a lone combining mark
+        elif all(ord(char) < 256 for char in marks_removed):
+            replacement = marks_removed
+        else:
+            replacement = ' '
+        self[codepoint] = replacement
+        return replacement
+
+_LATIN1_TABLE = _Latin1Table((codepoint, codepoint) for codepoint in range(256))
+_LATIN1_TABLE.update((ord(char), replacement) for char, replacement in PDF_REPLACEMENTS.items())
+
+# Replacements for characters that are in Latin-1 (e.g. the copyright sign)
+_LATIN1_REPLACEMENTS = [(char, replacement) for char, replacement in PDF_REPLACEMENTS.items() if ord(char) < 256]
+
+def _map_unencodable(error: UnicodeEncodeError):
+    return error.object[error.start:error.end].translate(_LATIN1_TABLE), error.end
+
+_LATIN1_ERRORS = 'docgen-pdf-latin1'
+codecs.register_error(_LATIN1_ERRORS, _map_unencodable)
+
+class _PdfSink:
+    """
+    Stands in for FPDF's string buffer and forwards everything to a binary stream.
+
+    FPDF only appends to its buffer (``+=``) and asks for its length to record
+    object offsets, so those two operations are all that is needed.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.size = 0
+
+    def __iadd__(self, text: str):
+        data = text.encode('latin-1')
+        self.stream.write(data)
+        self.size += len(data)
+        return self
+
+    def __len__(self):
+        return self.size
+
+# _StreamingPDF overrides private FPDF methods, which differ between releases
+STREAMING_FPDF_VERSION = '1.7.2'
+
+class _StreamingPDF(FPDF):
+    """
+    FPDF that writes each page's content to the output as soon as the page is full.
+
+    Stock FPDF keeps every page and the whole serialized document in Python
+    strings until ``output``; here a finished page is compressed and written
+    immediately, so memory use stays at about one page however long the
+    document is. Only the small page dictionaries are written at the end.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        if FPDF_VERSION != STREAMING_FPDF_VERSION:
+            raise RuntimeError(f"PDF export requires fpdf {STREAMING_FPDF_VERSION}, but {FPDF_VERSION} is installed")
+        super().__init__()
+        self.buffer = _PdfSink(stream)
+        self._content_objects = []
+        self._header_written = False
+        # (font key, size) -> {text: width}, filled by _wrap_spans
+        self.text_widths = {}
+
+    def text_line(self, x: float, line_height: float, runs: List[Tuple[int, str]]):
+        """
+        Write one line of text runs, (font number, text), starting at ``x`` and move to the next line.
+
+        Draws the same text as a borderless ``cell`` per run but as a single
+        text object, which is much cheaper for lines that change style. All
+        runs use the current font size, and each run's font must have been
+        selected with ``set_font`` before.
+        """
+        if self.y + line_height > self.page_break_trigger and not self.in_footer and self.accept_page_break():
+            self.add_page(self.cur_orientation)
+        if runs:
+            k = self.k
+            y = (self.h - (self.y + .5 * line_height + .3 * self.font_size)) * k
+            parts = [f"BT {x * k:.2f} {y:.2f} Td"]
+            parts += [f"/F{font} {self.font_size_pt:.2f} Tf ({self._escape(text)}) Tj" for font, text in runs]
+            if runs[-1][0] != self.current_font['i']:
+                # Leave the font FPDF believes is selected active for later cells
+                parts.append(f"/F{self.current_font['i']} {self.font_size_pt:.2f} Tf")
+            parts.append('ET')
+            line = ' '.join(parts)
+            self._out(f"q {self.text_color} {line} Q" if self.color_flag else line)
+        self.ln(line_height)
+
+    def _putheader(self):
+        if not self._header_written:
+            super()._putheader()
+            self._header_written = True
+
+    def _endpage(self):
+        super()._endpage()
+        self._putheader()
+        content = self.pages[self.page].encode('latin-1')
+        self.pages[self.page] = ''
+        if self.compress:
+            content = zlib.compress(content)
+        self._newobj()
+        self._content_objects.append(self.n)
+        self._out(f"<<{'/Filter /FlateDecode ' if self.compress else ''}/Length {len(content)}>>")
+        self._putstream(content)
+        self._out('endobj')
+
+    def _putpages(self):
+        # Content streams are already written; add the page objects and the page tree
+        kids = []
+        for content_object in self._content_objects:
+            self._newobj()
+            kids.append(f"{self.n} 0 R")
+            self._out('<</Type /Page')
+            self._out('/Parent 1 0 R')
+            self._out('/Resources 2 0 R')
+            self._out(f"/Contents {content_object} 0 R>>")
+            self._out('endobj')
+        self.offsets[1] = len(self.buffer)
+        self._out('1 0 obj')
+        self._out('<</Type /Pages')
+        self._out(f"/Kids [{' '.join(kids)}]")
+        self._out(f"/Count {len(kids)}")
+        self._out(f"/MediaBox [0 0 {self.fw_pt:.2f} {self.fh_pt:.2f}]")
+        self._out('>>')
+        self._out('endobj')
+
+def _pdf_font(pdf: FPDF, span: Span, size: float):
+    if span.code:
+        pdf.set_font('Courier', 'B' if span.bold else '', size)
+    else:
+        pdf.set_font('Arial', ('B' if span.bold else '') + ('I' if span.italic else ''), size)
+
+def _wrap_spans(pdf: '_StreamingPDF', spans: List[Span], size: float,
+                width: float) -> List[List[Tuple[int, str, float]]]:
+    """
+    Break spans into lines no wider than ``width``, as (font number, text, width) fragments per line.
+
+    Words are measured once per font and size and cached on the document.
+    FPDF's own ``write`` and ``multi_cell`` re-measure and wrap one character
+    at a time, which made them the bulk of the export time.
+    """
+    scale = size / pdf.k / 1000
+    lines = []
+    line = []
+    line_width = 0.0
+    # Index in ``line`` where the word being built starts; a word can span several styles
+    word_start = 0
+    glue = False
+    # A space between words is set in the font of the word before it
+    space_widths = {}
+    for span in spans:
+        text = DocumentExporter.sanitize_text(span.text)
+        if not text:
+            continue
+        _pdf_font(pdf, span, size)
+        font = pdf.current_font['i']
+        widths = pdf.text_widths.setdefault((pdf.font_family + pdf.font_style, size), {})
+        cw = pdf.current_font['cw']
+        space_widths[font] = cw.get(' ', 0) * scale
+        if text[0].isspace():
+            glue = False
+        for part in text.split():
+            part_width = widths.get(part)
+            if part_width is None:
+                part_width = widths[part] = sum(cw.get(char, 0) for char in part) * scale
+            if not line:
+                word_start = 0
+            elif glue:
+                if line_width + part_width > width and word_start > 0:
+                    # The word no longer fits: move its earlier pieces down, dropping the space before it
+                    lines.append(line[:word_start - 1])
+                    line = line[word_start:]
+                    line_width = sum(fragment[2] for fragment in line)
+                    word_start = 0
+            else:
+                space_font = line[-1][0]
+                space_width = space_widths[space_font]
+                if line_width + space_width + part_width > width:
+                    lines.append(line)
+                    line = []
+                    line_width = 0.0
+                    word_start = 0
+                else:
+                    line.append((space_font, ' ', space_width))
+                    line_width += space_width
+                    word_start = len(line)
+            if line_width + part_width > width and part_width > width:
+                # Longer than a whole line: break it between characters
+                for char in part:
+                    char_width = cw.get(char, 0) * scale
+                    if line and line_width + char_width > width:
+                        lines.append(line)
+                        line = []
+                        line_width = 0.0
+                    line.append((font, char, char_width))
+                    line_width += char_width
+                word_start = 0
+            else:
+                line.append((font, part, part_width))
+                line_width += part_width
+            glue = False
+        glue = not text[-1].isspace()
+    lines.append(line)
+    return lines
+
+def _pdf_spans(pdf: '_StreamingPDF', spans: List[Span], size: float = PDF_FONT_SIZE,
+               line_height: float = PDF_LINE_HEIGHT, bold: bool = False):
+    """Write styled spans as one word-wrapped block starting at the current x position"""
+    if bold:
+        spans = [span._replace(bold=True) for span in spans]
+    left = pdf.x + pdf.c_margin
+    for line in _wrap_spans(pdf, spans, size, pdf.w - pdf.r_margin - left - pdf.c_margin):
+        # Neighbouring fragments in the same font are written as one run
+        runs = []
+        for font, text, _ in line:
+            if runs and runs[-1][0] == font:
+                runs[-1][1].append(text)
+            else:
+                runs.append((font, [text]))
+        pdf.text_line(left, line_height, [(font, ''.join(texts)) for font, texts in runs])
+
+def _text_width(pdf: '_StreamingPDF', text: str) -> float:
+    """Width of ``text`` in the current font, cached like the words measured by _wrap_spans"""
+    widths = pdf.text_widths.setdefault((pdf.font_family + pdf.font_style, pdf.font_size_pt), {})
+    width = widths.get(text)
+    if width is None:
+        width = widths[text] = pdf.get_string_width(text)
+    return width
+
+def _pdf_table(pdf: '_StreamingPDF', table: Table):
+    columns = len(table.header)
+    width = (pdf.w - pdf.l_margin - pdf.r_margin) / columns
+    for row_index, row in enumerate([table.header] + table.rows):
+        texts = [DocumentExporter.sanitize_text(''.join(span.text for span in cell)) for cell in row]
+        pdf.set_font('Arial', 'B' if row_index == 0 else '', PDF_FONT_SIZE - 2)
+        # Most cells fit on one line; only wrap the ones that do not
+        fits = [_text_width(pdf, text) <= width - 2 * pdf.c_margin for text in texts]
+        if all(fits):
+            # One line per cell: each cell draws its own border
+            if pdf.y + PDF_LINE_HEIGHT > pdf.page_break_trigger:
+                pdf.add_page()
+            pdf.set_x(pdf.l_margin)
+            for text in texts:
+                pdf.cell(width, PDF_LINE_HEIGHT, text, border=1)
+            pdf.ln(PDF_LINE_HEIGHT)
+            continue
+        lines = [1 if fit else len(pdf.multi_cell(width, PDF_LINE_HEIGHT, text, split_only=True))
+                 for text, fit in zip(texts, fits)]
+        height = PDF_LINE_HEIGHT * max(lines)
+        if pdf.y + height > pdf.page_break_trigger:
+            pdf.add_page()
+        top = pdf.y
+        for column, (text, fit) in enumerate(zip(texts, fits)):
+            left = pdf.l_margin + column * width
+            pdf.rect(left, top, width, height)
+            pdf.set_xy(left, top)
+            if fit:
+                pdf.cell(width, PDF_LINE_HEIGHT, text)
+            else:
+                pdf.multi_cell(width, PDF_LINE_HEIGHT, text, align='L')
+        pdf.set_xy(pdf.l_margin, top + height)
+
+def _render_pdf(pdf: FPDF, blocks):
+    """Lay out parsed Markdown blocks on the PDF"""
+    for block in blocks:
+        if isinstance(block, Paragraph):
+            _pdf_spans(pdf, block.spans)
+        elif isinstance(block, Heading):
+            pdf.ln(PDF_BLOCK_SPACING)
+            size = PDF_HEADING_SIZES.get(block.level, PDF_FONT_SIZE)
+            _pdf_spans(pdf, block.spans or [Span('')], size, size * 0.5, bold=True)
+        elif isinstance(block, CodeBlock):
+            pdf.set_font('Courier', '', PDF_CODE_FONT_SIZE)
+            pdf.set_fill_color(240, 240, 240)
+            code_width = pdf.w - pdf.r_margin - pdf.x - 2 * pdf.c_margin
+            for line in DocumentExporter.sanitize_text(block.text.expandtabs(4)).split('\n'):
+                # Courier is monospaced, so most lines are known to fit without measuring them
+                if len(line) * pdf.font_size * 0.6 <= code_width:
+                    pdf.cell(0, PDF_CODE_LINE_HEIGHT, line, fill=1, ln=1)
+                else:
+                    pdf.multi_cell(0, PDF_CODE_LINE_HEIGHT, line, fill=1, align='L')
+        elif isinstance(block, ListBlock):
+            numbers = {}
+            for item in block.items:
+                numbers[item.level] = numbers.get(item.level, 0) + 1
+                for deeper in [level for level in numbers if level > item.level]:
+                    del numbers[deeper]
+                marker = f"{numbers[item.level]}." if item.ordered else '-'
+                pdf.set_font('Arial', '', PDF_FONT_SIZE)
+                pdf.set_x(pdf.l_margin + item.level * PDF_LIST_INDENT)
+                pdf.cell(PDF_LIST_INDENT, PDF_LINE_HEIGHT, marker)
+                margin = pdf.l_margin
+                pdf.set_left_margin(pdf.x)
+                _pdf_spans(pdf, item.spans or [Span('')])
+                pdf.set_left_margin(margin)
+                pdf.set_x(margin)
+        elif isinstance(block, Table):
+            _pdf_table(pdf, block)
+        elif isinstance(block, Quote):
+            margin = pdf.l_margin
+            pdf.set_left_margin(margin + PDF_LIST_INDENT)
+            pdf.set_x(pdf.l_margin)
+            _pdf_spans(pdf, [span._replace(italic=True) for span in block.spans] or [Span('')])
+            pdf.set_left_margin(margin)
+            pdf.set_x(margin)
+        elif isinstance(block, Rule):
+            pdf.ln(PDF_BLOCK_SPACING)
+            pdf.line(pdf.l_margin, pdf.y, pdf.w - pdf.r_margin, pdf.y)
+        pdf.ln(PDF_BLOCK_SPACING)
+
+_W_R = qn('w:r')
+_W_RPR = qn('w:rPr')
+_W_RFONTS = qn('w:rFonts')
+_W_B = qn('w:b')
+_W_I = qn('w:i')
+_W_SZ = qn('w:sz')
+_W_T = qn('w:t')
+_W_BR = qn('w:br')
+_W_ASCII = qn('w:ascii')
+_W_HANSI = qn('w:hAnsi')
+_W_VAL = qn('w:val')
+_XML_SPACE = qn('xml:space')
+
+def _docx_run(p, text: str, bold: bool = False, italic: bool = False, code: bool = False,
+              half_points: int = 0):
+    """
+    Append a run to a ``w:p`` element.
+
+    Runs are built with plain lxml calls: python-docx's run API places every
+    child by searching for its schema successors, which dominates the export
+    time of long documents. Children are appended here in schema order instead.
+    """
+    r = SubElement(p, _W_R)
+    if bold or italic or code or half_points:
+        rPr = SubElement(r, _W_RPR)
+        if code:
+            fonts = SubElement(rPr, _W_RFONTS)
+            fonts.set(_W_ASCII, CODE_FONT)
+            fonts.set(_W_HANSI, CODE_FONT)
+        if bold:
+            SubElement(rPr, _W_B)
+        if italic:
+            SubElement(rPr, _W_I)
+        if half_points:
+            SubElement(rPr, _W_SZ).set(_W_VAL, str(half_points))
+    for index, line in enumerate(text.split('\n')):
+        if index:
+            SubElement(r, _W_BR)
+        t = SubElement(r, _W_T)
+        t.text = line
+        if line != line.strip():
+            t.set(_XML_SPACE, 'preserve')
+
+def _docx_runs(p, spans: List[Span], bold: bool = False):
+    for span in spans:
+        _docx_run(p, span.text, span.bold or bold, span.italic, span.code)
+
+def _render_docx(doc, blocks):
+    """Add parsed Markdown blocks to a python-docx Document"""
+    # Document.add_paragraph/add_table search the body for its trailing section
+    # properties on every call, which makes building a long document quadratic,
+    # and assigning a style compares it with the default style by scanning the
+    # whole style table. Append next to the section properties directly and
+    # resolve each style id once instead; runs are added by _docx_run.
+    body = doc.element.body
+    section = body.find(qn('w:sectPr'))
+    page = doc.sections[-1]
+    block_width = page.page_width - page.left_margin - page.right_margin
+    style_ids = {}
+    def style_id(name):
+        if name not in style_ids:
+            style_ids[name] = doc.styles[name].style_id
+        return style_ids[name]
+
+    def append(element):
+        if section is not None:
+            section.addprevious(element)
+        else:
+            body.append(element)
+
+    def paragraph(style=None):
+        p = OxmlElement('w:p')
+        append(p)
+        if style is not None:
+            p.get_or_add_pPr().style = style_id(style)
+        return p
+
+    def table(rows, cols):
+        tbl = CT_Tbl.new_tbl(rows, cols, block_width)
+        append(tbl)
+        tbl.tblStyle_val = style_id('Table Grid')
+        return tbl
+
+    for block in blocks:
+        if isinstance(block, Paragraph):
+            _docx_runs(paragraph(), block.spans)
+        elif isinstance(block, Heading):
+            _docx_runs(paragraph(f"Heading {min(block.level, 9)}"), block.spans)
+        elif isinstance(block, CodeBlock):
+            _docx_run(paragraph('No Spacing'), block.text.expandtabs(4), code=True, half_points=CODE_HALF_POINTS)
+        elif isinstance(block, ListBlock):
+            for item in block.items:
+                name = 'List Number' if item.ordered else 'List Bullet'
+                if item.level:
+                    name += f" {min(item.level, 2) + 1}"
+                _docx_runs(paragraph(name), item.spans)
+        elif isinstance(block, Table):
+            tbl = table(len(block.rows) + 1, len(block.header))
+            for row_index, (tr, cells) in enumerate(zip(tbl.tr_lst, [block.header] + block.rows)):
+                for tc, spans in zip(tr.tc_lst, cells):
+                    _docx_runs(tc.p_lst[0], spans, bold=row_index == 0)
+        elif isinstance(block, Quote):
+            _docx_runs(paragraph('Quote'), block.spans)
+        elif isinstance(block, Rule):
+            paragraph()
+
 class DocumentExporter:
     @staticmethod
     def sanitize_text(text):
         """
         Sanitize text to be compatible with FPDF by replacing Unicode characters 
-        with their closest ASCII equivalents
-        """
-        # Define replacements for common Unicode characters
-        replacements = {
-            '\u2014': '--',  # em dash
-            '\u2013': '-',   # en dash
-            '\u2018': "'",   # left single quotation mark
-            '\u2019': "'",   # right single quotation mark
-            '\u201c': '"',   # left double quotation mark
-            '\u201d': '"',   # right double quotation mark
-            '\u2022': '*',   # bullet
-            '\u2026': '...', # ellipsis
-            '\u00a9': '(c)', # copyright symbol
-            '\u00ae': '(R)', # registered trademark symbol
-            '\u2122': '(TM)',# trademark symbol
-            # Add more replacements as needed
-        }
-        
-        # Replace unsupported characters
-        for unicode_char, replacement in replacements.items():
-            text = text.replace(unicode_char, replacement)
-        
-        # Remove remaining non-Latin-1 characters
-        text = re.sub(r'[^\x00-\xff]', ' ', text)
-        
+        with their closest Latin-1 equivalents, in a single pass over the text
+        """
+        if text.isascii():
+            return text
+        # Characters outside Latin-1 are mapped by the codec error handler, which
+        # the encoder calls once per run of them; everything else is copied in C
+        text = text.encode('latin-1', _LATIN1_ERRORS).decode('latin-1')
+        for char, replacement in _LATIN1_REPLACEMENTS:
+            if char in text:
+                text = text.replace(char, replacement)
         return text
     
+    @staticmethod
+    def write_pdf(documentation, stream):
+        """
+        Render documentation as PDF into a binary stream, one page at a time
+
+        The Markdown is parsed once (shared with other formats exported from the
+        same text) and laid out with headings, code blocks, lists and tables.
+
+        Args:
+            documentation (str): Documentation text to export
+            stream (BinaryIO): Writable binary file object, e.g. an open file or io.BytesIO
+        """
+        pdf = _StreamingPDF(stream)
+        pdf.set_auto_page_break(True, margin=15)
+        pdf.add_page()
+        _render_pdf(pdf, parsed_document(documentation))
+        pdf.close()
+
+    @staticmethod
+    def export_pdf_bytes(documentation):
+        """
+        Export documentation to PDF in memory, for serving without a temporary file
+
+        Args:
+            documentation (str): Documentation text to export
+
+        Returns:
+            bytes: The PDF document
+        """
+        try:
+            stream = io.BytesIO()
+            DocumentExporter.write_pdf(documentation, stream)
+            return stream.getvalue()
+        except Exception as e:
+            logger.error(f"Failed to generate PDF: {str(e)}", exc_info=True)
+            raise
+
     @staticmethod
     def export_pdf(documentation, filename=None, output_dir=None):
         """
@@ -56,9 +580,6 @@ class DocumentExporter:
             str: Path to the generated PDF file
         """
         try:
-            # Sanitize the documentation text
-            sanitized_documentation = DocumentExporter.sanitize_text(documentation)
-            
             # If filename is not provided, generate one using current date and time
             if filename is None:
                 filename = f"documentation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
@@ -73,22 +594,9 @@ class DocumentExporter:
             # Set output file path
             output_path = os.path.join(output_dir, filename)
             
-            # Create a PDF instance
-            pdf = FPDF()
-            pdf.add_page()
-            
-            # Set font for the PDF
-            pdf.set_font("Arial", size=12)
-            
-            # Split the documentation into lines and add to PDF
-            for line in sanitized_documentation.split('\n'):
-                # Limit line length to prevent overflows
-                chunks = [line[i:i+80] for i in range(0, len(line), 80)]
-                for chunk in chunks:
-                    pdf.cell(0, 10, txt=chunk, ln=True)
-            
-            # Output the PDF to the specified path
-            pdf.output(output_path)
+            # Render straight into the file, page by page
+            with open(output_path, 'wb') as f:
+                DocumentExporter.write_pdf(documentation, f)
             
             logger.info(f"PDF generated successfully at: {output_path}")
             return output_path
@@ -97,6 +605,39 @@ class DocumentExporter:
             logger.error(f"Failed to generate PDF: {str(e)}", exc_info=True)
             raise
     
+    @staticmethod
+    def write_docx(documentation, stream):
+        """
+        Render documentation as DOCX into a binary stream or file path
+
+        Args:
+            documentation (str): Documentation text to export
+            stream (BinaryIO or str): Writable binary file object or output path
+        """
+        doc = Document()
+        doc.add_heading('Code Documentation', 0)
+        _render_docx(doc, parsed_document(documentation))
+        doc.save(stream)
+
+    @staticmethod
+    def export_docx_bytes(documentation):
+        """
+        Export documentation to DOCX in memory, for serving without a temporary file
+
+        Args:
+            documentation (str): Documentation text to export
+
+        Returns:
+            bytes: The DOCX document
+        """
+        try:
+            stream = io.BytesIO()
+            DocumentExporter.write_docx(documentation, stream)
+            return stream.getvalue()
+        except Exception as e:
+            logger.error(f"Failed to generate DOCX: {str(e)}", exc_info=True)
+            raise
+
     @staticmethod
     def export_docx(documentation, filename=None, output_dir=None):
         """
@@ -125,17 +666,8 @@ class DocumentExporter:
             # Set output file path
             output_path = os.path.join(output_dir, filename)
             
-            # Create a Document instance
-            doc = Document()
-            doc.add_heading('Code Documentation', 0)
-            
-            # Add content to document
-            for paragraph in documentation.split('\n\n'):
-                if paragraph.strip():
-                    doc.add_paragraph(paragraph)
-            
             # Save the document
-            doc.save(output_path)
+            DocumentExporter.write_docx(documentation, output_path)
             
             logger.info(f"DOCX generated successfully at: {output_path}")
             return output_path
@@ -0,0 +1,220 @@
+# history_export.py
+import argparse
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from export_utils import DocumentExporter
+
+logger = logging.getLogger(__name__)
+
+# Archive folder and compression for each format; PDF and DOCX are already
+# compressed internally, so deflating them again only costs CPU
+EXPORT_FORMATS = {
+    'md': zipfile.ZIP_DEFLATED,
+    'pdf': zipfile.ZIP_STORED,
+    'docx': zipfile.ZIP_STORED,
+}
+
+INDEX_FILE = 'index.md'
+
+_SLUG = re.compile(r'[^A-Za-z0-9]+')
+
+
+@dataclass
+class HistoryExportReport:
+    entries: int = 0
+    files: int = 0
+    failed: int = 0
+    bytes_written: int = 0
+    elapsed: float = 0.0
+    errors: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def entries_per_second(self) -> float:
+        return self.entries / self.elapsed if self.elapsed else 0.0
+
+
+def entry_document(entry: Dict) -> str:
+    """Markdown for one history entry: its documentation followed by the source it describes"""
+    return (f"# {entry['title']}\n\n*Generated {entry['created_at']}*\n\n{entry['documentation']}\n\n"
+            f"## Source\n\n```python\n{entry['code']}\n```\n")
+
+
+def entry_basename(entry: Dict) -> str:
+    slug = _SLUG.sub('-', entry['title']).strip('-').lower()[:60] or 'entry'
+    return f"{entry['created_at'][:10]}_{entry['id']:06d}_{slug}"
+
+
+def _render_entry(entry: Dict, formats: Sequence[str]) -> List[Tuple[str, bytes]]:
+    """Render one entry in every requested format (runs in a worker process)"""
+    document = entry_document(entry)
+    basename = entry_basename(entry)
+    files = []
+    for export_format in formats:
+        if export_format == 'md':
+            data = document.encode('utf-8')
+        elif export_format == 'pdf':
+            data = DocumentExporter.export_pdf_bytes(document)
+        else:
+            data = DocumentExporter.export_docx_bytes(document)
+        files.append((f"{export_format}/{basename}.{export_format}", data))
+    return files
+
+
+def _zip_time(created_at: str) -> Tuple[int, int, int, int, int, int]:
+    try:
+        parsed = time.strptime(created_at[:19], '%Y-%m-%d %H:%M:%S')
+        return parsed[:6]
+    except ValueError:
+        return time.localtime()[:6]
+
+
+class HistoryExporter:
+    """
+    Export a user's documentation history as one ZIP of Markdown, PDF and DOCX files.
+
+    Entries are read from the history in batches and rendered in a process
+    pool; finished files are appended to the archive as they arrive, so
+    neither the history nor the archive is ever held in memory. At most
+    ``max_in_flight`` entries are being rendered or waiting to be written at
+    any time.
+    """
+
+    def __init__(self, history_manager, processes: Optional[int] = None,
+                 max_in_flight: Optional[int] = None):
+        self.history_manager = history_manager
+        self.processes = processes or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.processes * 2
+
+    def export(self, username: str, output: Union[str, BinaryIO], formats: Sequence[str] = ('md',),
+               since: Optional[str] = None, until: Optional[str] = None,
+               progress_callback: Optional[Callable[[int, int], None]] = None) -> HistoryExportReport:
+        """
+        Write the user's entries created in [since, until) to a ZIP archive.
+
+        Args:
+            username (str): Owner of the entries
+            output (str or BinaryIO): Path of the archive, or a writable binary
+                stream (which need not be seekable, e.g. stdout)
+            formats (sequence): Any of 'md', 'pdf' and 'docx'
+            since (str, optional): Earliest created_at to include, e.g. '2025-01-01'
+            until (str, optional): created_at to stop before, e.g. '2025-04-01'
+            progress_callback (callable, optional): Called with (done, total) after each entry
+
+        Returns:
+            HistoryExportReport: Counts, size and throughput of the export
+        """
+        unknown = [export_format for export_format in formats if export_format not in EXPORT_FORMATS]
+        if unknown or not formats:
+            raise ValueError(f"Unsupported export formats: {', '.join(unknown) or 'none given'}. "
+                             f"Choose from: {', '.join(EXPORT_FORMATS)}")
+        start = time.perf_counter()
+        report = HistoryExportReport()
+        total = self.history_manager.count_entries(username, since, until)
+        index = []
+        done = 0
+        if progress_callback:
+            progress_callback(done, total)
+
+        # Spawned, not forked: exports run on job queue worker threads, and a
+        # fork would copy the history database's live writer and blob threads
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive, \
+                ProcessPoolExecutor(max_workers=self.processes,
+                                    mp_context=multiprocessing.get_context('spawn')) as pool:
+            entries = self.history_manager.iter_entries(username, since, until)
+            rendering = {}
+
+            def fill():
+                while len(rendering) < self.max_in_flight:
+                    entry = next(entries, None)
+                    if entry is None:
+                        return
+                    summary = {key: entry[key] for key in ('id', 'created_at', 'title')}
+                    rendering[pool.submit(_render_entry, entry, tuple(formats))] = summary
+
+            fill()
+            while rendering:
+                finished, _ = wait(list(rendering), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    entry = rendering.pop(future)
+                    done += 1
+                    try:
+                        files = future.result()
+                    except Exception as e:
+                        report.failed += 1
+                        report.errors[entry['id']] = str(e)
+                        logger.error(f"Error exporting history entry {entry['id']}: {str(e)}")
+                        continue
+                    for name, data in files:
+                        info = zipfile.ZipInfo(name, date_time=_zip_time(entry['created_at']))
+                        info.compress_type = EXPORT_FORMATS[name.rsplit('.', 1)[1]]
+                        archive.writestr(info, data)
+                        report.files += 1
+                        report.bytes_written += len(data)
+                    report.entries += 1
+                    index.append((entry['created_at'], entry['id'], f"- {entry['created_at']} · {entry['title']} · "
+                                  + ' · '.join(f"[{name.rsplit('.', 1)[1]}]({name})" for name, _ in files)))
+                    if progress_callback:
+                        progress_callback(done, total)
+                fill()
+
+            # Entries finish out of order; list them chronologically
+            header = [f"# Documentation history for {username}", "",
+                      f"{report.entries} entries" + (f" from {since}" if since else '')
+                      + (f" until {until}" if until else ''), ""]
+            archive.writestr(INDEX_FILE, '\n'.join(header + [line for _, _, line in sorted(index)]) + '\n')
+
+        report.elapsed = time.perf_counter() - start
+        logger.info(
+            f"Exported {report.entries} history entries for {username} ({report.files} files, "
+            f"{report.failed} failed) in {report.elapsed:.1f}s, {report.entries_per_second:.1f} entries/sec"
+        )
+        return report
+
+
+def remove_old_archives(directory: str, max_age_seconds: float = 24 * 3600) -> int:
+    """Delete ZIP archives older than ``max_age_seconds`` from ``directory``"""
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.name.endswith('.zip') and entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError as e:
+            logger.error(f"Error removing old history export {entry.path}: {str(e)}")
+    return removed
+
+
+if __name__ == "__main__":
+    from history_manager import HistoryManager
+
+    parser = argparse.ArgumentParser(description="Export a user's documentation history as a ZIP archive")
+    parser.add_argument('username', help="User whose history is exported")
+    parser.add_argument('--output', default='-', help="Archive path, or - for stdout")
+    parser.add_argument('--formats', default='md,pdf,docx', help="Comma-separated formats: md, pdf, docx")
+    parser.add_argument('--since', default=None, help="Earliest creation date to include, e.g. 2025-01-01")
+    parser.add_argument('--until', default=None, help="Creation date to stop before, e.g. 2025-04-01")
+    parser.add_argument('--db', default='documentation_history.db', help="History database")
+    parser.add_argument('--processes', type=int, default=None, help="Rendering processes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    exporter = HistoryExporter(HistoryManager(args.db), processes=args.processes)
+    result = exporter.export(args.username, sys.stdout.buffer if args.output == '-' else args.output,
+                             formats=[name.strip() for name in args.formats.split(',') if name.strip()],
+                             since=args.since, until=args.until)
+    print(f"Exported {result.entries} entries ({result.files} files, {result.failed} failed) "
+          f"at {result.entries_per_second:.1f} entries/sec", file=sys.stderr)
@@ -1,34 +1,498 @@
 # history_manager.py
 import sqlite3
+import logging
 from datetime import datetime
 import json
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from blob_store import BlobStore
+from db import get_database
+from doc_cache import ERROR_PREFIXES
+from similarity_index import SimilarEntry, SimilarityIndex, signature
+from history_search import SEARCH_SCHEMA, RANK_WEIGHTS, build_match_query, index_entry, make_snippet, query_terms
+
+logger = logging.getLogger(__name__)
+
+# Symbol name used to store a module overview alongside the per-symbol sections
+OVERVIEW_SYMBOL = '__overview__'
+
+TITLE_LENGTH = 80
+
+# One-off data migrations, recorded once finished so later starts skip them
+MIGRATIONS_SCHEMA = '''CREATE TABLE IF NOT EXISTS migrations
+                       (name TEXT PRIMARY KEY,
+                        completed_at DATETIME)'''
+
+def entry_title(code: str) -> str:
+    """Short label for a history entry: the first def/class line, else the first non-blank line"""
+    lines = [line.strip() for line in code.splitlines() if line.strip()]
+    for line in lines:
+        if line.startswith(('def ', 'async def ', 'class ')):
+            return line.rstrip(':')[:TITLE_LENGTH]
+    return lines[0][:TITLE_LENGTH] if lines else 'Empty snippet'
 
 class HistoryManager:
-    def __init__(self):
-        self.conn = sqlite3.connect('documentation_history.db', check_same_thread=False)
-        self.create_history_table()
+    def __init__(self, db_path: str = 'documentation_history.db'):
+        self.db = get_database(db_path)
+        self.blobs = BlobStore(self.db)
+        self.db.setup('history', self.create_history_table)
     
     def create_history_table(self):
-        query = '''CREATE TABLE IF NOT EXISTS documentation_history
-                  (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                   username TEXT,
-                   code TEXT,
-                   documentation TEXT,
-                   created_at DATETIME,
-                   FOREIGN KEY (username) REFERENCES users(username))'''
-        self.conn.execute(query)
-        self.conn.commit()
-    
-    def add_entry(self, username: str, code: str, documentation: str):
-        self.conn.execute(
-            'INSERT INTO documentation_history (username, code, documentation, created_at) VALUES (?, ?, ?, ?)',
-            (username, code, documentation, datetime.now())
-        )
-        self.conn.commit()
+        queries = [
+            '''CREATE TABLE IF NOT EXISTS documentation_history
+               (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT,
+                code TEXT,
+                documentation TEXT,
+                created_at DATETIME,
+                FOREIGN KEY (username) REFERENCES users(username))''',
+            
+            '''CREATE TABLE IF NOT EXISTS symbol_sections
+               (entry_id INTEGER,
+                position INTEGER,
+                symbol TEXT,
+                fingerprint TEXT,
+                documentation TEXT,
+                FOREIGN KEY (entry_id) REFERENCES documentation_history(id))''',
+            
+            '''CREATE INDEX IF NOT EXISTS idx_symbol_sections_entry
+               ON symbol_sections (entry_id, position)'''
+        ]
+        
+        def create(conn):
+            for query in queries:
+                conn.execute(query)
+            BlobStore.create_table(conn)
+            conn.execute(SEARCH_SCHEMA)
+            conn.execute(MIGRATIONS_SCHEMA)
+            SimilarityIndex.create_tables(conn)
+            self._add_columns(conn)
+        
+        self.db.write(create)
+        self._backfill_listing_columns()
+        self._move_bodies_to_blobs()
+        self._backfill_search_index()
+        self._rebuild_similarity_index()
+        self._backfill_similarity_index()
+        # Covers the listing query, so paging never reads the code/documentation blobs
+        self.db.write(lambda conn: conn.execute(
+            '''CREATE INDEX IF NOT EXISTS idx_history_user_created
+               ON documentation_history (username, created_at, id, title, size)'''
+        ))
+    
+    @staticmethod
+    def _add_columns(conn):
+        """Add the columns introduced after the original schema"""
+        added = {
+            'documentation_history': (('title', 'TEXT'), ('size', 'INTEGER'),
+                                      ('code_hash', 'TEXT'), ('documentation_hash', 'TEXT')),
+            'symbol_sections': (('documentation_hash', 'TEXT'),)
+        }
+        for table, new_columns in added.items():
+            columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+            for name, column_type in new_columns:
+                if name not in columns:
+                    conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {column_type}')
+    
+    def _backfill_listing_columns(self, batch_size: int = 500):
+        """Fill title/size for rows written before those columns existed"""
+        def backfill(conn):
+            rows = conn.execute(
+                'SELECT id, code, documentation FROM documentation_history WHERE title IS NULL LIMIT ?',
+                (batch_size,)
+            ).fetchall()
+            conn.executemany(
+                'UPDATE documentation_history SET title=?, size=? WHERE id=?',
+                [(entry_title(code or ''), self._entry_size(code or '', documentation or ''), entry_id)
+                 for entry_id, code, documentation in rows]
+            )
+            return len(rows)
+        
+        while self.db.write(backfill):
+            pass
+    
+    def _migration_done(self, name: str) -> bool:
+        return self.db.execute('SELECT 1 FROM migrations WHERE name=?', (name,)).fetchone() is not None
+    
+    @staticmethod
+    def _record_migration(conn, name: str):
+        conn.execute('INSERT OR IGNORE INTO migrations (name, completed_at) VALUES (?, ?)', (name, datetime.now()))
+    
+    def _move_bodies_to_blobs(self, batch_size: int = 500):
+        """Migrate entries and sections that still hold bodies inline into the compressed blob store"""
+        name = 'bodies_to_blobs'
+        if self._migration_done(name):
+            return
+        
+        # Each batch is read and compressed on this thread; only the updates go to the writer
+        def migrate_entries() -> int:
+            rows = self.db.execute(
+                'SELECT id, code, documentation FROM documentation_history WHERE code_hash IS NULL LIMIT ?',
+                (batch_size,)
+            ).fetchall()
+            prepared = [(self.blobs.prepare(code or ''), self.blobs.prepare(documentation or ''), entry_id)
+                        for entry_id, code, documentation in rows]
+            
+            def update(conn):
+                conn.executemany(
+                    'UPDATE documentation_history SET code_hash=?, documentation_hash=?, code=NULL, '
+                    'documentation=NULL WHERE id=?',
+                    [(self.blobs.store(code), self.blobs.store(documentation), entry_id)
+                     for code, documentation, entry_id in prepared]
+                )
+            
+            self.db.write(update)
+            return len(rows)
+        
+        def migrate_sections() -> int:
+            rows = self.db.execute(
+                'SELECT rowid, documentation FROM symbol_sections WHERE documentation_hash IS NULL LIMIT ?',
+                (batch_size,)
+            ).fetchall()
+            prepared = [(self.blobs.prepare(documentation or ''), rowid) for rowid, documentation in rows]
+            self.db.write(lambda conn: conn.executemany(
+                'UPDATE symbol_sections SET documentation_hash=?, documentation=NULL WHERE rowid=?',
+                [(self.blobs.store(documentation), rowid) for documentation, rowid in prepared]
+            ))
+            return len(rows)
+        
+        migrated = 0
+        for migrate in (migrate_entries, migrate_sections):
+            while True:
+                count = migrate()
+                if not count:
+                    break
+                migrated += count
+        self.db.write(lambda conn: self._record_migration(conn, name))
+        if migrated:
+            # Give the space held by the inline bodies back to the file system
+            self.db.execute('VACUUM')
+    
+    def _backfill_search_index(self, batch_size: int = 500):
+        """Index entries written before the search index existed (ids above the highest indexed one)"""
+        def backfill(conn):
+            last_id = conn.execute('SELECT COALESCE(MAX(rowid), 0) FROM history_fts').fetchone()[0]
+            rows = conn.execute(
+                'SELECT id, username, title, code_hash, documentation_hash FROM documentation_history '
+                'WHERE id > ? ORDER BY id LIMIT ?',
+                (last_id, batch_size)
+            ).fetchall()
+            bodies = self.blobs.get_many([row[3] for row in rows] + [row[4] for row in rows])
+            for entry_id, username, title, code_hash, documentation_hash in rows:
+                index_entry(conn, entry_id, username, title, bodies.get(code_hash, ''),
+                            bodies.get(documentation_hash, ''))
+            return len(rows)
+        
+        while self.db.write(backfill):
+            pass
+    
+    def _rebuild_similarity_index(self):
+        """Drop similarity buckets built before they were kept per user; the backfill rebuilds them"""
+        name = 'similarity_per_user'
+        if self._migration_done(name):
+            return
+        
+        def clear(conn):
+            conn.execute('DELETE FROM similarity_buckets')
+            conn.execute('DELETE FROM similarity_signatures')
+            self._record_migration(conn, name)
+        
+        self.db.write(clear)
+    
+    def _backfill_similarity_index(self, batch_size: int = 200):
+        """Compute similarity signatures for entries written before the index existed"""
+        while True:
+            last_id = self.db.execute(
+                'SELECT COALESCE(MAX(entry_id), 0) FROM similarity_signatures'
+            ).fetchone()[0]
+            rows = self.db.execute(
+                'SELECT id, username, code_hash FROM documentation_history WHERE id > ? ORDER BY id LIMIT ?',
+                (last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            codes = self.blobs.get_many(row[2] for row in rows)
+            # Signatures are computed outside the write so other sessions' writes are not held up
+            signatures = [(entry_id, username, signature(codes.get(code_hash, '')))
+                          for entry_id, username, code_hash in rows]
+            
+            def add(conn):
+                for entry_id, username, sig in signatures:
+                    SimilarityIndex.add(conn, entry_id, sig, username or '')
+            
+            self.db.write(add)
+    
+    @staticmethod
+    def _entry_size(code: str, documentation: str) -> int:
+        return len(code.encode('utf-8')) + len(documentation.encode('utf-8'))
+    
+    def add_entry(self, username: str, code: str, documentation: str,
+                  sections: Optional[List[Tuple[str, str, str]]] = None) -> int:
+        """
+        Store a documentation entry and, optionally, its per-symbol sections.
+        
+        Args:
+            username (str): Owner of the entry
+            code (str): Documented source code
+            documentation (str): Generated documentation
+            sections (list, optional): (symbol, fingerprint, documentation) tuples in source order
+            
+        Returns:
+            int: Id of the new entry
+        """
+        created_at = datetime.now()
+        
+        title = entry_title(code)
+        sig = signature(code)
+        # Compressed here rather than on the shared writer thread
+        code_blob = self.blobs.prepare(code)
+        documentation_blob = self.blobs.prepare(documentation)
+        section_blobs = [(symbol, fingerprint, self.blobs.prepare(doc))
+                         for symbol, fingerprint, doc in sections or []]
+        
+        def insert(conn):
+            cursor = conn.execute(
+                'INSERT INTO documentation_history '
+                '(username, code_hash, documentation_hash, created_at, title, size) VALUES (?, ?, ?, ?, ?, ?)',
+                (username, self.blobs.store(code_blob), self.blobs.store(documentation_blob), created_at,
+                 title, self._entry_size(code, documentation))
+            )
+            entry_id = cursor.lastrowid
+            index_entry(conn, entry_id, username, title, code, documentation)
+            SimilarityIndex.add(conn, entry_id, sig, username)
+            if section_blobs:
+                conn.executemany(
+                    'INSERT INTO symbol_sections (entry_id, position, symbol, fingerprint, documentation_hash) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    [(entry_id, position, symbol, fingerprint, self.blobs.store(blob))
+                     for position, (symbol, fingerprint, blob) in enumerate(section_blobs)]
+                )
+            return entry_id
+        
+        # Committed together with concurrent sessions' writes
+        return self.db.write(insert)
     
     def get_user_history(self, username: str, limit: int = 10):
-        cursor = self.conn.execute(
-            'SELECT * FROM documentation_history WHERE username=? ORDER BY created_at DESC LIMIT ?',
+        rows = self.db.execute(
+            'SELECT id, username, code_hash, documentation_hash, created_at FROM documentation_history '
+            'WHERE username=? ORDER BY created_at DESC, id DESC LIMIT ?',
             (username, limit)
-        )
-        return cursor.fetchall()
\ No newline at end of file
+        ).fetchall()
+        bodies = self.blobs.get_many([row[2] for row in rows] + [row[3] for row in rows])
+        return [(entry_id, owner, bodies.get(code_hash, ''), bodies.get(documentation_hash, ''), created_at)
+                for entry_id, owner, code_hash, documentation_hash, created_at in rows]
+    
+    def get_history_page(self, username: str, limit: int = 10,
+                         before: Optional[Tuple[str, int]] = None) -> Tuple[List[Dict], Optional[Tuple[str, int]]]:
+        """
+        List a page of the user's history without loading code or documentation.
+        
+        Pages are addressed by keyset rather than offset, so deep pages cost the
+        same as the first one.
+        
+        Args:
+            username (str): Owner of the entries
+            limit (int): Maximum number of entries to return
+            before (tuple, optional): Cursor returned with the previous page
+            
+        Returns:
+            tuple: (entries, cursor for the next page or None). Each entry is a
+            dict with id, created_at, title and size (bytes).
+        """
+        if before is None:
+            cursor = self.db.execute(
+                'SELECT id, created_at, title, size FROM documentation_history '
+                'WHERE username=? ORDER BY created_at DESC, id DESC LIMIT ?',
+                (username, limit + 1)
+            )
+        else:
+            cursor = self.db.execute(
+                'SELECT id, created_at, title, size FROM documentation_history '
+                'WHERE username=? AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?',
+                (username, before[0], before[1], limit + 1)
+            )
+        rows = cursor.fetchall()
+        entries = [
+            {'id': entry_id, 'created_at': created_at, 'title': title, 'size': size}
+            for entry_id, created_at, title, size in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = entries[-1]
+            next_cursor = (last['created_at'], last['id'])
+        return entries, next_cursor
+    
+    def get_entry(self, username: str, entry_id: int) -> Optional[Tuple[str, str]]:
+        """Return (code, documentation) of one of the user's entries, or None"""
+        row = self.db.execute(
+            'SELECT code_hash, documentation_hash FROM documentation_history WHERE id=? AND username=?',
+            (entry_id, username)
+        ).fetchone()
+        if row is None:
+            return None
+        bodies = self.blobs.get_many(row)
+        return bodies.get(row[0], ''), bodies.get(row[1], '')
+    
+    @staticmethod
+    def _range_filter(since: Optional[str], until: Optional[str]) -> Tuple[str, List[str]]:
+        clauses, params = '', []
+        if since is not None:
+            clauses += ' AND created_at >= ?'
+            params.append(since)
+        if until is not None:
+            clauses += ' AND created_at < ?'
+            params.append(until)
+        return clauses, params
+    
+    def count_entries(self, username: str, since: Optional[str] = None, until: Optional[str] = None) -> int:
+        """Number of the user's entries created in [since, until)"""
+        clauses, params = self._range_filter(since, until)
+        return self.db.execute(
+            f'SELECT COUNT(*) FROM documentation_history WHERE username=?{clauses}',
+            [username] + params
+        ).fetchone()[0]
+    
+    def iter_entries(self, username: str, since: Optional[str] = None, until: Optional[str] = None,
+                     batch_size: int = 100, include_bodies: bool = True) -> Iterator[Dict]:
+        """
+        Yield the user's entries oldest first, with code and documentation.
+        
+        Entries are read in keyset-paged batches, so only one batch of bodies is
+        held in memory however long the history is.
+        
+        Args:
+            username (str): Owner of the entries
+            since (str, optional): Earliest created_at to include, e.g. '2025-01-01'
+            until (str, optional): created_at to stop before, e.g. '2025-04-01'
+            batch_size (int): Entries read per query
+            include_bodies (bool): Whether to fetch code and documentation; the
+                content hashes are always included
+            
+        Yields:
+            dict: id, created_at, title, code_hash, documentation_hash and,
+                if include_bodies, code and documentation of one entry
+        """
+        clauses, params = self._range_filter(since, until)
+        after = None
+        while True:
+            keyset = ' AND (created_at, id) > (?, ?)' if after is not None else ''
+            rows = self.db.execute(
+                'SELECT id, created_at, title, code_hash, documentation_hash FROM documentation_history '
+                f'WHERE username=?{clauses}{keyset} ORDER BY created_at, id LIMIT ?',
+                [username] + params + (list(after) if after is not None else []) + [batch_size]
+            ).fetchall()
+            if not rows:
+                return
+            bodies = self.blobs.get_many([row[3] for row in rows] + [row[4] for row in rows]) \
+                if include_bodies else None
+            for entry_id, created_at, title, code_hash, documentation_hash in rows:
+                entry = {
+                    'id': entry_id,
+                    'created_at': created_at,
+                    'title': title,
+                    'code_hash': code_hash,
+                    'documentation_hash': documentation_hash
+                }
+                if bodies is not None:
+                    entry['code'] = bodies.get(code_hash, '')
+                    entry['documentation'] = bodies.get(documentation_hash, '')
+                yield entry
+            after = (rows[-1][1], rows[-1][0])
+    
+    def search(self, username: str, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Full-text search over the user's code and documentation.
+        
+        Args:
+            username (str): Owner of the entries to search
+            query (str): Free-text query; words are ANDed, the last one matches as a prefix
+            limit (int): Maximum number of results
+            
+        Returns:
+            list: Best matches first, as dicts with id, created_at, title, size, score and snippet
+        """
+        match = build_match_query(username, query)
+        if not match:
+            return []
+        weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+        try:
+            rows = self.db.execute(
+                f'SELECT h.id, h.created_at, h.title, h.size, h.code_hash, h.documentation_hash, f.score '
+                f'FROM (SELECT rowid, bm25(history_fts, {weights}) AS score FROM history_fts '
+                f'      WHERE history_fts MATCH ? ORDER BY score LIMIT ?) f '
+                f'JOIN documentation_history h ON h.id = f.rowid WHERE h.username=? ORDER BY f.score',
+                (match, limit, username)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error searching history: {str(e)}")
+            return []
+        
+        # The index is contentless, so snippets are cut from the stored bodies of the hits only
+        terms = query_terms(query)
+        bodies = self.blobs.get_many([row[4] for row in rows] + [row[5] for row in rows])
+        results = []
+        for entry_id, created_at, title, size, code_hash, documentation_hash, score in rows:
+            snippet = (make_snippet(bodies.get(documentation_hash, ''), terms)
+                       or make_snippet(bodies.get(code_hash, ''), terms))
+            results.append({
+                'id': entry_id,
+                'created_at': created_at,
+                'title': title,
+                'size': size,
+                'score': -score,
+                'snippet': snippet
+            })
+        return results
+    
+    def find_similar(self, username: str, code: str, min_similarity: float = 0.6) -> Optional[SimilarEntry]:
+        """
+        Find the user's stored entry whose code is most similar to ``code``.
+        
+        Similarity is the estimated Jaccard similarity of AST-normalized
+        shingles, so renamed variables and reformatting do not lower it.
+        Entries whose documentation is an error message are skipped.
+        
+        Args:
+            username (str): Owner of the entries to search
+            code (str): Code about to be documented
+            min_similarity (float): Lowest similarity (0-1) worth returning
+            
+        Returns:
+            SimilarEntry or None
+        """
+        sig = signature(code)
+        if sig is None:
+            return None
+        try:
+            matches = SimilarityIndex.lookup(self.db.connection(), sig, username, min_similarity)
+        except sqlite3.Error as e:
+            logger.error(f"Error looking up similar code: {str(e)}")
+            return None
+        for entry_id, similarity in matches:
+            row = self.db.execute(
+                'SELECT code_hash, documentation_hash FROM documentation_history WHERE id=? AND username=?',
+                (entry_id, username)
+            ).fetchone()
+            if row is None:
+                continue
+            bodies = self.blobs.get_many(row)
+            documentation = bodies.get(row[1], '')
+            if documentation and not documentation.startswith(ERROR_PREFIXES):
+                return SimilarEntry(entry_id, similarity, bodies.get(row[0], ''), documentation)
+        return None
+    
+    def get_latest_sections(self, username: str) -> Dict[str, Tuple[str, str]]:
+        """Return {symbol: (fingerprint, documentation)} from the user's most recent sectioned entry"""
+        row = self.db.execute(
+            'SELECT MAX(s.entry_id) FROM symbol_sections s '
+            'JOIN documentation_history h ON h.id = s.entry_id WHERE h.username=?',
+            (username,)
+        ).fetchone()
+        if row is None or row[0] is None:
+            return {}
+        rows = self.db.execute(
+            'SELECT symbol, fingerprint, documentation_hash FROM symbol_sections WHERE entry_id=? ORDER BY position',
+            (row[0],)
+        ).fetchall()
+        bodies = self.blobs.get_many(row[2] for row in rows)
+        return {symbol: (fingerprint, bodies.get(digest, '')) for symbol, fingerprint, digest in rows}
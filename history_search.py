@@ -0,0 +1,86 @@
+# history_search.py
+import hashlib
+import re
+import sqlite3
+from typing import List
+
+# Every indexed token is prefixed with a per-user tag (see owner_prefix), so a
+# query only reads the posting lists of the searching user's entries instead
+# of every user's matches. The text is tokenized here rather than by FTS5;
+# underscores are token characters so the prefixed tokens stay whole.
+SEARCH_SCHEMA = '''CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5
+                   (title, symbols, code, documentation,
+                    content='', tokenize="unicode61 tokenchars '_'")'''
+
+# bm25 column weights: title, symbols, code, documentation
+RANK_WEIGHTS = (5.0, 10.0, 1.0, 2.0)
+
+SNIPPET_CHARS = 160
+
+_DEFINITION = re.compile(r'^\s*(?:async\s+def|def|class)\s+([A-Za-z_]\w*)', re.MULTILINE)
+_WORD_PART = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+_WORD = re.compile(r'\w+')
+
+def owner_prefix(username: str) -> str:
+    return 'u' + hashlib.sha1(username.encode('utf-8')).hexdigest()[:10] + '_'
+
+def symbol_terms(code: str) -> List[str]:
+    """Names defined in ``code`` followed by their snake_case/camelCase parts"""
+    terms = []
+    for name in _DEFINITION.findall(code):
+        terms.append(name)
+        parts = _WORD_PART.findall(name)
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+def _tagged(prefix: str, words: List[str]) -> str:
+    return ' '.join(prefix + word.lower() for word in words)
+
+def index_entry(conn: sqlite3.Connection, entry_id: int, username: str, title: str, code: str,
+                documentation: str):
+    prefix = owner_prefix(username)
+    conn.execute(
+        'INSERT INTO history_fts (rowid, title, symbols, code, documentation) VALUES (?, ?, ?, ?, ?)',
+        (entry_id, _tagged(prefix, _WORD.findall(title)), _tagged(prefix, symbol_terms(code)),
+         _tagged(prefix, _WORD.findall(code)), _tagged(prefix, _WORD.findall(documentation)))
+    )
+
+def query_terms(query: str) -> List[str]:
+    return _WORD.findall(query)
+
+def build_match_query(username: str, query: str) -> str:
+    """
+    Turn free text into an FTS5 MATCH expression over one user's entries.
+
+    Every word must match; the last one also matches as a prefix so results
+    update while the user is still typing. User input never reaches FTS5
+    syntax unquoted.
+    """
+    prefix = owner_prefix(username)
+    words = query_terms(query)
+    clauses = []
+    for position, word in enumerate(words):
+        star = '*' if position == len(words) - 1 else ''
+        clause = f'"{prefix}{word.lower()}"{star}'
+        # An identifier also matches entries that define names built from its parts
+        parts = _WORD_PART.findall(word)
+        if len(parts) > 1:
+            part_terms = ' '.join(f'"{prefix}{part.lower()}"' for part in parts) + star
+            clause = f'({clause} OR ({part_terms}))'
+        clauses.append(clause)
+    return ' '.join(clauses)
+
+def make_snippet(text: str, terms: List[str], width: int = SNIPPET_CHARS) -> str:
+    """Markdown excerpt of ``text`` around the first matching term, with matches in bold"""
+    if not terms:
+        return text[:width]
+    pattern = re.compile('|'.join(re.escape(term) for term in sorted(terms, key=len, reverse=True)),
+                         re.IGNORECASE)
+    match = pattern.search(text)
+    if match is None:
+        return ''
+    start = max(0, match.start() - width // 3)
+    excerpt = text[start:start + width].replace('\n', ' ')
+    excerpt = pattern.sub(lambda m: f"**{m.group(0)}**", excerpt)
+    return ('…' if start else '') + excerpt + ('…' if start + width < len(text) else '')
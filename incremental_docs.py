@@ -0,0 +1,139 @@
+# incremental_docs.py
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from code_chunker import chunk_code, chunk_fingerprint, interface_fingerprint
+from doc_cache import ERROR_PREFIXES
+from history_manager import OVERVIEW_SYMBOL
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class IncrementalResult:
+    documentation: str
+    # (symbol, fingerprint, documentation) in source order, ready for HistoryManager.add_entry
+    sections: List[Tuple[str, str, str]] = field(default_factory=list)
+    regenerated: List[str] = field(default_factory=list)
+    reused: List[str] = field(default_factory=list)
+
+def split_sections(text: str, names: List[str]) -> Optional[Tuple[str, List[str]]]:
+    """Split a response into (overview, one section per name), or None if a heading is missing"""
+    headings = []
+    start = 0
+    for name in names:
+        pattern = re.compile(rf'^#{{2,3}}[ \t]*`?{re.escape(name)}`?[ \t]*:?[ \t]*$', re.MULTILINE)
+        match = pattern.search(text, start)
+        if match is None:
+            return None
+        headings.append(match)
+        start = match.end()
+    ends = [heading.start() for heading in headings[1:]] + [len(text)]
+    sections = [text[heading.end():end].strip() for heading, end in zip(headings, ends)]
+    return text[:headings[0].start()].strip(), sections
+
+class IncrementalDocumenter:
+    """
+    Re-document only the functions and classes that changed since the user's last submission.
+
+    The code is split into one chunk per symbol (top-level functions, class
+    headers, methods and module-level statements). Each chunk is fingerprinted
+    from its AST dump and compared with the sections stored for the user's most
+    recent history entry; unchanged sections are reused verbatim and only the
+    changed ones are sent to the model. The module overview is reused as long
+    as the interface is unchanged: the same symbols, signatures, docstrings
+    and module-level code, whatever happened inside function bodies.
+
+    When nothing can be reused (e.g. a file's first incremental run), the
+    whole source is documented in a single request whose response is split
+    into the per-symbol sections, instead of one request per symbol plus the
+    overview.
+    """
+
+    def __init__(self, doc_generator, history_manager):
+        self.doc_generator = doc_generator
+        self.history_manager = history_manager
+
+    @staticmethod
+    def _symbol_names(chunks) -> List[str]:
+        """Chunk names made unique, since e.g. several module-level blocks share a name"""
+        seen = {}
+        names = []
+        for chunk in chunks:
+            count = seen.get(chunk.name, 0) + 1
+            seen[chunk.name] = count
+            names.append(chunk.name if count == 1 else f"{chunk.name}#{count}")
+        return names
+
+    def document(self, username: str, code: str, analysis: Dict[str, Any]) -> IncrementalResult:
+        chunks = chunk_code(code, self.doc_generator.max_prompt_tokens, pack=False, split_classes=True)
+        names = self._symbol_names(chunks)
+        fingerprints = [chunk_fingerprint(chunk) for chunk in chunks]
+        previous = self.history_manager.get_latest_sections(username)
+        overview_key = hashlib.sha256('\x00'.join(
+            f"{name}\x01{interface_fingerprint(chunk)}" for name, chunk in zip(names, chunks)
+        ).encode('utf-8')).hexdigest()
+
+        sections = [None] * len(chunks)
+        changed = []
+        for i, (name, fingerprint) in enumerate(zip(names, fingerprints)):
+            stored = previous.get(name)
+            if stored is not None and stored[0] == fingerprint:
+                sections[i] = stored[1]
+            else:
+                changed.append(i)
+
+        if chunks and len(changed) == len(chunks):
+            result = self._document_whole(code, analysis, chunks, names, fingerprints, overview_key)
+            if result is not None:
+                return result
+
+        if changed:
+            generated = self.doc_generator.document_chunks([chunks[i] for i in changed])
+            error = next((s for s in generated if s.startswith(ERROR_PREFIXES)), None)
+            if error:
+                return IncrementalResult(documentation=error)
+            for i, section in zip(changed, generated):
+                sections[i] = section
+
+        stored_overview = previous.get(OVERVIEW_SYMBOL)
+        if stored_overview is not None and stored_overview[0] == overview_key:
+            overview = stored_overview[1]
+        else:
+            overview = self.doc_generator.generate_overview(analysis, chunks, sections)
+            if overview.startswith(ERROR_PREFIXES):
+                return IncrementalResult(documentation=overview)
+
+        changed_set = set(changed)
+        regenerated = [names[i] for i in changed]
+        reused = [name for i, name in enumerate(names) if i not in changed_set]
+        logger.info(f"Incremental documentation: {len(regenerated)} regenerated, {len(reused)} reused")
+        return IncrementalResult(
+            documentation=overview + self.doc_generator.format_sections(chunks, sections),
+            sections=[(OVERVIEW_SYMBOL, overview_key, overview)] + list(zip(names, fingerprints, sections)),
+            regenerated=regenerated,
+            reused=reused
+        )
+
+    def _document_whole(self, code: str, analysis: Dict[str, Any], chunks, names: List[str],
+                        fingerprints: List[str], overview_key: str) -> Optional[IncrementalResult]:
+        """Document every symbol with one request; None if the source is too large for one prompt"""
+        text = self.doc_generator.document_symbols(code, analysis, names)
+        if text is None:
+            return None
+        if text.startswith(ERROR_PREFIXES):
+            return IncrementalResult(documentation=text)
+        split = split_sections(text, names)
+        if split is None:
+            # Still a complete document; the next run simply has no sections to reuse
+            logger.info("Incremental documentation: response has no per-symbol sections, storing it whole")
+            return IncrementalResult(documentation=text, regenerated=list(names))
+        overview, sections = split
+        logger.info(f"Incremental documentation: {len(names)} symbols documented in one request")
+        return IncrementalResult(
+            documentation=overview + self.doc_generator.format_sections(chunks, sections),
+            sections=[(OVERVIEW_SYMBOL, overview_key, overview)] + list(zip(names, fingerprints, sections)),
+            regenerated=list(names)
+        )
@@ -0,0 +1,232 @@
+# job_queue.py
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from db import connect
+
+logger = logging.getLogger(__name__)
+
+# A handler receives the job payload and a progress callback (fraction, message)
+# and returns a JSON-serializable result
+JobHandler = Callable[[Dict[str, Any], Callable[[float, str], None]], Any]
+
+# Finished jobs are kept this long so users can still see their results
+RETENTION_DAYS = 7
+# Minimum time between retention sweeps triggered by new submissions
+PRUNE_INTERVAL_SECONDS = 3600
+
+# Every queue records a heartbeat this often; jobs of a queue that has missed
+# OWNER_TIMEOUT_SECONDS of heartbeats are taken over by a live queue
+OWNER_HEARTBEAT_SECONDS = 10.0
+OWNER_TIMEOUT_SECONDS = 3 * OWNER_HEARTBEAT_SECONDS
+
+class JobQueue:
+    """
+    Background jobs backed by a SQLite table and executed on a local worker pool.
+
+    Jobs are persisted before they run, so their status and results survive
+    page reloads. Each job is owned by the queue instance that will run it,
+    and every instance keeps a heartbeat in the database. Jobs left queued or
+    running by an instance whose heartbeat stopped (its process exited) are
+    taken over on startup and periodically afterwards; jobs of an instance
+    that is still alive, e.g. one replaced in Streamlit's resource cache, are
+    left to it. Completed and failed jobs older than ``retention_days`` are
+    deleted on startup and periodically on submit.
+    """
+
+    def __init__(self, db_path: str = 'jobs.db', max_workers: int = 4, retention_days: float = RETENTION_DAYS):
+        self.conn = connect(db_path, check_same_thread=False)
+        self.retention_days = retention_days
+        self.owner = uuid.uuid4().hex
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+        self._handlers: Dict[str, JobHandler] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job-worker')
+        self._stopped = threading.Event()
+        self.create_tables()
+        self._beat()
+        threading.Thread(target=self._heartbeat, name='job-queue-heartbeat', daemon=True).start()
+
+    def create_tables(self):
+        queries = [
+            '''CREATE TABLE IF NOT EXISTS jobs
+               (id TEXT PRIMARY KEY,
+                username TEXT,
+                kind TEXT,
+                status TEXT,
+                progress REAL,
+                message TEXT,
+                payload TEXT,
+                result TEXT,
+                error TEXT,
+                created_at DATETIME,
+                updated_at DATETIME)''',
+            '''CREATE INDEX IF NOT EXISTS idx_jobs_user_created ON jobs (username, created_at)''',
+            '''CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)''',
+            '''CREATE TABLE IF NOT EXISTS job_owners
+               (owner TEXT PRIMARY KEY,
+                heartbeat_at REAL)'''
+        ]
+        with self._lock:
+            for query in queries:
+                self.conn.execute(query)
+            # Added after the original schema; jobs without an owner are treated as orphaned
+            columns = {row[1] for row in self.conn.execute('PRAGMA table_info(jobs)')}
+            if 'owner' not in columns:
+                self.conn.execute('ALTER TABLE jobs ADD COLUMN owner TEXT')
+            self.conn.commit()
+
+    def register(self, kind: str, handler: JobHandler):
+        self._handlers[kind] = handler
+
+    def prune(self) -> int:
+        """Delete completed and failed jobs last updated before the retention window"""
+        cutoff = datetime.now() - timedelta(days=self.retention_days)
+        with self._lock:
+            deleted = self.conn.execute(
+                "DELETE FROM jobs WHERE status IN ('completed', 'failed') AND updated_at < ?", (cutoff,)
+            ).rowcount
+            self.conn.commit()
+        self._last_prune = time.monotonic()
+        if deleted:
+            logger.info(f"Pruned {deleted} finished jobs older than {self.retention_days} days")
+        return deleted
+
+    def _beat(self):
+        with self._lock:
+            self.conn.execute('INSERT OR REPLACE INTO job_owners (owner, heartbeat_at) VALUES (?, ?)',
+                              (self.owner, time.time()))
+            self.conn.commit()
+
+    def _heartbeat(self):
+        while not self._stopped.wait(OWNER_HEARTBEAT_SECONDS):
+            try:
+                self._beat()
+                # Picks up jobs of a process that died shortly before this one started
+                self._adopt_orphans()
+            except Exception as e:
+                logger.error(f"Job queue heartbeat failed: {str(e)}")
+
+    def _adopt_orphans(self) -> int:
+        """Take over unfinished jobs whose owner has stopped sending heartbeats"""
+        cutoff = time.time() - OWNER_TIMEOUT_SECONDS
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT j.id, j.kind, j.owner FROM jobs j LEFT JOIN job_owners o ON o.owner = j.owner "
+                "WHERE j.status IN ('queued', 'running') AND (o.heartbeat_at IS NULL OR o.heartbeat_at < ?) "
+                "ORDER BY j.created_at",
+                (cutoff,)
+            ).fetchall()
+        adopted = 0
+        for job_id, kind, owner in rows:
+            if kind not in self._handlers:
+                continue
+            with self._lock:
+                # Only one live queue may win the job, even if several look at once
+                claimed = self.conn.execute(
+                    "UPDATE jobs SET owner=?, status='queued', message=?, updated_at=? "
+                    "WHERE id=? AND owner IS ? AND status IN ('queued', 'running')",
+                    (self.owner, 'Requeued after restart', datetime.now(), job_id, owner)
+                ).rowcount
+                self.conn.commit()
+            if claimed:
+                self._executor.submit(self._run, job_id)
+                adopted += 1
+        if adopted:
+            with self._lock:
+                self.conn.execute('DELETE FROM job_owners WHERE heartbeat_at < ?', (cutoff,))
+                self.conn.commit()
+            logger.info(f"Recovered {adopted} unfinished jobs")
+        return adopted
+
+    def recover(self) -> int:
+        """Re-enqueue jobs left queued or running by queue instances that are no longer alive"""
+        self.prune()
+        return self._adopt_orphans()
+
+    def submit(self, username: str, kind: str, payload: Dict[str, Any]) -> str:
+        """Persist a new job, schedule it and return its id"""
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        job_id = uuid.uuid4().hex
+        now = datetime.now()
+        with self._lock:
+            self.conn.execute(
+                'INSERT INTO jobs (id, username, kind, status, progress, message, payload, owner, '
+                'created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, username, kind, 'queued', 0.0, 'Waiting for a worker', json.dumps(payload), self.owner,
+                 now, now)
+            )
+            self.conn.commit()
+        self._executor.submit(self._run, job_id)
+        if time.monotonic() - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+            self.prune()
+        return job_id
+
+    def _update(self, job_id: str, **fields):
+        fields['updated_at'] = datetime.now()
+        assignments = ', '.join(f"{name}=?" for name in fields)
+        with self._lock:
+            self.conn.execute(f'UPDATE jobs SET {assignments} WHERE id=?', (*fields.values(), job_id))
+            self.conn.commit()
+
+    def _run(self, job_id: str):
+        with self._lock:
+            row = self.conn.execute('SELECT kind, payload FROM jobs WHERE id=?', (job_id,)).fetchone()
+        if row is None:
+            return
+        kind, payload = row
+        self._update(job_id, status='running', message='Started')
+
+        def progress(fraction: float, message: str):
+            self._update(job_id, progress=fraction, message=message)
+
+        try:
+            result = self._handlers[kind](json.loads(payload), progress)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+            self._update(job_id, status='failed', error=str(e), message='Failed')
+            return
+        self._update(job_id, status='completed', progress=1.0, message='Done', result=json.dumps(result))
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT id, username, kind, status, progress, message, result, error, created_at, updated_at '
+                'FROM jobs WHERE id=?',
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row[0],
+            'username': row[1],
+            'kind': row[2],
+            'status': row[3],
+            'progress': row[4],
+            'message': row[5],
+            'result': json.loads(row[6]) if row[6] else None,
+            'error': row[7],
+            'created_at': row[8],
+            'updated_at': row[9]
+        }
+
+    def get_user_jobs(self, username: str, limit: int = 10) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT id FROM jobs WHERE username=? ORDER BY created_at DESC LIMIT ?',
+                (username, limit)
+            ).fetchall()
+        return [self.get_job(row[0]) for row in rows]
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+        if wait:
+            # Nothing is left to run, so stop claiming to own jobs
+            self._stopped.set()
@@ -0,0 +1,323 @@
+# llm_backends.py
+import abc
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, Optional
+
+from code_chunker import estimate_tokens
+from llm_client import AsyncLLMClient, LLMError, DEFAULT_BASE_URL
+
+logger = logging.getLogger(__name__)
+
+# Default sustained request rate (requests per second) allowed per LLM provider.
+# Every provider call takes a token, including each chunk of a map-reduce run.
+PROVIDER_RATE_LIMITS = {
+    'openai': 3.0,
+    'ollama': 10.0,
+}
+
+class RateLimiter:
+    """Thread-safe token bucket limiting how often a provider is called"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+def get_rate_limiter(provider: str) -> Optional[RateLimiter]:
+    """Return the process-wide rate limiter for ``provider``, or None if it is not limited"""
+    if provider not in PROVIDER_RATE_LIMITS:
+        return None
+    with _rate_limiters_lock:
+        if provider not in _rate_limiters:
+            _rate_limiters[provider] = RateLimiter(PROVIDER_RATE_LIMITS[provider])
+        return _rate_limiters[provider]
+
+class BackendMetrics:
+    """Thread-safe latency and throughput counters for one backend"""
+
+    def __init__(self, window: int = 1000):
+        self.requests = 0
+        self.errors = 0
+        self.output_chars = 0
+        self.busy_seconds = 0.0
+        self._latencies = deque(maxlen=window)
+        self._first_token = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, output_chars: int, first_token: Optional[float] = None,
+               failed: bool = False):
+        with self._lock:
+            self.requests += 1
+            self.busy_seconds += latency
+            if failed:
+                self.errors += 1
+                return
+            self.output_chars += output_chars
+            self._latencies.append(latency)
+            if first_token is not None:
+                self._first_token.append(first_token)
+
+    @staticmethod
+    def _percentile(values, fraction: float) -> Optional[float]:
+        if not values:
+            return None
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = list(self._latencies)
+            first_token = list(self._first_token)
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'latency_p50': self._percentile(latencies, 0.5),
+                'latency_p95': self._percentile(latencies, 0.95),
+                'first_token_p50': self._percentile(first_token, 0.5),
+                'chars_per_second': self.output_chars / self.busy_seconds if self.busy_seconds else 0.0
+            }
+
+class LLMBackend(abc.ABC):
+    """
+    Base class for text generation backends.
+
+    Subclasses implement ``_complete`` and optionally ``_stream``; the public
+    ``complete``/``stream`` methods wait for ``rate_limiter`` (if set) and
+    record metrics. Failures are raised as ``LLMError`` subclasses so callers
+    can handle every backend the same way.
+    """
+    name = 'base'
+    display_name = 'LLM'
+
+    def __init__(self, model: str):
+        self.model = model
+        self.metrics = BackendMetrics()
+        self.rate_limiter: Optional[RateLimiter] = None
+
+    @property
+    def identifier(self) -> str:
+        """Stable name of backend and model, used in cache keys"""
+        return f"{self.name}:{self.model}"
+
+    @abc.abstractmethod
+    def _complete(self, prompt: str, temperature: float, max_tokens: int) -> str:
+        """Return the full completion text"""
+
+    def _stream(self, prompt: str, temperature: float, max_tokens: int) -> Iterator[str]:
+        yield self._complete(prompt, temperature, max_tokens)
+
+    def complete(self, prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> str:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        start = time.perf_counter()
+        try:
+            text = self._complete(prompt, temperature, max_tokens)
+        except Exception:
+            self.metrics.record(time.perf_counter() - start, 0, failed=True)
+            raise
+        self.metrics.record(time.perf_counter() - start, len(text))
+        return text
+
+    def stream(self, prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> Iterator[str]:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        start = time.perf_counter()
+        first_token = None
+        chars = 0
+        try:
+            for text in self._stream(prompt, temperature, max_tokens):
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                chars += len(text)
+                yield text
+        except Exception:
+            self.metrics.record(time.perf_counter() - start, chars, first_token, failed=True)
+            raise
+        self.metrics.record(time.perf_counter() - start, chars, first_token)
+
+    def all_metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {self.identifier: self.metrics.snapshot()}
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI (or any OpenAI-compatible endpoint) through the pooled async client"""
+    name = 'openai'
+    display_name = 'OpenAI'
+
+    def __init__(self, model: str = "gpt-3.5-turbo", api_key: Optional[str] = None,
+                 base_url: Optional[str] = None, client: Optional[AsyncLLMClient] = None):
+        super().__init__(model)
+        if client is None:
+            api_key = api_key or os.getenv("OPENAI_API_KEY")
+            if not api_key:
+                raise ValueError("Missing OpenAI API key. Set it as the OPENAI_API_KEY environment variable.")
+            client = AsyncLLMClient(api_key, model=model,
+                                    base_url=base_url or os.getenv("OPENAI_BASE_URL", DEFAULT_BASE_URL))
+        self.client = client
+
+    def _complete(self, prompt: str, temperature: float, max_tokens: int) -> str:
+        return self.client.complete(prompt, temperature, max_tokens)
+
+    def _stream(self, prompt: str, temperature: float, max_tokens: int) -> Iterator[str]:
+        return self.client.stream(prompt, temperature, max_tokens)
+
+class OllamaBackend(LLMBackend):
+    """Local models served by Ollama"""
+    name = 'ollama'
+    display_name = 'Ollama'
+
+    def __init__(self, model: str = "deepseek-r1:1.5b", host: Optional[str] = None):
+        super().__init__(model)
+        import ollama
+        self._client = ollama.Client(host=host or os.getenv("OLLAMA_HOST"))
+
+    def _options(self, temperature: float, max_tokens: int) -> Dict[str, Any]:
+        return {'temperature': temperature, 'num_predict': max_tokens}
+
+    def _complete(self, prompt: str, temperature: float, max_tokens: int) -> str:
+        try:
+            response = self._client.chat(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                options=self._options(temperature, max_tokens)
+            )
+        except Exception as e:
+            raise LLMError(f"Ollama request failed: {str(e)}") from e
+        return response['message']['content']
+
+    def _stream(self, prompt: str, temperature: float, max_tokens: int) -> Iterator[str]:
+        try:
+            for chunk in self._client.chat(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                options=self._options(temperature, max_tokens),
+                stream=True
+            ):
+                content = chunk['message']['content']
+                if content:
+                    yield content
+        except Exception as e:
+            raise LLMError(f"Ollama request failed: {str(e)}") from e
+
+class FakeBackend(LLMBackend):
+    """
+    Deterministic offline backend for tests, demos and load tests.
+
+    The output depends only on the prompt. ``latency`` simulates the time to
+    first token and ``chars_per_second`` the generation speed.
+    """
+    name = 'fake'
+    display_name = 'Fake'
+
+    def __init__(self, model: str = "fake-1", latency: float = 0.0, chars_per_second: float = 0.0):
+        super().__init__(model)
+        self.latency = latency
+        self.chars_per_second = chars_per_second
+
+    def _render(self, prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:12]
+        return (f"## Documentation\n\nGenerated offline for a prompt of {estimate_tokens(prompt)} tokens "
+                f"(fingerprint {digest}).")
+
+    def _stream(self, prompt: str, temperature: float, max_tokens: int) -> Iterator[str]:
+        time.sleep(self.latency)
+        for word in self._render(prompt).split(' '):
+            if self.chars_per_second:
+                time.sleep(len(word) / self.chars_per_second)
+            yield word + ' '
+
+    def _complete(self, prompt: str, temperature: float, max_tokens: int) -> str:
+        return ''.join(self._stream(prompt, temperature, max_tokens)).strip()
+
+class RoutingBackend(LLMBackend):
+    """
+    Send short prompts to one backend (e.g. a local model) and long ones to another.
+
+    Calls go straight to the chosen backend, which records the metrics and
+    waits for its provider's rate limit; the router records nothing itself.
+    """
+    name = 'routed'
+    display_name = 'LLM'
+
+    def __init__(self, small: LLMBackend, large: LLMBackend, threshold_tokens: int = 1500):
+        super().__init__(f"{small.identifier}<={threshold_tokens}<{large.identifier}")
+        self.small = small
+        self.large = large
+        self.threshold_tokens = threshold_tokens
+
+    def route(self, prompt: str) -> LLMBackend:
+        return self.small if estimate_tokens(prompt) <= self.threshold_tokens else self.large
+
+    def _complete(self, prompt: str, temperature: float, max_tokens: int) -> str:
+        return self.route(prompt).complete(prompt, temperature, max_tokens)
+
+    def _stream(self, prompt: str, temperature: float, max_tokens: int) -> Iterator[str]:
+        return self.route(prompt).stream(prompt, temperature, max_tokens)
+
+    def complete(self, prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> str:
+        return self._complete(prompt, temperature, max_tokens)
+
+    def stream(self, prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> Iterator[str]:
+        return self._stream(prompt, temperature, max_tokens)
+
+    def all_metrics(self) -> Dict[str, Dict[str, Any]]:
+        metrics = self.small.all_metrics()
+        metrics.update(self.large.all_metrics())
+        return metrics
+
+BACKENDS = {
+    'openai': OpenAIBackend,
+    'ollama': OllamaBackend,
+    'fake': FakeBackend,
+}
+
+def create_backend(name: Optional[str] = None, model: Optional[str] = None,
+                   requests_per_second: Optional[float] = None) -> LLMBackend:
+    """
+    Build the configured backend.
+
+    Configuration comes from the arguments or the environment:
+    DOCGEN_BACKEND ('openai', 'ollama', 'fake' or 'routed', default 'openai'),
+    DOCGEN_MODEL, and for routing DOCGEN_ROUTE_SMALL, DOCGEN_ROUTE_LARGE and
+    DOCGEN_ROUTE_THRESHOLD (tokens).
+
+    Each provider backend is throttled by its process-wide limiter from
+    PROVIDER_RATE_LIMITS, or by its own ``requests_per_second`` limiter if
+    given. A routed call is throttled by the provider it is routed to.
+    """
+    name = name or os.getenv("DOCGEN_BACKEND", "openai")
+    if name == 'routed':
+        small = _build_backend(os.getenv("DOCGEN_ROUTE_SMALL", "ollama"), requests_per_second=requests_per_second)
+        large = _build_backend(os.getenv("DOCGEN_ROUTE_LARGE", "openai"), requests_per_second=requests_per_second)
+        return RoutingBackend(small, large, int(os.getenv("DOCGEN_ROUTE_THRESHOLD", "1500")))
+    return _build_backend(name, model or os.getenv("DOCGEN_MODEL"), requests_per_second)
+
+def _build_backend(name: str, model: Optional[str] = None,
+                   requests_per_second: Optional[float] = None) -> LLMBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}'. Choose one of: {', '.join(BACKENDS)}, routed")
+    backend = BACKENDS[name](model) if model else BACKENDS[name]()
+    backend.rate_limiter = RateLimiter(requests_per_second) if requests_per_second else get_rate_limiter(name)
+    return backend
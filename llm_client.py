@@ -0,0 +1,342 @@
+# llm_client.py
+import asyncio
+import atexit
+import contextlib
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+# HTTP statuses worth retrying: rate limiting and transient server failures
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+class LLMError(Exception):
+    """Base exception for failed LLM requests."""
+    pass
+
+class LLMAuthenticationError(LLMError):
+    """The provider rejected the API key."""
+    pass
+
+class LLMRateLimitError(LLMError):
+    """The provider kept rate limiting the request after all retries."""
+    pass
+
+class CircuitOpenError(LLMError):
+    """Requests are short-circuited because the provider keeps failing."""
+    pass
+
+class CircuitBreaker:
+    """
+    Stop sending requests to a failing provider for a while.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    rejects requests for ``reset_timeout`` seconds. It then lets a single
+    trial request through (half-open); success closes it, failure reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Let another trial through after a request ended without telling whether the provider works"""
+        with self._lock:
+            self._trial_in_flight = False
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Convert a Retry-After header (seconds or HTTP date) to seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class AsyncLLMClient:
+    """
+    Async client for OpenAI-compatible chat completion endpoints.
+
+    All requests run on one background event loop that owns a keep-alive
+    connection pool, so the synchronous ``complete``/``stream`` wrappers can
+    be called from any thread (Streamlit sessions, batch workers) while
+    sharing connections and the concurrency limit. Failed requests are
+    retried with jittered exponential backoff that honors Retry-After, and
+    a circuit breaker stops hammering a provider that keeps failing.
+    """
+
+    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo", base_url: str = DEFAULT_BASE_URL,
+                 max_concurrency: int = 8, pool_size: int = 16, read_timeout: float = 60.0,
+                 connect_timeout: float = 10.0, max_retries: int = 3, backoff_base: float = 1.0,
+                 backoff_cap: float = 30.0, breaker: Optional[CircuitBreaker] = None):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        # No total timeout: long streamed completions are fine as long as data keeps arriving
+        self.timeout = aiohttp.ClientTimeout(total=None, connect=connect_timeout, sock_read=read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self._loop = None
+        self._thread = None
+        self._session = None
+        self._semaphore = None
+        self._start_lock = threading.Lock()
+
+    # Event loop management
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="llm-client", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+        return self._loop
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={'Authorization': f"Bearer {self.api_key}"}
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    def close(self):
+        """Close the connection pool and stop the background loop"""
+        if self._loop is None:
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+        self._session = None
+
+    # Retry helpers
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_cap))
+        return delay
+
+    def _payload(self, prompt: str, temperature: float, max_tokens: int, stream: bool) -> Dict[str, Any]:
+        return {
+            'model': self.model,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'temperature': temperature,
+            'max_tokens': max_tokens,
+            'stream': stream
+        }
+
+    async def _open(self, session: aiohttp.ClientSession, payload: Dict[str, Any]) -> aiohttp.ClientResponse:
+        """
+        Send a completion request, retrying transient failures, and return the open response.
+
+        A concurrency slot is acquired for each attempt and released before
+        backing off, so waiting retries do not block other requests. On success
+        the slot stays held and the caller must release it with the response.
+        """
+        url = f"{self.base_url}/chat/completions"
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError("LLM provider is failing; requests are paused")
+            retry_after = None
+            try:
+                await self._semaphore.acquire()
+            except BaseException:
+                self.breaker.release_trial()
+                raise
+            try:
+                response = await session.post(url, json=payload)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._semaphore.release()
+                last_error = LLMError(f"Request failed: {e!r}")
+                self.breaker.record_failure()
+            except BaseException:
+                self._semaphore.release()
+                self.breaker.release_trial()
+                raise
+            else:
+                if response.status < 400:
+                    return response
+                # Record the outcome before reading the body, which may be cancelled
+                if response.status == 429:
+                    # Throttling means the provider is healthy, so it does not trip the breaker
+                    self.breaker.release_trial()
+                elif response.status in RETRYABLE_STATUSES:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                try:
+                    body = await response.text()
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    body = f"<unreadable body: {e!r}>"
+                finally:
+                    response.release()
+                    self._semaphore.release()
+                if response.status == 401:
+                    raise LLMAuthenticationError("Invalid API key")
+                if response.status not in RETRYABLE_STATUSES:
+                    raise LLMError(f"HTTP {response.status}: {body[:200]}")
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if response.status == 429:
+                    last_error = LLMRateLimitError(f"HTTP 429: {body[:200]}")
+                else:
+                    last_error = LLMError(f"HTTP {response.status}: {body[:200]}")
+
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                logger.warning(f"LLM request failed ({last_error}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        raise last_error
+
+    @contextlib.asynccontextmanager
+    async def _request(self, payload: Dict[str, Any]) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        Hold a concurrency slot and an open response while the caller reads it.
+
+        Every way out records an outcome with the breaker, so a half-open
+        trial request can never stay in flight forever.
+        """
+        session = await self._get_session()
+        response = await self._open(session, payload)
+        try:
+            yield response
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.breaker.record_failure()
+            raise LLMError(f"Connection lost while reading the response: {e!r}") from e
+        except LLMError:
+            # The provider sent something unusable, e.g. a malformed stream event
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # Cancelled or abandoned by the caller before the response was read
+            self.breaker.release_trial()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            response.release()
+            self._semaphore.release()
+
+    # Async API (must run on the client's loop)
+
+    async def acomplete(self, prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> str:
+        async with self._request(self._payload(prompt, temperature, max_tokens, False)) as response:
+            body = await response.text()
+        try:
+            return json.loads(body)['choices'][0]['message']['content'] or ''
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise LLMError(f"Malformed completion response: {body[:200]}") from e
+
+    async def astream(self, prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> AsyncIterator[str]:
+        async with self._request(self._payload(prompt, temperature, max_tokens, True)) as response:
+            async for raw_line in response.content:
+                line = raw_line.decode('utf-8').strip()
+                if not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    return
+                try:
+                    delta = json.loads(data)['choices'][0].get('delta') or {}
+                    text = delta.get('content')
+                except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                    raise LLMError(f"Malformed stream event: {data[:200]}") from e
+                if text:
+                    yield text
+
+    # Synchronous API (safe to call from any thread)
+
+    def complete(self, prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> str:
+        future = asyncio.run_coroutine_threadsafe(
+            self.acomplete(prompt, temperature, max_tokens), self._ensure_loop()
+        )
+        return future.result()
+
+    def stream(self, prompt: str, temperature: float = 0.7, max_tokens: int = 1024) -> Iterator[str]:
+        """Yield completion text chunks; exceptions are re-raised in the caller's thread"""
+        chunks = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for text in self.astream(prompt, temperature, max_tokens):
+                    chunks.put(text)
+            except BaseException as e:
+                chunks.put(e)
+            finally:
+                chunks.put(done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._ensure_loop())
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Stop reading the response if the caller abandoned the stream early
+            future.cancel()
@@ -20,18 +20,115 @@ from auth import Auth
 from code_analyzer import CodeAnalyzer
 from document_generator import DocumentGenerator
 from export_utils import DocumentExporter
+from export_cache import ExportCache, cleanup_timestamped_exports
 from history_manager import HistoryManager
+from history_export import EXPORT_FORMATS, HistoryExporter, remove_old_archives
+from batch_documenter import WORKSPACE_ROOT, BatchDocumenter, workspace_path
+from site_builder import SiteBuilder, batch_pages
+from analysis_cache import analysis_cache
+from incremental_docs import IncrementalDocumenter
+from job_queue import JobQueue
 import os
 import tempfile
+import time
+import uuid
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize components
+@st.cache_resource
+def get_doc_generator():
+    # Shared across reruns and sessions so cache counters survive
+    # Near-duplicates of earlier submissions reuse or build on their documentation
+    generator = DocumentGenerator(find_similar=HistoryManager().find_similar)
+    generator.warm_cache_from_history()
+    return generator
+
+def run_documentation_job(generator, history, incremental_docs, payload, progress):
+    """Job handler: analyze, generate and store documentation for one snippet"""
+    code = payload['code']
+    progress(0.1, "Analyzing code")
+    functions, classes, relationships = CodeAnalyzer.analyze_code_structure(code)
+    analysis = {
+        'functions': functions,
+        'classes': classes,
+        'relationships': relationships
+    }
+    
+    progress(0.2, "Generating documentation")
+    sections = None
+    result = {'functions': functions, 'classes': classes}
+    if payload.get('incremental'):
+        incremental_result = incremental_docs.document(payload['username'], code, analysis)
+        documentation = incremental_result.documentation
+        sections = incremental_result.sections
+        if sections:
+            result['sections_regenerated'] = len(incremental_result.regenerated)
+            result['sections_total'] = len(incremental_result.regenerated) + len(incremental_result.reused)
+    else:
+        documentation = generator.generate_documentation(code, analysis, payload['username'])
+    
+    # Clean up unwanted content (e.g., <think>) from documentation
+    documentation = documentation.lstrip('<think>').lstrip()
+    
+    progress(0.9, "Saving to history")
+    result['entry_id'] = history.add_entry(payload['username'], code, documentation, sections=sections)
+    result['documentation'] = documentation
+    return result
+
+HISTORY_EXPORT_DIR = os.path.join(tempfile.gettempdir(), 'docgen_history_exports')
+
+def run_history_export_job(history, payload, progress):
+    """Job handler: write a user's history (or a date range of it) to a ZIP archive"""
+    os.makedirs(HISTORY_EXPORT_DIR, exist_ok=True)
+    remove_old_archives(HISTORY_EXPORT_DIR)
+    # Usernames are free-form, so they never become part of the path
+    path = os.path.join(HISTORY_EXPORT_DIR, f"{uuid.uuid4().hex}.zip")
+    
+    def on_progress(done, total):
+        # Each progress update is a database write; report in 1% steps
+        if total and (done == total or done % max(1, total // 100) == 0):
+            progress(done / total, f"{done}/{total} entries exported")
+    
+    report = HistoryExporter(history).export(
+        payload['username'], path, payload['formats'],
+        since=payload.get('since'), until=payload.get('until'),
+        progress_callback=on_progress
+    )
+    return {'path': path, 'entries': report.entries, 'files': report.files, 'failed': report.failed}
+
+@st.cache_resource
+def get_job_queue():
+    # One worker pool per server process, shared by all sessions
+    generator = get_doc_generator()
+    history = HistoryManager()
+    incremental_docs = IncrementalDocumenter(generator, history)
+    queue = JobQueue()
+    queue.register(
+        'documentation',
+        lambda payload, progress: run_documentation_job(generator, history, incremental_docs, payload, progress)
+    )
+    queue.register(
+        'history_export',
+        lambda payload, progress: run_history_export_job(history, payload, progress)
+    )
+    queue.recover()
+    return queue
+
+@st.cache_resource
+def get_export_cache():
+    # Repeat exports of the same documentation are served from disk;
+    # also clear out timestamped files earlier exports left in the temp dir
+    cleanup_timestamped_exports()
+    return ExportCache()
+
 auth = Auth()
-doc_generator = DocumentGenerator()
+doc_generator = get_doc_generator()
 history_manager = HistoryManager()
+job_queue = get_job_queue()
+export_cache = get_export_cache()
 
 git_integration = GitManager()
 collab_manager = CollaborationManager()
@@ -46,6 +143,295 @@ if 'documentation' not in st.session_state:
     st.session_state['documentation'] = None
 if 'export_ready' not in st.session_state:
     st.session_state['export_ready'] = False
+if 'job_id' not in st.session_state:
+    # Keep following a background job across page reloads
+    st.session_state['job_id'] = st.query_params.get('job')
+
+def show_analysis(functions, classes):
+    st.write("### Code Analysis:")
+    st.write(f"**Functions Found:** {', '.join(functions) if functions else 'None'}")
+    st.write(f"**Classes Found:** {', '.join(classes) if classes else 'None'}")
+
+def timed_stream(chunks):
+    """Pass chunks through, recording this session's time to the first one"""
+    start = time.perf_counter()
+    st.session_state['time_to_first_token'] = None
+    for chunk in chunks:
+        if st.session_state['time_to_first_token'] is None:
+            st.session_state['time_to_first_token'] = time.perf_counter() - start
+        yield chunk
+
+def generate_streaming(code_input):
+    """Generate documentation in the script run, rendering tokens as they arrive"""
+    try:
+        # Analyze code
+        functions, classes, relationships = CodeAnalyzer.analyze_code_structure(code_input)
+        analysis = {
+            'functions': functions,
+            'classes': classes,
+            'relationships': relationships
+        }
+        
+        # Show the analysis first, then render tokens as they arrive
+        show_analysis(functions, classes)
+        st.write("### Generated Documentation:")
+        waiting = st.empty()
+
+        def show_waiting(elapsed):
+            waiting.info(f"⏳ The same code is already being documented for another request; "
+                         f"waiting for its result ({elapsed:.0f}s)")
+
+        documentation = st.write_stream(
+            timed_stream(doc_generator.generate_documentation_stream(
+                code_input, analysis, st.session_state['username'], on_wait=show_waiting
+            ))
+        )
+        waiting.empty()
+        ttft = st.session_state['time_to_first_token']
+        if ttft is not None:
+            st.caption(f"First token after {ttft:.2f}s")
+        
+        # Clean up unwanted content (e.g., <think>) from documentation
+        documentation = documentation.lstrip('<think>').lstrip()  # Remove leading <think> and whitespace
+        
+        # Store in session state
+        st.session_state['documentation'] = documentation
+        st.session_state['export_ready'] = True
+        
+        # Log the generated documentation for debugging purposes
+        logger.debug("Generated Documentation: %s", documentation)
+        
+        # Save to history
+        history_manager.add_entry(
+            st.session_state['username'],
+            code_input,
+            documentation
+        )
+    
+    except Exception as e:
+        st.error(f"Error processing code: {str(e)}")
+        logger.error(f"Error processing code: {str(e)}", exc_info=True)
+
+@st.fragment(run_every=1.0)
+def poll_job(job_id):
+    """Show job progress; rerun the page once the job has finished"""
+    job = job_queue.get_job(job_id)
+    if job is not None and job['status'] in ('queued', 'running'):
+        st.progress(job['progress'] or 0.0, text=job['message'])
+    else:
+        st.rerun()
+
+def render_job_result(job):
+    if job['status'] == 'failed':
+        st.error(f"Error processing code: {job['error']}")
+        return
+    
+    result = job['result']
+    # Load the result into the session once so export picks it up
+    if st.session_state.get('loaded_job') != job['id']:
+        st.session_state['loaded_job'] = job['id']
+        st.session_state['documentation'] = result['documentation']
+        st.session_state['export_ready'] = True
+    
+    show_analysis(result['functions'], result['classes'])
+    if result.get('sections_total'):
+        st.caption(f"Regenerated {result['sections_regenerated']} of {result['sections_total']} sections")
+    st.write("### Generated Documentation:")
+    st.markdown(result['documentation'])
+
+HISTORY_PAGE_SIZE = 10
+
+def render_history_entry(username, entry, snippet=None):
+    """Expander for one history entry; the body is only fetched while it is open"""
+    expander = st.expander(
+        f"{entry['title']} · {entry['created_at']} · {entry['size'] / 1024:.1f} KB",
+        key=f"history_{entry['id']}",
+        on_change="rerun"
+    )
+    if snippet:
+        st.caption(snippet)
+    if expander.open:
+        with expander:
+            body = history_manager.get_entry(username, entry['id'])
+            if body is not None:
+                st.code(body[0], language='python')
+                st.markdown(body[1])
+
+def render_history(username):
+    """Search results, or the history page by page when there is no query"""
+    query = st.text_input("Search history", key="history_search",
+                          placeholder="Function, class or any word from the code or docs")
+    if query.strip():
+        results = history_manager.search(username, query)
+        if not results:
+            st.info("No matching documentation found")
+        for result in results:
+            render_history_entry(username, result, result['snippet'])
+        return
+    
+    # Cursors of the pages visited so far, so "Newer" can step back
+    cursors = st.session_state.setdefault('history_cursors', [None])
+    entries, next_cursor = history_manager.get_history_page(username, HISTORY_PAGE_SIZE, cursors[-1])
+    
+    for entry in entries:
+        render_history_entry(username, entry)
+    
+    newer, older = st.columns(2)
+    if newer.button("Newer", disabled=len(cursors) == 1, key="history_newer"):
+        cursors.pop()
+        st.rerun()
+    if older.button("Older", disabled=next_cursor is None, key="history_older"):
+        cursors.append(next_cursor)
+        st.rerun()
+
+def render_history_export(username):
+    """Bulk export of the whole history, or a date range of it, as one ZIP"""
+    with st.expander("Export history as ZIP"):
+        formats = st.multiselect("Formats", list(EXPORT_FORMATS), default=['md'], key="history_export_formats")
+        since_col, until_col = st.columns(2)
+        since = since_col.date_input("From", value=None, key="history_export_since")
+        until = until_col.date_input("Before", value=None, key="history_export_until")
+        
+        if st.button("Export History", disabled=not formats, key="history_export_start"):
+            st.session_state['history_export_job'] = job_queue.submit(
+                username,
+                'history_export',
+                {
+                    'username': username,
+                    'formats': formats,
+                    'since': since.isoformat() if since else None,
+                    'until': until.isoformat() if until else None
+                }
+            )
+        
+        job_id = st.session_state.get('history_export_job')
+        if not job_id:
+            return
+        job = job_queue.get_job(job_id)
+        if job is None or job['username'] != username:
+            st.session_state['history_export_job'] = None
+        elif job['status'] in ('queued', 'running'):
+            poll_job(job_id)
+        elif job['status'] == 'failed':
+            st.error(f"Error exporting history: {job['error']}")
+        else:
+            result = job['result']
+            st.caption(f"{result['entries']} entries, {result['files']} files"
+                       + (f", {result['failed']} failed" if result['failed'] else ''))
+            path = result['path']
+            if os.path.exists(path):
+                def read_archive():
+                    # Read only when the button is clicked
+                    with open(path, 'rb') as f:
+                        return f.read()
+                
+                st.download_button(
+                    label="Download ZIP",
+                    data=read_archive,
+                    file_name="documentation_history.zip",
+                    mime="application/zip",
+                    key="history_export_download"
+                )
+            else:
+                st.info("The archive has expired; export again")
+
+def render_batch_ui():
+    st.header("Repository Documentation")
+    # Users pick directories inside the configured workspace only, never arbitrary server paths
+    os.makedirs(WORKSPACE_ROOT, exist_ok=True)
+    st.caption(f"Paths are relative to the workspace `{WORKSPACE_ROOT}` (set DOCGEN_WORKSPACE_ROOT to change it)")
+    root_input = st.text_input("Repository directory", value="repository")
+    output_input = st.text_input("Output directory", value="batch_docs")
+    workers = st.slider("Concurrent LLM requests", 1, 16, 4)
+    
+    if st.button("Document Repository"):
+        try:
+            root = workspace_path(root_input)
+            output_dir = workspace_path(output_input)
+        except ValueError as e:
+            st.error(str(e))
+            return
+        if not os.path.isdir(root):
+            st.error(f"Directory not found: {root_input}")
+            return
+        
+        progress = st.progress(0.0)
+        status = st.empty()
+        
+        def on_progress(done, total):
+            progress.progress(done / total if total else 1.0)
+            status.write(f"{done}/{total} files processed")
+        
+        try:
+            documenter = BatchDocumenter(doc_generator, output_dir=output_dir, max_workers=workers)
+            report = documenter.run(root, progress_callback=on_progress)
+            st.success(
+                f"Documented {report.documented} files ({report.skipped} unchanged, "
+                f"{report.failed} failed) at {report.files_per_second:.2f} files/sec"
+            )
+            st.write(f"Markdown and index written to `{output_dir}`")
+            for path, error in report.errors.items():
+                st.warning(f"{path}: {error}")
+        except Exception as e:
+            st.error(f"Error documenting repository: {str(e)}")
+            logger.error(f"Batch documentation error: {str(e)}", exc_info=True)
+    
+    try:
+        output_dir = workspace_path(output_input)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    site_dir = os.path.join(output_dir, 'site')
+    if st.button("Build HTML Site", disabled=not os.path.isdir(output_dir)):
+        try:
+            # Only modules whose Markdown changed since the last build are rendered again
+            report = SiteBuilder(site_dir, title=os.path.basename(os.path.abspath(root_input))).build(batch_pages(output_dir))
+            st.success(
+                f"Built {report.pages_total} pages ({report.rendered} rendered, {report.relinked} relinked, "
+                f"{report.unchanged} unchanged, {report.removed} removed) in {report.elapsed:.2f}s"
+            )
+            st.write(f"Open `{os.path.join(site_dir, 'index.html')}` in a browser")
+            for page_id, error in report.errors.items():
+                st.warning(f"{page_id}: {error}")
+        except Exception as e:
+            st.error(f"Error building site: {str(e)}")
+            logger.error(f"Site build error: {str(e)}", exc_info=True)
+
+NOTIFICATION_PAGE_SIZE = 20
+NOTIFICATION_REFRESH_SECONDS = 2.0
+
+@st.fragment(run_every=NOTIFICATION_REFRESH_SECONDS)
+def render_notifications(username):
+    """Sidebar notifications; the database is only read when the broker reports something new"""
+    state = st.session_state.get('notifications')
+    if state is None or state['user'] != username:
+        # Subscribe before the first count so nothing published in between is missed
+        state = {'user': username, 'subscription': collab_manager.broker.subscribe(username), 'stale': True}
+        st.session_state['notifications'] = state
+    
+    for event in state['subscription'].poll():
+        state['stale'] = True
+        if event['type'] == 'notification':
+            st.toast(event['message'])
+    if state['stale']:
+        state['unread_count'] = collab_manager.count_unread(username)
+        state['unread'] = None
+        state['stale'] = False
+    
+    if not state['unread_count']:
+        return
+    st.warning(f"You have {state['unread_count']} unread notifications")
+    if st.toggle("View Notifications", key="show_notifications"):
+        if state['unread'] is None:
+            state['unread'] = collab_manager.get_notifications(username, NOTIFICATION_PAGE_SIZE, unread_only=True)
+        for notif in state['unread']:
+            st.info(notif['message'])
+            if st.button("Mark as Read", key=f"notification_read_{notif['id']}"):
+                collab_manager.mark_notification_read(notif['id'])
+                st.rerun(scope="fragment")
+        if st.button("Mark all as read", key="notifications_read_all"):
+            collab_manager.mark_notifications_read(username)
+            st.rerun(scope="fragment")
 
 def main():
     st.title("Advanced Code Documentation Generator")
@@ -53,15 +439,7 @@ def main():
     # Add notifications to sidebar
     if st.session_state.get('logged_in'):
         with st.sidebar:
-            notifications = collab_manager.get_notifications(st.session_state['username'])
-            unread = [n for n in notifications if not n['read']]
-            if unread:
-                st.warning(f"You have {len(unread)} unread notifications")
-                if st.button("View Notifications"):
-                    for notif in unread:
-                        st.info(notif['message'])
-                        if st.button(f"Mark as Read {notif['id']}"):
-                            collab_manager.mark_notification_read(notif['id'])
+            render_notifications(st.session_state['username'])
     
     # Authentication section
     if not st.session_state['logged_in']:
@@ -94,60 +472,92 @@ def main():
         if st.sidebar.button("Logout"):
             st.session_state['logged_in'] = False
             st.session_state['username'] = None
+            st.session_state['job_id'] = None
+            st.session_state['history_cursors'] = [None]
+            st.query_params.clear()
             st.rerun()
         
+        cache_stats = doc_generator.cache.stats()
+        st.sidebar.caption(
+            f"Documentation cache: {cache_stats['hits']} hits, "
+            f"{cache_stats['misses']} misses, {cache_stats['entries']} entries"
+        )
+        for backend_id, metrics in doc_generator.backend.all_metrics().items():
+            if metrics['requests']:
+                st.sidebar.caption(
+                    f"{backend_id}: {metrics['requests']} requests, {metrics['errors']} errors, "
+                    f"p50 {metrics['latency_p50'] or 0:.2f}s, {metrics['chars_per_second']:.0f} chars/s"
+                )
+        flight_stats = doc_generator.flights.stats()
+        if flight_stats['coalesced']:
+            st.sidebar.caption(f"Coalesced duplicate requests: {flight_stats['coalesced']}")
+        similarity_stats = doc_generator.similarity_stats
+        if similarity_stats['reused'] or similarity_stats['referenced']:
+            st.sidebar.caption(
+                f"Similar earlier code: {similarity_stats['reused']} reused, "
+                f"{similarity_stats['referenced']} used as examples"
+            )
+        parse_stats = analysis_cache.stats()
+        st.sidebar.caption(
+            f"Analysis cache: {parse_stats['hits']} hits, {parse_stats['misses']} misses, "
+            f"{parse_stats['entries']} entries ({parse_stats['source_bytes'] // 1024} KB of source)"
+        )
+        export_stats = export_cache.stats()
+        if export_stats['hits'] or export_stats['misses']:
+            st.sidebar.caption(
+                f"Export cache: {export_stats['hits']} hits, {export_stats['misses']} misses, "
+                f"{export_stats['entries']} files ({export_stats['bytes'] // 1024} KB)"
+            )
+        
         # Documentation type selector
         doc_type = st.radio(
             "Select Documentation Type",
-            ["Regular Code", "API Documentation"]
+            ["Regular Code", "API Documentation", "Repository (Batch)"]
         )
         
+        if doc_type == "Repository (Batch)":
+            render_batch_ui()
+            return
+        
         # Main documentation interface
         code_input = st.text_area("Paste your Python code here:", height=300)
+        generation_mode = st.radio(
+            "Generation Mode",
+            ["Stream", "Incremental (only changed functions and classes)", "Standard"],
+            horizontal=True
+        )
+        stream_output = generation_mode == "Stream"
+        incremental = generation_mode.startswith("Incremental")
         col1, col2 = st.columns(2)
         
         with col1:
             if st.button("Generate Documentation"):
                 if code_input.strip():
-                    try:
-                        # Analyze code
-                        functions, classes, relationships = CodeAnalyzer.analyze_code_structure(code_input)
-                        analysis = {
-                            'functions': functions,
-                            'classes': classes,
-                            'relationships': relationships
-                        }
-                        
-                        # Generate documentation
-                        documentation = doc_generator.generate_documentation(code_input, analysis)
-                        
-                        # Clean up unwanted content (e.g., <think>) from documentation
-                        documentation = documentation.lstrip('<think>').lstrip()  # Remove leading <think> and whitespace
-                        
-                        # Store in session state
-                        st.session_state['documentation'] = documentation
-                        st.session_state['export_ready'] = True
-                        
-                        # Log the generated documentation for debugging purposes
-                        logger.debug("Generated Documentation: %s", documentation)
-                        
-                        # Save to history
-                        history_manager.add_entry(
+                    if stream_output:
+                        generate_streaming(code_input)
+                    else:
+                        # Run in the background so reruns and reloads don't lose the result
+                        job_id = job_queue.submit(
                             st.session_state['username'],
-                            code_input,
-                            documentation
+                            'documentation',
+                            {
+                                'username': st.session_state['username'],
+                                'code': code_input,
+                                'incremental': incremental
+                            }
                         )
-                        
-                        # Display results
-                        st.write("### Code Analysis:")
-                        st.write(f"**Functions Found:** {', '.join(functions) if functions else 'None'}")
-                        st.write(f"**Classes Found:** {', '.join(classes) if classes else 'None'}")
-                        st.write("### Generated Documentation:")
-                        st.markdown(documentation)
-                    
-                    except Exception as e:
-                        st.error(f"Error processing code: {str(e)}")
-                        logger.error(f"Error processing code: {str(e)}", exc_info=True)
+                        st.session_state['job_id'] = job_id
+                        st.query_params['job'] = job_id
+            
+            job_id = st.session_state.get('job_id')
+            if job_id and not stream_output:
+                job = job_queue.get_job(job_id)
+                if job is None or job['username'] != st.session_state['username']:
+                    st.session_state['job_id'] = None
+                elif job['status'] in ('queued', 'running'):
+                    poll_job(job_id)
+                else:
+                    render_job_result(job)
             
             # Export options (separate from the Generate Documentation button)
             if st.session_state['export_ready']:
@@ -164,61 +574,35 @@ def main():
                         if not documentation:
                             st.error("No documentation to export. Generate documentation first.")
                             st.stop()
-                            
+                        
+                        if export_format == "PDF":
+                            export = DocumentExporter.export_pdf_bytes
+                            mime_type = "application/pdf"
+                        else:
+                            export = DocumentExporter.export_docx_bytes
+                            mime_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                        
+                        # Rendered in memory, or read back from the export cache
                         with st.spinner(f"Generating {export_format} file..."):
-                            # Generate a temporary file with a unique name
-                            temp_dir = tempfile.gettempdir()
-                            
-                            if export_format == "PDF":
-                                file_path = DocumentExporter.export_pdf(documentation, output_dir=temp_dir)
-                                mime_type = "application/pdf"
-                            else:
-                                file_path = DocumentExporter.export_docx(documentation, output_dir=temp_dir)
-                                mime_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                            
-                            # Log the file path for debugging
-                            logger.info(f"Generated file at: {file_path}")
-                            
-                            # Check if file exists
-                            if not os.path.exists(file_path):
-                                st.error(f"Failed to generate {export_format} file: File not created")
-                                logger.error(f"File not found at: {file_path}")
-                                st.stop()
-                            
-                            # Get file size for verification
-                            file_size = os.path.getsize(file_path)
-                            logger.info(f"File size: {file_size} bytes")
-                            
-                            if file_size == 0:
-                                st.error(f"Generated {export_format} file is empty")
-                                logger.error(f"File is empty: {file_path}")
-                                st.stop()
-                                
-                            # Read file and offer download
-                            with open(file_path, 'rb') as f:
-                                file_content = f.read()
-                                file_name = f"documentation.{export_format.lower()}"
-                                
-                                st.download_button(
-                                    label=f"Download {export_format}",
-                                    data=file_content,
-                                    file_name=file_name,
-                                    mime=mime_type
-                                )
-                                
-                            st.success(f"{export_format} file generated successfully!")
-                            
+                            file_content = export_cache.get_or_create(documentation, export_format, export)
+                        
+                        st.download_button(
+                            label=f"Download {export_format}",
+                            data=file_content,
+                            file_name=f"documentation.{export_format.lower()}",
+                            mime=mime_type,
+                            on_click="ignore"
+                        )
+                        st.success(f"{export_format} file generated successfully!")
+                    
                     except Exception as e:
                         st.error(f"Error exporting documentation: {str(e)}")
                         logger.error(f"Export error: {str(e)}", exc_info=True)
         
         with col2:
             st.header("Documentation History")
-            history = history_manager.get_user_history(st.session_state['username'])
-            for entry in history:
-                with st.expander(f"Documentation from {entry[4]}"):
-                    st.code(entry[2], language='python')
-                    st.markdown(entry[3])
+            render_history(st.session_state['username'])
+            render_history_export(st.session_state['username'])
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,262 @@
+# markdown_renderer.py
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterator, List, NamedTuple, Optional, Union
+
+# Generated documentation uses a small, predictable part of Markdown, so this
+# is a single-pass line parser for that subset rather than a full CommonMark
+# implementation: ATX headings, fenced code, pipe tables, nested lists, block
+# quotes, rules and paragraphs, with bold/italic/code/link inline spans.
+
+class Span(NamedTuple):
+    """A run of inline text with one style"""
+    text: str
+    bold: bool = False
+    italic: bool = False
+    code: bool = False
+
+@dataclass
+class Heading:
+    level: int
+    spans: List[Span]
+
+@dataclass
+class Paragraph:
+    spans: List[Span]
+
+@dataclass
+class CodeBlock:
+    text: str
+    language: str = ''
+
+@dataclass
+class ListItem:
+    spans: List[Span]
+    level: int = 0
+    ordered: bool = False
+
+@dataclass
+class ListBlock:
+    items: List[ListItem] = field(default_factory=list)
+
+@dataclass
+class Table:
+    header: List[List[Span]]
+    rows: List[List[List[Span]]]
+
+@dataclass
+class Quote:
+    spans: List[Span]
+
+@dataclass
+class Rule:
+    pass
+
+Block = Union[Heading, Paragraph, CodeBlock, ListBlock, Table, Quote, Rule]
+
+_HEADING = re.compile(r'^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$')
+_FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})[ \t]*([^`\s]*)')
+_RULE = re.compile(r'^ {0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$')
+_LIST_ITEM = re.compile(r'^([ \t]*)([-*+]|\d{1,9}[.)])[ \t]+(.*)$')
+_QUOTE = re.compile(r'^ {0,3}>[ \t]?(.*)$')
+_TABLE_DELIMITER = re.compile(r'^[ \t]*\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$')
+_INLINE = re.compile(
+    r'(?P<code>`+)(?P<code_text>.+?)(?P=code)'
+    r'|(?P<strong>\*\*|__)(?P<strong_text>.+?)(?P=strong)'
+    r'|\*(?P<em_star>[^*\s](?:[^*]*[^*\s])?)\*'
+    r'|(?<!\w)_(?P<em_under>[^_\s](?:[^_]*[^_\s])?)_(?!\w)'
+    r'|\[(?P<link_text>[^\]]+)\]\((?P<link_url>[^)\s]+)\)'
+)
+_INLINE_MARKERS = frozenset('`*_[')
+
+# Widest indent step treated as one nesting level of a list
+_LIST_INDENT = 2
+
+def parse_inline(text: str, bold: bool = False, italic: bool = False) -> List[Span]:
+    """Split ``text`` into styled spans; unmatched markers are kept as literal text"""
+    if _INLINE_MARKERS.isdisjoint(text):
+        return [Span(text, bold, italic)] if text else []
+    spans = []
+    position = 0
+    for match in _INLINE.finditer(text):
+        if match.start() > position:
+            spans.append(Span(text[position:match.start()], bold, italic))
+        if match.group('code'):
+            spans.append(Span(match.group('code_text').strip(), bold, italic, True))
+        elif match.group('strong'):
+            spans.extend(parse_inline(match.group('strong_text'), True, italic))
+        elif match.group('em_star') is not None:
+            spans.extend(parse_inline(match.group('em_star'), bold, True))
+        elif match.group('em_under') is not None:
+            spans.extend(parse_inline(match.group('em_under'), bold, True))
+        else:
+            spans.extend(parse_inline(match.group('link_text'), bold, italic))
+        position = match.end()
+    if position < len(text):
+        spans.append(Span(text[position:], bold, italic))
+    return spans
+
+def plain_text(spans: List[Span]) -> str:
+    return ''.join(span.text for span in spans)
+
+def _table_cells(line: str) -> List[str]:
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|') and not line.endswith('\\|'):
+        line = line[:-1]
+    return [cell.strip().replace('\\|', '|') for cell in re.split(r'(?<!\\)\|', line)]
+
+def iter_blocks(text: str) -> Iterator[Block]:
+    """
+    Parse Markdown into blocks in one pass over its lines.
+
+    Args:
+        text (str): Markdown source
+
+    Yields:
+        Block: Heading, Paragraph, CodeBlock, ListBlock, Table, Quote or Rule
+    """
+    lines = text.split('\n')
+    count = len(lines)
+    paragraph: List[str] = []
+    current_list: Optional[ListBlock] = None
+    i = 0
+
+    def flush_paragraph():
+        if paragraph:
+            block = Paragraph(parse_inline(' '.join(paragraph)))
+            paragraph.clear()
+            return block
+        return None
+
+    while i < count:
+        line = lines[i].rstrip('\r')
+        stripped = line.strip()
+
+        if not stripped:
+            block = flush_paragraph()
+            if block:
+                yield block
+            # A blank line only ends a list when the next line is not part of it
+            if current_list is not None:
+                following = lines[i + 1] if i + 1 < count else ''
+                if not (_LIST_ITEM.match(following) or following.startswith((' ', '\t'))):
+                    yield current_list
+                    current_list = None
+            i += 1
+            continue
+
+        fence = _FENCE.match(line)
+        if fence:
+            for block in (flush_paragraph(), current_list):
+                if block:
+                    yield block
+            current_list = None
+            marker = fence.group(1)
+            body = []
+            i += 1
+            while i < count:
+                candidate = lines[i].rstrip('\r')
+                if candidate.strip().startswith(marker[0] * len(marker)) and not candidate.strip().strip(marker[0]):
+                    break
+                body.append(candidate)
+                i += 1
+            yield CodeBlock('\n'.join(body), fence.group(2))
+            i += 1
+            continue
+
+        item = _LIST_ITEM.match(line)
+        if item and not _RULE.match(line):
+            block = flush_paragraph()
+            if block:
+                yield block
+            if current_list is None:
+                current_list = ListBlock()
+            indent = len(item.group(1).expandtabs(4))
+            current_list.items.append(ListItem(
+                parse_inline(item.group(3).strip()),
+                min(indent // _LIST_INDENT, 3),
+                item.group(2)[0].isdigit()
+            ))
+            i += 1
+            continue
+
+        if current_list is not None:
+            if line.startswith((' ', '\t')):
+                # Continuation of the previous list item
+                last = current_list.items[-1]
+                last.spans = last.spans + parse_inline(' ' + stripped)
+                i += 1
+                continue
+            yield current_list
+            current_list = None
+
+        if stripped[0] == '#':
+            heading = _HEADING.match(line)
+            if heading:
+                block = flush_paragraph()
+                if block:
+                    yield block
+                yield Heading(len(heading.group(1)), parse_inline(heading.group(2) or ''))
+                i += 1
+                continue
+
+        if _RULE.match(line):
+            block = flush_paragraph()
+            if block:
+                yield block
+            yield Rule()
+            i += 1
+            continue
+
+        quote = _QUOTE.match(line)
+        if quote:
+            block = flush_paragraph()
+            if block:
+                yield block
+            quoted = [quote.group(1).strip()]
+            i += 1
+            while i < count:
+                quote = _QUOTE.match(lines[i])
+                if not quote:
+                    break
+                quoted.append(quote.group(1).strip())
+                i += 1
+            yield Quote(parse_inline(' '.join(part for part in quoted if part)))
+            continue
+
+        if '|' in line and i + 1 < count and _TABLE_DELIMITER.match(lines[i + 1]) and '-' in lines[i + 1]:
+            block = flush_paragraph()
+            if block:
+                yield block
+            header = [parse_inline(cell) for cell in _table_cells(line)]
+            rows = []
+            i += 2
+            while i < count and '|' in lines[i] and lines[i].strip():
+                cells = _table_cells(lines[i])
+                cells = (cells + [''] * len(header))[:len(header)]
+                rows.append([parse_inline(cell) for cell in cells])
+                i += 1
+            yield Table(header, rows)
+            continue
+
+        paragraph.append(stripped)
+        i += 1
+
+    for block in (flush_paragraph(), current_list):
+        if block:
+            yield block
+
+def parse_markdown(text: str) -> List[Block]:
+    """Parse Markdown into the block tree the exporters render from"""
+    return list(iter_blocks(text))
+
+@lru_cache(maxsize=4)
+def parsed_document(text: str) -> List[Block]:
+    """
+    ``parse_markdown`` shared across exports, so rendering the same documentation
+    to several formats parses it once. Callers must not modify the result.
+    """
+    return parse_markdown(text)
@@ -0,0 +1,99 @@
+# notification_broker.py
+import abc
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+class Subscription:
+    """One session's view of a user's notification stream"""
+
+    def __init__(self, broker: 'NotificationBroker', user: str, seen: int):
+        self.broker = broker
+        self.user = user
+        self.seen = seen
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Events published since the last poll (empty when nothing is new); never blocks"""
+        events, self.seen = self.broker.events_since(self.user, self.seen)
+        return events
+
+    def wait(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Block until something is published for the user or ``timeout`` passes"""
+        self.broker.wait(self.user, self.seen, timeout)
+        return self.poll()
+
+class NotificationBroker(abc.ABC):
+    """
+    Publish/subscribe channel for per-user notification events.
+
+    Publishers call ``publish`` after the notification is stored; sessions
+    hold a ``Subscription`` and poll it, which costs no database access.
+    Subclasses connect the same interface to an external broker.
+    """
+    name = 'base'
+
+    @abc.abstractmethod
+    def publish(self, user: str, event: Dict[str, Any]):
+        """Deliver ``event`` to every subscription of ``user``"""
+
+    @abc.abstractmethod
+    def events_since(self, user: str, seen: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Return (events newer than ``seen``, latest version) for ``user``"""
+
+    @abc.abstractmethod
+    def wait(self, user: str, seen: int, timeout: Optional[float] = None):
+        """Block until ``user`` has events newer than ``seen`` or ``timeout`` passes"""
+
+    def subscribe(self, user: str) -> Subscription:
+        """Subscribe to events published from now on"""
+        _, version = self.events_since(user, -1)
+        return Subscription(self, user, version)
+
+class InProcessBroker(NotificationBroker):
+    """
+    Broker for a single server process, kept entirely in memory.
+
+    Each user has a version number and a short backlog of recent events;
+    subscribers only remember the last version they saw, so idle or closed
+    sessions cost nothing to keep around.
+    """
+    name = 'memory'
+
+    def __init__(self, backlog: int = 20):
+        self.backlog = backlog
+        self._versions: Dict[str, int] = {}
+        self._events: Dict[str, Deque[Tuple[int, Dict[str, Any]]]] = {}
+        self._condition = threading.Condition()
+
+    def publish(self, user: str, event: Dict[str, Any]):
+        with self._condition:
+            version = self._versions.get(user, 0) + 1
+            self._versions[user] = version
+            self._events.setdefault(user, deque(maxlen=self.backlog)).append((version, event))
+            self._condition.notify_all()
+
+    def events_since(self, user: str, seen: int) -> Tuple[List[Dict[str, Any]], int]:
+        with self._condition:
+            version = self._versions.get(user, 0)
+            if version == seen:
+                return [], version
+            return [event for event_version, event in self._events.get(user, ()) if event_version > seen], version
+
+    def wait(self, user: str, seen: int, timeout: Optional[float] = None):
+        with self._condition:
+            self._condition.wait_for(lambda: self._versions.get(user, 0) != seen, timeout)
+
+BROKERS = {
+    'memory': InProcessBroker,
+}
+
+def create_broker(name: Optional[str] = None) -> NotificationBroker:
+    """Build the broker named by ``name`` or DOCGEN_NOTIFICATION_BROKER (default 'memory')"""
+    name = name or os.getenv("DOCGEN_NOTIFICATION_BROKER", "memory")
+    if name not in BROKERS:
+        raise ValueError(f"Unknown notification broker '{name}'. Choose one of: {', '.join(BROKERS)}")
+    return BROKERS[name]()
+
+# Shared by every Streamlit session in the process
+notification_broker = create_broker()
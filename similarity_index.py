@@ -0,0 +1,208 @@
+# similarity_index.py
+import ast
+import builtins
+import hashlib
+import re
+import sqlite3
+import struct
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional, Set, Tuple
+
+from code_analyzer import CodeAnalyzer
+
+# MinHash signature length, split into BANDS bands of ROWS values for LSH.
+# Two snippets become candidates when any band matches exactly; with 8 bands
+# of 4 rows that happens with probability ~0.98 at Jaccard similarity 0.8
+# and ~0.06 at 0.3.
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+
+# Tokens per shingle
+SHINGLE_SIZE = 5
+
+# Most candidates read per band; buckets of very common boilerplate are capped
+MAX_BUCKET_CANDIDATES = 64
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+_PERMUTATIONS = [
+    (int.from_bytes(hashlib.sha256(f"a{i}".encode()).digest()[:8], 'little') % (_PRIME - 1) + 1,
+     int.from_bytes(hashlib.sha256(f"b{i}".encode()).digest()[:8], 'little') % _PRIME)
+    for i in range(NUM_PERM)
+]
+_SIGNATURE_FORMAT = f'<{NUM_PERM}I'
+_BUILTINS = frozenset(dir(builtins))
+_FALLBACK_TOKEN = re.compile(r'\w+|[^\w\s]')
+
+@dataclass
+class SimilarEntry:
+    """A stored history entry whose code is nearly identical to a lookup"""
+    entry_id: int
+    similarity: float
+    code: str
+    documentation: str
+
+def _bound_names(node: ast.AST) -> List[str]:
+    if isinstance(node, ast.Name):
+        return [node.id]
+    if isinstance(node, ast.arg):
+        return [node.arg]
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return [node.name]
+    return []
+
+def _preorder(tree: ast.AST):
+    """Depth-first walk in source order, so an edit only disturbs nearby tokens"""
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(list(ast.iter_child_nodes(node))))
+
+def normalized_tokens(code: str, literals: bool = False) -> List[str]:
+    """
+    Token stream of the code's AST with user-chosen names canonicalized.
+
+    Variables, arguments, functions and classes are numbered in order of first
+    appearance, so renaming them does not change the stream. Builtins,
+    attribute names and imported modules are kept, since they say what the
+    code does. Constants are reduced to their type unless ``literals`` is
+    set. Code that does not parse falls back to plain word tokens.
+    """
+    try:
+        tree = CodeAnalyzer.parse(code)
+    except (SyntaxError, ValueError):
+        return [token.lower() for token in _FALLBACK_TOKEN.findall(code)]
+
+    names = {}
+    tokens = []
+    for node in _preorder(tree):
+        tokens.append(type(node).__name__)
+        for name in _bound_names(node):
+            tokens.append(name if name in _BUILTINS else names.setdefault(name, f"v{len(names)}"))
+        if isinstance(node, ast.Attribute):
+            tokens.append(node.attr)
+        elif isinstance(node, ast.alias):
+            tokens.append(node.name)
+        elif isinstance(node, ast.Constant):
+            tokens.append(repr(node.value) if literals else type(node.value).__name__)
+    return tokens
+
+def exact_fingerprint(code: str) -> str:
+    """
+    Hash of the code up to formatting, comments and renamed variables.
+
+    Unlike the MinHash signature it covers literal values, so code that only
+    differs in a timeout, URL or query gets a different fingerprint.
+    """
+    return hashlib.sha256('\x00'.join(normalized_tokens(code, literals=True)).encode('utf-8')).hexdigest()
+
+def interface_names(code: str) -> FrozenSet[str]:
+    """Names a reader of the documentation sees: defined functions/classes and their arguments"""
+    try:
+        tree = CodeAnalyzer.parse(code)
+    except (SyntaxError, ValueError):
+        return frozenset()
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.arg)):
+            names.update(_bound_names(node))
+    return frozenset(names)
+
+def _shingles(tokens: List[str]) -> Set[int]:
+    return {
+        int.from_bytes(hashlib.blake2b(' '.join(tokens[i:i + SHINGLE_SIZE]).encode('utf-8'),
+                                       digest_size=8).digest(), 'little')
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    }
+
+def signature(code: str) -> Optional[Tuple[int, ...]]:
+    """MinHash signature of the code, or None for snippets too short to compare"""
+    shingles = _shingles(normalized_tokens(code))
+    if not shingles:
+        return None
+    return tuple(
+        min((a * shingle + b) % _PRIME for shingle in shingles) & _MASK
+        for a, b in _PERMUTATIONS
+    )
+
+def band_keys(sig: Tuple[int, ...], owner: str) -> List[int]:
+    """
+    One LSH bucket key per band (signed 64-bit, to fit an SQLite INTEGER).
+
+    The owner is hashed into every key, so each user's entries fall into
+    their own buckets and lookups never see other users' code.
+    """
+    prefix = owner.encode('utf-8') + b'\x00'
+    keys = []
+    for band in range(BANDS):
+        values = struct.pack(f'<B{ROWS}I', band, *sig[band * ROWS:(band + 1) * ROWS])
+        keys.append(int.from_bytes(hashlib.blake2b(prefix + values, digest_size=8).digest(), 'little', signed=True))
+    return keys
+
+def estimate_similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+class SimilarityIndex:
+    """
+    MinHash/LSH index stored next to the history entries it describes.
+
+    ``add`` runs inside the caller's write transaction; lookups touch at most
+    BANDS indexed buckets plus the signatures of their candidates, so they do
+    not slow down as the history grows. Buckets are kept per owner.
+    """
+
+    @staticmethod
+    def create_tables(conn: sqlite3.Connection):
+        conn.execute(
+            '''CREATE TABLE IF NOT EXISTS similarity_signatures
+               (entry_id INTEGER PRIMARY KEY,
+                signature BLOB)'''
+        )
+        conn.execute(
+            '''CREATE TABLE IF NOT EXISTS similarity_buckets
+               (bucket INTEGER,
+                entry_id INTEGER,
+                PRIMARY KEY (bucket, entry_id)) WITHOUT ROWID'''
+        )
+
+    @staticmethod
+    def add(conn: sqlite3.Connection, entry_id: int, sig: Optional[Tuple[int, ...]], owner: str):
+        """Index an entry; entries without a signature are recorded so backfills skip them"""
+        conn.execute(
+            'INSERT OR REPLACE INTO similarity_signatures (entry_id, signature) VALUES (?, ?)',
+            (entry_id, struct.pack(_SIGNATURE_FORMAT, *sig) if sig is not None else None)
+        )
+        if sig is not None:
+            conn.executemany(
+                'INSERT OR IGNORE INTO similarity_buckets (bucket, entry_id) VALUES (?, ?)',
+                [(key, entry_id) for key in band_keys(sig, owner)]
+            )
+
+    @staticmethod
+    def lookup(conn: sqlite3.Connection, sig: Tuple[int, ...], owner: str, min_similarity: float,
+               limit: int = 5) -> List[Tuple[int, float]]:
+        """Return up to ``limit`` of the owner's (entry_id, similarity) pairs above ``min_similarity``, best first"""
+        candidates = set()
+        for key in band_keys(sig, owner):
+            candidates.update(row[0] for row in conn.execute(
+                'SELECT entry_id FROM similarity_buckets WHERE bucket=? LIMIT ?',
+                (key, MAX_BUCKET_CANDIDATES)
+            ))
+        if not candidates:
+            return []
+        placeholders = ', '.join('?' for _ in candidates)
+        rows = conn.execute(
+            f'SELECT entry_id, signature FROM similarity_signatures WHERE entry_id IN ({placeholders})',
+            list(candidates)
+        ).fetchall()
+        scored = [
+            (entry_id, estimate_similarity(sig, struct.unpack(_SIGNATURE_FORMAT, stored)))
+            for entry_id, stored in rows if stored is not None
+        ]
+        scored = [pair for pair in scored if pair[1] >= min_similarity]
+        # Prefer the most recent entry among equally similar ones
+        scored.sort(key=lambda pair: (-pair[1], -pair[0]))
+        return scored[:limit]
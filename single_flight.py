@@ -0,0 +1,69 @@
+# single_flight.py
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls that share a key.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for the same result (or exception) instead of
+    starting their own call. Once the call finishes the key is released, so
+    later callers run it again (combine with a cache to reuse results).
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, key: str) -> Tuple[Future, bool]:
+        """
+        Join the in-flight call for ``key`` or register a new one.
+
+        Returns the shared future and whether the caller is the leader. The
+        leader must call ``finish`` exactly once; followers wait on the future.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = Future()
+            self._in_flight[key] = future
+            self.calls += 1
+            return future, True
+
+    def finish(self, key: str, result: Any = None, error: Optional[BaseException] = None):
+        """Publish the leader's result (or error) to all followers and release the key"""
+        with self._lock:
+            future = self._in_flight.pop(key)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        future, leader = self.begin(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, error=e)
+            raise
+        self.finish(key, result)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._in_flight)
+            }
+
+# Shared by every Streamlit session in the process
+documentation_flights = SingleFlight()
@@ -0,0 +1,644 @@
+# site_builder.py
+import argparse
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import re
+import time
+from dataclasses import dataclass, field
+from html import escape
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from markdown_renderer import (CodeBlock, Heading, ListBlock, Paragraph, Quote, Rule, Span, Table,
+                               iter_blocks, plain_text)
+
+logger = logging.getLogger(__name__)
+
+# Bump when the page markup changes so existing sites are rebuilt in full
+SITE_VERSION = "2"
+
+MANIFEST_FILE = '.site_manifest.json'
+# Pages live in their own directory so no page id can collide with the files
+# at the site root
+PAGES_DIR = 'pages'
+INDEX_PAGE = 'index.html'
+SEARCH_PAGE = 'search.html'
+SEARCH_INDEX_FILE = 'search_index.js'
+
+# Headings with these names are document sections, not symbols worth linking to
+SECTION_WORDS = frozenset("""
+    overview summary description introduction usage example examples notes note parameters params
+    arguments args returns return yields raises exceptions attributes methods functions classes
+    dependencies relationships source details see also conclusion
+""".split())
+
+_SYMBOL_HEADING = re.compile(r'^(?:async\s+def\s+|def\s+|class\s+)?([A-Za-z_][\w.]*)\s*(?:\(.*\))?:?\s*$')
+_SYMBOL_REFERENCE = re.compile(r'^([A-Za-z_][\w.]*)(?:\(.*\))?$')
+_WORD = re.compile(r'\w+')
+_WORD_PART = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+_SLUG = re.compile(r'[^a-z0-9]+')
+_PLACEHOLDER = re.compile('\x00(\\d+)\x00')
+
+MAX_TERM_LENGTH = 40
+
+
+@dataclass
+class SitePage:
+    """
+    One page of the site.
+
+    ``source_hash`` identifies the page's content; ``load`` returns its
+    Markdown and is only called when the page has to be rendered.
+    """
+    page_id: str
+    title: str
+    source_hash: str
+    load: Callable[[], str]
+    aliases: Tuple[str, ...] = ()
+
+    @property
+    def url(self) -> str:
+        return f"{PAGES_DIR}/{self.page_id}.html"
+
+
+@dataclass
+class SiteBuildReport:
+    pages_total: int = 0
+    rendered: int = 0
+    relinked: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def pages_per_second(self) -> float:
+        return (self.rendered + self.relinked) / self.elapsed if self.elapsed else 0.0
+
+
+def heading_anchor(text: str, used: Dict[str, int]) -> str:
+    """HTML id for a heading, made unique within the page"""
+    slug = _SLUG.sub('-', text.lower()).strip('-') or 'section'
+    count = used.get(slug, 0)
+    used[slug] = count + 1
+    return slug if count == 0 else f"{slug}-{count + 1}"
+
+
+def heading_symbol(text: str) -> Optional[str]:
+    """Name a heading documents, e.g. 'parse_config' for '`parse_config(path)`'"""
+    match = _SYMBOL_HEADING.match(text.strip())
+    if match is None or match.group(1).lower() in SECTION_WORDS:
+        return None
+    return match.group(1)
+
+
+def search_terms(text: str) -> List[str]:
+    """Lowercased words of ``text`` plus the snake_case/camelCase parts of identifiers"""
+    terms = set()
+    for word in _WORD.findall(text):
+        terms.add(word.lower())
+        if '_' in word or not word.islower():
+            terms.update(part.lower() for part in _WORD_PART.findall(word))
+    return sorted(term for term in terms if 1 < len(term) <= MAX_TERM_LENGTH and not term.isdigit())
+
+
+class PageRenderer:
+    """
+    Render one page's Markdown to an HTML fragment.
+
+    Inline code that may name a symbol documented elsewhere is emitted as a
+    placeholder, because the symbol table is only complete once every changed
+    page has been rendered; ``link`` fills the placeholders in afterwards.
+    """
+
+    def __init__(self):
+        self.anchors: Dict[str, int] = {}
+        self.symbols: Dict[str, str] = {}
+        self.references: List[Tuple[str, str]] = []
+
+    def spans(self, spans: List[Span], linkable: bool = True) -> str:
+        parts = []
+        for span in spans:
+            text = escape(span.text, quote=False)
+            if span.code:
+                text = f"<code>{text}</code>"
+                reference = _SYMBOL_REFERENCE.match(span.text) if linkable else None
+                if reference:
+                    self.references.append((reference.group(1), text))
+                    text = f"\x00{len(self.references) - 1}\x00"
+            if span.italic:
+                text = f"<em>{text}</em>"
+            if span.bold:
+                text = f"<strong>{text}</strong>"
+            parts.append(text)
+        return ''.join(parts)
+
+    def heading(self, block: Heading) -> str:
+        text = plain_text(block.spans)
+        anchor = heading_anchor(text, self.anchors)
+        symbol = heading_symbol(text)
+        if symbol:
+            self.symbols.setdefault(symbol, anchor)
+        level = block.level
+        return f'<h{level} id="{anchor}">{self.spans(block.spans, linkable=False)}</h{level}>'
+
+    def list_block(self, block: ListBlock) -> str:
+        parts = []
+        # Tags of the lists currently open, innermost last
+        open_lists: List[str] = []
+        for item in block.items:
+            tag = 'ol' if item.ordered else 'ul'
+            depth = item.level + 1
+            while len(open_lists) > depth:
+                parts.append(f"</li></{open_lists.pop()}>")
+            if len(open_lists) == depth:
+                if open_lists[-1] != tag:
+                    parts.append(f"</li></{open_lists.pop()}><{tag}>")
+                    open_lists.append(tag)
+                else:
+                    parts.append("</li>")
+            while len(open_lists) < depth:
+                parts.append(f"<{tag}>")
+                open_lists.append(tag)
+            parts.append(f"<li>{self.spans(item.spans)}")
+        while open_lists:
+            parts.append(f"</li></{open_lists.pop()}>")
+        return ''.join(parts)
+
+    def table(self, block: Table) -> str:
+        header = ''.join(f"<th>{self.spans(cell)}</th>" for cell in block.header)
+        rows = ''.join(
+            "<tr>" + ''.join(f"<td>{self.spans(cell)}</td>" for cell in row) + "</tr>"
+            for row in block.rows
+        )
+        return f"<table><thead><tr>{header}</tr></thead><tbody>{rows}</tbody></table>"
+
+    def render(self, markdown: str) -> str:
+        parts = []
+        # NUL marks reference placeholders, so it must not come from the source
+        for block in iter_blocks(markdown.replace('\x00', '')):
+            if isinstance(block, Heading):
+                parts.append(self.heading(block))
+            elif isinstance(block, Paragraph):
+                parts.append(f"<p>{self.spans(block.spans)}</p>")
+            elif isinstance(block, CodeBlock):
+                language = f' class="language-{escape(block.language)}"' if block.language else ''
+                parts.append(f"<pre><code{language}>{escape(block.text, quote=False)}</code></pre>")
+            elif isinstance(block, ListBlock):
+                parts.append(self.list_block(block))
+            elif isinstance(block, Table):
+                parts.append(self.table(block))
+            elif isinstance(block, Quote):
+                parts.append(f"<blockquote><p>{self.spans(block.spans)}</p></blockquote>")
+            elif isinstance(block, Rule):
+                parts.append("<hr>")
+        return '\n'.join(parts)
+
+
+def link(fragment: str, references: List[Tuple[str, str]], page_url: str,
+         resolve: Callable[[str], Optional[str]]) -> Tuple[str, Dict[str, Optional[str]]]:
+    """
+    Fill in the reference placeholders of a rendered fragment.
+
+    Returns:
+        tuple: (HTML, {referenced name: site-relative target or None})
+    """
+    resolved: Dict[str, Optional[str]] = {}
+    directory = posixpath.dirname(page_url)
+    for name, _ in references:
+        if name not in resolved:
+            resolved[name] = resolve(name)
+
+    def replace(match):
+        name, html = references[int(match.group(1))]
+        target = resolved[name]
+        if target is None:
+            return html
+        path, _, anchor = target.partition('#')
+        href = '' if path == page_url else posixpath.relpath(path, directory or '.')
+        if anchor:
+            href += f"#{anchor}"
+        return f'<a href="{escape(href or "#")}">{html}</a>'
+
+    return _PLACEHOLDER.sub(replace, fragment), resolved
+
+
+STYLE_CSS = """\
+body { margin: 0; font: 16px/1.5 -apple-system, "Segoe UI", Roboto, Arial, sans-serif; color: #1f2328; }
+header { display: flex; gap: 1em; align-items: center; padding: .6em 1.5em; background: #f6f8fa;
+         border-bottom: 1px solid #d0d7de; }
+header a { font-weight: 600; color: inherit; text-decoration: none; }
+header form { margin-left: auto; }
+header input { padding: .3em .6em; width: 16em; }
+main { max-width: 60em; padding: 1em 1.5em 3em; }
+code { font: 85% "Courier New", monospace; background: #f6f8fa; padding: .1em .3em; border-radius: 4px; }
+pre { background: #f6f8fa; padding: 1em; overflow-x: auto; border-radius: 6px; }
+pre code { padding: 0; background: none; }
+table { border-collapse: collapse; margin: 1em 0; }
+th, td { border: 1px solid #d0d7de; padding: .3em .7em; text-align: left; vertical-align: top; }
+blockquote { margin: 1em 0; padding: 0 1em; color: #59636e; border-left: 4px solid #d0d7de; }
+a code { color: #0969da; }
+#search-results li { margin: .4em 0; }
+#search-results small { color: #59636e; }
+"""
+
+# Loaded by search.html after search_index.js has set window.SEARCH_INDEX:
+# {"pages": [[url, title], ...], "terms": [sorted terms], "postings": [[page, ...], ...]}
+SEARCH_JS = """\
+(function () {
+  var index = window.SEARCH_INDEX;
+  var input = document.getElementById('search-query');
+  var list = document.getElementById('search-results');
+
+  function firstAtLeast(word) {
+    var low = 0, high = index.terms.length;
+    while (low < high) {
+      var middle = (low + high) >> 1;
+      if (index.terms[middle] < word) { low = middle + 1; } else { high = middle; }
+    }
+    return low;
+  }
+
+  // Pages containing a term that starts with ``word``; exact matches score higher
+  function matches(word) {
+    var found = {};
+    for (var i = firstAtLeast(word); i < index.terms.length && index.terms[i].lastIndexOf(word, 0) === 0; i++) {
+      var score = index.terms[i] === word ? 2 : 1;
+      index.postings[i].forEach(function (page) { found[page] = Math.max(found[page] || 0, score); });
+    }
+    return found;
+  }
+
+  function search(text) {
+    var words = text.toLowerCase().match(/\\w+/g) || [];
+    var scores = null;
+    words.forEach(function (word) {
+      var found = matches(word), next = {};
+      Object.keys(found).forEach(function (page) {
+        if (scores === null || page in scores) {
+          var title = index.pages[page][1].toLowerCase();
+          next[page] = (scores ? scores[page] : 0) + found[page] + (title.indexOf(word) >= 0 ? 3 : 0);
+        }
+      });
+      scores = next;
+    });
+    return Object.keys(scores || {}).sort(function (a, b) {
+      return scores[b] - scores[a] || (index.pages[a][1] < index.pages[b][1] ? -1 : 1);
+    }).slice(0, 50);
+  }
+
+  function show(text) {
+    list.innerHTML = '';
+    search(text).forEach(function (page) {
+      var item = document.createElement('li'), anchor = document.createElement('a'), url = document.createElement('small');
+      anchor.href = index.pages[page][0];
+      anchor.textContent = index.pages[page][1];
+      url.textContent = ' ' + index.pages[page][0];
+      item.appendChild(anchor);
+      item.appendChild(url);
+      list.appendChild(item);
+    });
+    if (text.trim() && !list.children.length) { list.innerHTML = '<li>No matching pages</li>'; }
+  }
+
+  input.value = new URLSearchParams(window.location.search).get('q') || '';
+  input.addEventListener('input', function () { show(input.value); });
+  show(input.value);
+})();
+"""
+
+
+class SiteBuilder:
+    """
+    Build a cross-linked static HTML site from stored documentation.
+
+    A manifest in the output directory records, for every page, the hash of
+    its source, the symbols it defines, its search terms and where each of
+    its symbol references pointed. A rebuild renders only pages whose source
+    hash changed, plus unchanged pages one of whose references now resolves
+    to a different target (a symbol was added, moved or removed elsewhere).
+    The index page and the search index are regenerated from the manifest
+    without reading any page sources.
+    """
+
+    def __init__(self, output_dir: str = 'site', title: str = 'Code Documentation'):
+        self.output_dir = output_dir
+        self.title = title
+        self.manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+
+    def load_manifest(self) -> Dict[str, Dict]:
+        """
+        Return the pages recorded by the previous build, or {} if it used other
+        settings; pages written by an older site version are deleted, since
+        their paths may no longer be in use
+        """
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('version') != SITE_VERSION:
+            for record in manifest.get('pages', {}).values():
+                try:
+                    os.remove(os.path.join(self.output_dir, *record['url'].split('/')))
+                except (OSError, KeyError, TypeError):
+                    pass
+            return {}
+        if manifest.get('title') != self.title:
+            return {}
+        return manifest.get('pages', {})
+
+    def save_manifest(self, pages: Dict[str, Dict]):
+        temp_path = self.manifest_path + '.tmp'
+        # json.dumps uses the C encoder; json.dump to a file does not
+        data = json.dumps({'version': SITE_VERSION, 'title': self.title, 'pages': pages}, separators=(',', ':'))
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(temp_path, self.manifest_path)
+
+    def _write(self, rel_path: str, content: str, only_if_changed: bool = False):
+        path = os.path.join(self.output_dir, *rel_path.split('/'))
+        if only_if_changed and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                if f.read() == content:
+                    return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+    def _remove(self, rel_path: str):
+        try:
+            os.remove(os.path.join(self.output_dir, *rel_path.split('/')))
+        except OSError:
+            pass
+
+    def page_html(self, url: str, title: str, body: str) -> str:
+        root = '../' * url.count('/')
+        return (
+            '<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+            '<meta name="viewport" content="width=device-width, initial-scale=1">\n'
+            f'<title>{escape(title)} · {escape(self.title)}</title>\n'
+            f'<link rel="stylesheet" href="{root}style.css">\n</head>\n<body>\n'
+            f'<header><a href="{root}{INDEX_PAGE}">{escape(self.title)}</a>'
+            f'<form action="{root}{SEARCH_PAGE}"><input type="search" name="q" placeholder="Search"></form>'
+            f'</header>\n<main>\n{body}\n</main>\n</body>\n</html>\n'
+        )
+
+    def write_index(self, pages: Dict[str, Dict]):
+        lines = [f"<h1>{escape(self.title)}</h1>", f"<p>{len(pages)} pages</p>"]
+        directory = None
+        for page_id in sorted(pages):
+            page_directory = posixpath.dirname(page_id)
+            if page_directory != directory:
+                if directory is not None:
+                    lines.append("</ul>")
+                directory = page_directory
+                if directory:
+                    lines.append(f"<h2>{escape(directory)}</h2>")
+                lines.append("<ul>")
+            lines.append(f'<li><a href="{escape(pages[page_id]["url"])}">{escape(pages[page_id]["title"])}</a></li>')
+        if directory is not None:
+            lines.append("</ul>")
+        self._write(INDEX_PAGE, self.page_html(INDEX_PAGE, 'Index', '\n'.join(lines)))
+
+    def write_search_index(self, pages: Dict[str, Dict]):
+        page_ids = sorted(pages)
+        postings: Dict[str, List[int]] = {}
+        for number, page_id in enumerate(page_ids):
+            for term in pages[page_id]['terms']:
+                postings.setdefault(term, []).append(number)
+        terms = sorted(postings)
+        index = {
+            'pages': [[pages[page_id]['url'], pages[page_id]['title']] for page_id in page_ids],
+            'terms': terms,
+            'postings': [postings[term] for term in terms]
+        }
+        # A script rather than JSON so search works when the site is opened from disk
+        self._write(SEARCH_INDEX_FILE,
+                    'window.SEARCH_INDEX = ' + json.dumps(index, separators=(',', ':')) + ';\n')
+
+    def write_assets(self):
+        search_body = (
+            '<h1>Search</h1>\n'
+            '<input id="search-query" type="search" placeholder="Function, class or any word" autofocus>\n'
+            '<ul id="search-results"></ul>\n'
+            f'<script src="{SEARCH_INDEX_FILE}"></script>\n<script src="search.js"></script>'
+        )
+        self._write('style.css', STYLE_CSS, only_if_changed=True)
+        self._write('search.js', SEARCH_JS, only_if_changed=True)
+        self._write(SEARCH_PAGE, self.page_html(SEARCH_PAGE, 'Search', search_body), only_if_changed=True)
+
+    def build(self, pages: Iterable[SitePage],
+              progress_callback: Optional[Callable[[int, int], None]] = None) -> SiteBuildReport:
+        """
+        Bring the site in ``output_dir`` up to date with ``pages``.
+
+        Args:
+            pages (iterable): Every page of the site; pages missing from it are deleted
+            progress_callback (callable, optional): Called with (done, total) as
+                pages are rendered
+
+        Returns:
+            SiteBuildReport: Counts of rendered, relinked, unchanged and removed pages
+        """
+        start = time.perf_counter()
+        report = SiteBuildReport()
+        os.makedirs(self.output_dir, exist_ok=True)
+        previous = self.load_manifest()
+        sources = {page.page_id: page for page in pages}
+        report.pages_total = len(sources)
+
+        manifest: Dict[str, Dict] = {}
+        stale = []
+        for page_id, page in sources.items():
+            record = previous.get(page_id)
+            if (record is not None and record['hash'] == page.source_hash and record['title'] == page.title
+                    and os.path.exists(os.path.join(self.output_dir, *page.url.split('/')))):
+                manifest[page_id] = record
+            else:
+                stale.append(page)
+
+        # Render changed pages; links are filled in once all their symbols are known
+        rendered: Dict[str, Tuple[str, List[Tuple[str, str]]]] = {}
+
+        def render(page: SitePage) -> bool:
+            try:
+                markdown = page.load()
+                renderer = PageRenderer()
+                fragment = renderer.render(markdown)
+            except Exception as e:
+                report.failed += 1
+                report.errors[page.page_id] = str(e)
+                logger.error(f"Error rendering site page {page.page_id}: {str(e)}")
+                # Drop the page rather than serve its previous version; leaving it
+                # out of the manifest makes the next build try it again
+                manifest.pop(page.page_id, None)
+                self._remove(page.url)
+                return False
+            symbols = {alias: '' for alias in page.aliases}
+            symbols.update(renderer.symbols)
+            manifest[page.page_id] = {
+                'hash': page.source_hash,
+                'title': page.title,
+                'url': page.url,
+                'symbols': symbols,
+                'terms': search_terms(page.title + '\n' + markdown),
+                'refs': {}
+            }
+            rendered[page.page_id] = (fragment, renderer.references)
+            return True
+
+        done = 0
+        total = len(stale)
+        if progress_callback:
+            progress_callback(done, total)
+        for page in stale:
+            if render(page):
+                report.rendered += 1
+            done += 1
+            if progress_callback:
+                progress_callback(done, total)
+
+        # A name defined on several pages links to the first of them by page id
+        symbol_table: Dict[str, str] = {}
+        for page_id in sorted(manifest):
+            record = manifest[page_id]
+            for name, anchor in record['symbols'].items():
+                symbol_table.setdefault(name, f"{record['url']}#{anchor}")
+
+        def resolver(record: Dict) -> Callable[[str], Optional[str]]:
+            def resolve(name: str) -> Optional[str]:
+                # Prefer the page's own definition, then the full name, then its last part
+                for candidate in (name, name.rsplit('.', 1)[-1]):
+                    if candidate in record['symbols']:
+                        return f"{record['url']}#{record['symbols'][candidate]}"
+                    if candidate in symbol_table:
+                        return symbol_table[candidate]
+                return None
+            return resolve
+
+        for page_id, record in list(manifest.items()):
+            if page_id in rendered:
+                continue
+            resolve = resolver(record)
+            if any(resolve(name) != target for name, target in record['refs'].items()):
+                if render(sources[page_id]):
+                    report.relinked += 1
+            else:
+                report.unchanged += 1
+
+        for page_id, (fragment, references) in rendered.items():
+            record = manifest[page_id]
+            body, record['refs'] = link(fragment, references, record['url'], resolver(record))
+            self._write(record['url'], self.page_html(record['url'], record['title'], body))
+
+        for page_id in previous.keys() - sources.keys():
+            self._remove(previous[page_id]['url'])
+            report.removed += 1
+
+        changed = rendered or report.removed or report.failed
+        if changed or not os.path.exists(os.path.join(self.output_dir, INDEX_PAGE)):
+            self.write_index(manifest)
+            self.write_search_index(manifest)
+        self.write_assets()
+        if changed:
+            self.save_manifest(manifest)
+
+        report.elapsed = time.perf_counter() - start
+        logger.info(
+            f"Built site in {self.output_dir}: {report.rendered} rendered, {report.relinked} relinked, "
+            f"{report.unchanged} unchanged, {report.removed} removed, {report.failed} failed "
+            f"in {report.elapsed:.2f}s"
+        )
+        return report
+
+
+def _read_text(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def batch_pages(docs_dir: str) -> List[SitePage]:
+    """
+    Pages for the Markdown written by BatchDocumenter, one per module.
+
+    Modules are also linkable by their dotted name, e.g. ``pkg.module``.
+    """
+    from batch_documenter import INDEX_FILE
+
+    pages = []
+    for dirpath, dirnames, filenames in os.walk(docs_dir):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        for filename in sorted(filenames):
+            if not filename.endswith('.md') or (dirpath == docs_dir and filename == INDEX_FILE):
+                continue
+            path = os.path.join(dirpath, filename)
+            with open(path, 'rb') as f:
+                raw = f.read()
+            page_id = os.path.relpath(path, docs_dir)[:-3].replace(os.sep, '/')
+            # BatchDocumenter starts every file with "# <module path>"
+            first_line = raw.split(b'\n', 1)[0].decode('utf-8', errors='replace')
+            title = first_line[2:].strip() if first_line.startswith('# ') else page_id
+            module = page_id.replace('/', '.')
+            pages.append(SitePage(
+                page_id=page_id,
+                title=title,
+                source_hash=hashlib.sha256(raw).hexdigest(),
+                load=lambda path=path: _read_text(path),
+                aliases=(module,) if '.' in module else ()
+            ))
+    return pages
+
+
+def history_pages(history_manager, username: str, since: Optional[str] = None,
+                  until: Optional[str] = None) -> List[SitePage]:
+    """Pages for a user's documentation history, one per entry; bodies are read only when rendered"""
+    from history_export import entry_basename, entry_document
+
+    def loader(entry: Dict) -> Callable[[], str]:
+        def load() -> str:
+            bodies = history_manager.blobs.get_many([entry['code_hash'], entry['documentation_hash']])
+            return entry_document(dict(entry, code=bodies.get(entry['code_hash'], ''),
+                                       documentation=bodies.get(entry['documentation_hash'], '')))
+        return load
+
+    pages = []
+    for entry in history_manager.iter_entries(username, since, until, batch_size=1000, include_bodies=False):
+        material = '\x00'.join((entry['created_at'], entry['code_hash'], entry['documentation_hash']))
+        pages.append(SitePage(
+            page_id=entry_basename(entry),
+            title=entry['title'],
+            source_hash=hashlib.sha256(material.encode('utf-8')).hexdigest(),
+            load=loader(entry)
+        ))
+    return pages
+
+
+if __name__ == "__main__":
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--output', default='site', help="Site directory")
+    common.add_argument('--title', default='Code Documentation', help="Site title")
+    parser = argparse.ArgumentParser(description="Build a static HTML site from stored documentation")
+    subparsers = parser.add_subparsers(dest='source', required=True)
+    batch_parser = subparsers.add_parser('batch', parents=[common], help="Markdown written by batch_documenter")
+    batch_parser.add_argument('docs_dir', help="Batch output directory")
+    history_parser = subparsers.add_parser('history', parents=[common], help="A user's documentation history")
+    history_parser.add_argument('username', help="User whose history is published")
+    history_parser.add_argument('--db', default='documentation_history.db', help="History database")
+    history_parser.add_argument('--since', default=None, help="Earliest creation date to include")
+    history_parser.add_argument('--until', default=None, help="Creation date to stop before")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.source == 'batch':
+        site_pages = batch_pages(args.docs_dir)
+    else:
+        from history_manager import HistoryManager
+        site_pages = history_pages(HistoryManager(args.db), args.username, args.since, args.until)
+    result = SiteBuilder(args.output, title=args.title).build(site_pages)
+    print(f"{result.pages_total} pages: {result.rendered} rendered, {result.relinked} relinked, "
+          f"{result.unchanged} unchanged, {result.removed} removed, {result.failed} failed "
+          f"in {result.elapsed:.2f}s")
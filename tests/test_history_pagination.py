@@ -0,0 +1,45 @@
+# test_history_pagination.py
+from history_manager import HistoryManager
+
+
+def all_pages(history, username, limit):
+    pages, cursor = [], None
+    while True:
+        entries, cursor = history.get_history_page(username, limit=limit, before=cursor)
+        pages.append([entry['id'] for entry in entries])
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_history_newest_first(tmp_path):
+    history = HistoryManager(str(tmp_path / 'history.db'))
+    ids = [history.add_entry('alice', f"def f{n}():\n    return {n}\n", f"Doc {n}") for n in range(23)]
+    history.add_entry('bob', "def other():\n    pass\n", "Not alice's")
+
+    pages = all_pages(history, 'alice', limit=10)
+    assert [len(page) for page in pages] == [10, 10, 3]
+    assert [entry_id for page in pages for entry_id in page] == ids[::-1]
+
+    entries, cursor = history.get_history_page('alice', limit=1)
+    assert entries[0]['title'] == 'def f22()'
+    assert entries[0]['size'] > 0 and 'code' not in entries[0]
+
+
+def test_entries_sharing_a_timestamp_are_not_skipped(tmp_path):
+    history = HistoryManager(str(tmp_path / 'history.db'))
+    ids = [history.add_entry('alice', f"x = {n}\n", f"Doc {n}") for n in range(7)]
+    # Entries created in the same instant are ordered by id
+    history.db.write(lambda conn: conn.execute(
+        "UPDATE documentation_history SET created_at='2025-01-01 00:00:00'"))
+
+    pages = all_pages(history, 'alice', limit=3)
+    assert [entry_id for page in pages for entry_id in page] == ids[::-1]
+
+
+def test_exact_page_boundary_has_no_empty_trailing_page(tmp_path):
+    history = HistoryManager(str(tmp_path / 'history.db'))
+    for n in range(4):
+        history.add_entry('alice', f"x = {n}\n", f"Doc {n}")
+
+    assert [len(page) for page in all_pages(history, 'alice', limit=2)] == [2, 2]
+    assert history.get_history_page('nobody') == ([], None)
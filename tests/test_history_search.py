@@ -0,0 +1,35 @@
+# test_history_search.py
+from history_manager import HistoryManager
+
+
+def test_search_returns_only_the_users_entries(tmp_path):
+    history = HistoryManager(str(tmp_path / 'history.db'))
+    mine = history.add_entry('alice', "def parse_config(path):\n    return open(path).read()\n",
+                             "Reads the configuration file.")
+    # Many better-ranked matches of another user must not crowd out the user's own
+    for n in range(30):
+        history.add_entry('bob', f"def parse_config_{n}(path):\n    return path\n",
+                          "parse_config parse_config configuration")
+
+    results = history.search('alice', 'parse_config', limit=5)
+    assert [result['id'] for result in results] == [mine]
+    assert '**parse_config**' in results[0]['snippet']
+    assert len(history.search('bob', 'parse_config', limit=5)) == 5
+
+
+def test_search_does_not_match_across_similar_usernames(tmp_path):
+    history = HistoryManager(str(tmp_path / 'history.db'))
+    history.add_entry('al', "def load_settings():\n    pass\n", "Loads settings.")
+    entry = history.add_entry('alice', "def save_settings():\n    pass\n", "Saves settings.")
+
+    assert [result['id'] for result in history.search('alice', 'settings')] == [entry]
+    assert [result['id'] for result in history.search('alice', 'load')] == []
+    assert history.search('mallory', 'settings') == []
+
+
+def test_query_syntax_is_not_interpreted(tmp_path):
+    history = HistoryManager(str(tmp_path / 'history.db'))
+    history.add_entry('alice', "def run():\n    pass\n", "Runs it.")
+
+    for query in ('"', 'run OR username', 'NEAR(run', '*', 'run)'):
+        assert isinstance(history.search('alice', query), list)
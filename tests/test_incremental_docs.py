@@ -0,0 +1,89 @@
+# tests/test_incremental_docs.py
+import re
+
+import pytest
+
+from doc_cache import DocumentationCache
+from document_generator import DocumentGenerator
+from history_manager import HistoryManager
+from incremental_docs import IncrementalDocumenter, split_sections
+from llm_backends import LLMBackend
+
+SOURCE = '''
+def load(path):
+    """Read the file"""
+    with open(path) as f:
+        return f.read()
+
+
+def save(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+'''
+
+
+class ScriptedBackend(LLMBackend):
+    """Answers every requested ``## name`` heading, and records the prompts it was sent"""
+    name = 'scripted'
+
+    def __init__(self):
+        super().__init__('scripted-1')
+        self.prompts = []
+
+    def _complete(self, prompt, temperature, max_tokens):
+        self.prompts.append(prompt)
+        headings = re.findall(r'^## (.+)$', prompt, re.MULTILINE)
+        if headings:
+            return "Overview.\n\n" + "\n\n".join(f"## {name}\n\nAbout {name}." for name in headings)
+        return f"Documentation {len(self.prompts)}."
+
+
+@pytest.fixture
+def documenter(tmp_path):
+    history = HistoryManager(str(tmp_path / 'history.db'))
+    generator = DocumentGenerator(ScriptedBackend(), cache=DocumentationCache(str(tmp_path / 'cache.db')))
+    return IncrementalDocumenter(generator, history), history
+
+
+def run(documenter, history, code):
+    result = documenter.document('alice', code, {})
+    history.add_entry('alice', code, result.documentation, sections=result.sections)
+    return result
+
+
+def test_first_run_is_a_single_request(documenter):
+    documenter, history = documenter
+    result = run(documenter, history, SOURCE)
+    assert len(documenter.doc_generator.backend.prompts) == 1
+    assert result.regenerated == ['load', 'save']
+    assert "About load." in result.documentation and "About save." in result.documentation
+
+
+def test_body_edit_regenerates_only_that_symbol(documenter):
+    documenter, history = documenter
+    run(documenter, history, SOURCE)
+    prompts = documenter.doc_generator.backend.prompts
+    prompts.clear()
+
+    result = run(documenter, history, SOURCE.replace('f.write(text)', 'f.write(text.strip())'))
+    assert result.regenerated == ['save'] and result.reused == ['load']
+    # The interface is unchanged, so the overview is reused rather than regenerated
+    assert len(prompts) == 1
+    assert result.documentation.startswith("Overview.")
+
+
+def test_interface_change_regenerates_overview(documenter):
+    documenter, history = documenter
+    run(documenter, history, SOURCE)
+    prompts = documenter.doc_generator.backend.prompts
+    prompts.clear()
+
+    result = run(documenter, history, SOURCE.replace('def save(path, text)', 'def save(path, text, mode="w")'))
+    assert result.regenerated == ['save']
+    assert len(prompts) == 2
+    assert "overview" in prompts[-1].lower()
+
+
+def test_split_sections_requires_every_heading():
+    assert split_sections("Intro\n## a\nA\n### `b`\nB", ['a', 'b']) == ("Intro", ['A', 'B'])
+    assert split_sections("Intro\n## a\nA", ['a', 'b']) is None
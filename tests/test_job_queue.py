@@ -0,0 +1,67 @@
+# test_job_queue.py
+import threading
+import time
+
+import job_queue
+from job_queue import JobQueue
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_recover_leaves_jobs_of_a_live_queue_alone(tmp_path):
+    db_path = str(tmp_path / 'jobs.db')
+    release = threading.Event()
+    runs = []
+
+    def handler(payload, progress):
+        runs.append(payload['n'])
+        release.wait(5)
+        return payload['n']
+
+    first = JobQueue(db_path, max_workers=1)
+    first.register('work', handler)
+    job_id = first.submit('alice', 'work', {'n': 1})
+    assert _wait_for(lambda: first.get_job(job_id)['status'] == 'running')
+
+    second = JobQueue(db_path, max_workers=1)
+    second.register('work', handler)
+    assert second.recover() == 0
+
+    release.set()
+    assert _wait_for(lambda: first.get_job(job_id)['status'] == 'completed')
+    assert runs == [1]
+    first.shutdown()
+    second.shutdown()
+
+
+def test_recover_takes_over_jobs_of_a_stopped_queue(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'jobs.db')
+    gate = threading.Event()
+
+    first = JobQueue(db_path, max_workers=1)
+    first.register('work', lambda payload, progress: gate.wait(5))
+    job_id = first.submit('alice', 'work', {})
+    assert _wait_for(lambda: first.get_job(job_id)['status'] == 'running')
+    # Simulate the process exiting: its heartbeat goes stale
+    first._stopped.set()
+    with first._lock:
+        first.conn.execute('UPDATE job_owners SET heartbeat_at=? WHERE owner=?',
+                           (time.time() - 2 * job_queue.OWNER_TIMEOUT_SECONDS, first.owner))
+        first.conn.commit()
+
+    second = JobQueue(db_path, max_workers=1)
+    second.register('work', lambda payload, progress: 'again')
+    assert second.recover() == 1
+    assert _wait_for(lambda: second.get_job(job_id)['status'] == 'completed')
+    assert second.recover() == 0
+
+    gate.set()
+    first.shutdown()
+    second.shutdown()
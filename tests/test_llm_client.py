@@ -0,0 +1,110 @@
+# tests/test_llm_client.py
+import socket
+import time
+
+import pytest
+
+from benchmarks.stub_llm_server import serve_in_thread
+from llm_client import AsyncLLMClient, CircuitBreaker, CircuitOpenError, LLMError
+
+RESET_TIMEOUT = 0.2
+
+
+def unused_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/v1"
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**options):
+        server, url = serve_in_thread(**options)
+        servers.append(server)
+        return url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def client():
+    llm = AsyncLLMClient('stub', base_url=unused_url(), max_retries=0, backoff_base=0.01,
+                         breaker=CircuitBreaker(failure_threshold=1, reset_timeout=RESET_TIMEOUT))
+    yield llm
+    llm.close()
+
+
+def trip(llm: AsyncLLMClient):
+    """Open the breaker with a refused connection, then wait until it is half-open"""
+    with pytest.raises(LLMError):
+        llm.complete("hello")
+    assert llm.breaker.state == 'open'
+    with pytest.raises(CircuitOpenError):
+        llm.complete("hello")
+    time.sleep(RESET_TIMEOUT * 1.2)
+    assert llm.breaker.state == 'half-open'
+
+
+def wait_for_trial_release(breaker: CircuitBreaker, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while breaker._trial_in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not breaker._trial_in_flight
+
+
+def test_complete_returns_content(client, stub):
+    client.base_url = stub()
+    assert "Stub documentation" in client.complete("hello")
+    assert client.breaker.state == 'closed'
+
+
+def test_rate_limited_request_is_retried(client, stub):
+    client.base_url = stub(rate_limit_every=1)
+    client.max_retries = 2
+    with pytest.raises(LLMError, match="429"):
+        client.complete("hello")
+    # Throttling does not trip the breaker
+    assert client.breaker.state == 'closed'
+
+    client.base_url = stub(rate_limit_every=2)
+    client.complete("first")
+    assert "Stub documentation" in client.complete("second is throttled once, then retried")
+
+
+def test_half_open_success_closes_breaker(client, stub):
+    trip(client)
+    client.base_url = stub()
+    assert "Stub documentation" in client.complete("hello")
+    assert client.breaker.state == 'closed'
+
+
+def test_abandoned_trial_stream_does_not_wedge_breaker(client, stub):
+    trip(client)
+    client.base_url = stub(token_delay=0.05)
+    chunks = client.stream("hello")
+    assert next(chunks)
+    chunks.close()
+
+    wait_for_trial_release(client.breaker)
+    assert "Stub documentation" in client.complete("hello")
+    assert client.breaker.state == 'closed'
+
+
+def test_malformed_trial_stream_reopens_breaker(client, stub):
+    trip(client)
+    client.base_url = stub(malformed_stream=True)
+    with pytest.raises(LLMError, match="Malformed stream event"):
+        list(client.stream("hello"))
+    assert client.breaker.state == 'open'
+    assert not client.breaker._trial_in_flight
+
+    time.sleep(RESET_TIMEOUT * 1.2)
+    client.base_url = stub()
+    assert "Stub documentation" in client.complete("hello")
+    assert client.breaker.state == 'closed'
@@ -0,0 +1,64 @@
+# tests/test_similarity.py
+import pytest
+
+from doc_cache import DocumentationCache
+from document_generator import DocumentGenerator
+from history_manager import HistoryManager
+from llm_backends import FakeBackend
+
+ORIGINAL = '''
+def fetch_report(session, report_id):
+    """Download one report"""
+    url = "https://reports.example.com/v1/" + str(report_id)
+    response = session.get(url, timeout=30)
+    response.raise_for_status()
+    rows = [row for row in response.json()["rows"] if row["status"] == "final"]
+    return {"id": report_id, "rows": rows, "count": len(rows)}
+'''
+
+RENAMED = ORIGINAL.replace("url", "address").replace("rows = [row for row", "kept = [row for row") \
+    .replace('"rows": rows', '"rows": kept').replace("len(rows)", "len(kept)")
+
+NEW_TIMEOUT = ORIGINAL.replace("timeout=30", "timeout=300")
+
+
+@pytest.fixture
+def history(tmp_path):
+    return HistoryManager(str(tmp_path / 'history.db'))
+
+
+@pytest.fixture
+def generator(tmp_path, history):
+    return DocumentGenerator(FakeBackend(), cache=DocumentationCache(str(tmp_path / 'cache.db')),
+                             find_similar=history.find_similar)
+
+
+def document(generator, code, username):
+    requests = generator.backend.metrics.requests
+    documentation = generator.generate_documentation(code, {}, username)
+    return documentation, generator.backend.metrics.requests > requests
+
+
+def test_renamed_locals_reuse_documentation(history, generator):
+    history.add_entry('alice', ORIGINAL, "Stored documentation")
+    documentation, called = document(generator, RENAMED, 'alice')
+    assert documentation == "Stored documentation"
+    assert not called
+    assert generator.similarity_stats['reused'] == 1
+
+
+def test_changed_literal_is_not_reused(history, generator):
+    history.add_entry('alice', ORIGINAL, "Stored documentation, 30 second timeout")
+    assert history.find_similar('alice', NEW_TIMEOUT).similarity >= 0.9
+    documentation, called = document(generator, NEW_TIMEOUT, 'alice')
+    assert called
+    assert documentation != "Stored documentation, 30 second timeout"
+    assert generator.similarity_stats == {'reused': 0, 'referenced': 1}
+
+
+def test_other_users_entries_are_never_matched(history, generator):
+    history.add_entry('alice', ORIGINAL, "Alice's documentation")
+    assert history.find_similar('bob', ORIGINAL) is None
+    documentation, called = document(generator, ORIGINAL, 'bob')
+    assert called
+    assert documentation != "Alice's documentation"
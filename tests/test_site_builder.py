@@ -0,0 +1,69 @@
+# test_site_builder.py
+import hashlib
+import os
+
+from site_builder import INDEX_PAGE, SEARCH_PAGE, SiteBuilder, SitePage
+
+
+def page(page_id, markdown, title=None):
+    return SitePage(
+        page_id=page_id,
+        title=title or page_id,
+        source_hash=hashlib.sha256(markdown.encode('utf-8')).hexdigest(),
+        load=lambda: markdown
+    )
+
+
+def read(site_dir, rel_path):
+    with open(os.path.join(site_dir, *rel_path.split('/')), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_rebuild_renders_only_changed_and_relinked_pages(tmp_path):
+    site_dir = str(tmp_path / 'site')
+    builder = SiteBuilder(site_dir)
+    pages = [
+        page('api', "# api\n\nCalls `helper` and `missing`."),
+        page('other', "# other\n\nNothing to link."),
+        page('search', "# search\n\nA module called search."),
+    ]
+    report = builder.build(pages)
+    assert (report.rendered, report.relinked, report.unchanged, report.failed) == (3, 0, 0, 0)
+    # Pages live under pages/, so a page named "search" keeps the site's search page intact
+    assert 'A module called search' in read(site_dir, 'pages/search.html')
+    assert 'search_index.js' in read(site_dir, SEARCH_PAGE)
+    assert '#helper' not in read(site_dir, 'pages/api.html')
+
+    report = SiteBuilder(site_dir).build(pages)
+    assert (report.rendered, report.relinked, report.unchanged) == (0, 0, 3)
+
+    # Defining ``helper`` elsewhere relinks the page that mentions it without re-rendering others
+    pages[1] = page('other', "# other\n\n## helper\n\nNow documented here.")
+    report = SiteBuilder(site_dir).build(pages)
+    assert (report.rendered, report.relinked, report.unchanged) == (1, 1, 1)
+    assert 'href="other.html#helper"' in read(site_dir, 'pages/api.html')
+
+    report = SiteBuilder(site_dir).build(pages[:2])
+    assert report.removed == 1
+    assert not os.path.exists(os.path.join(site_dir, 'pages', 'search.html'))
+    assert 'pages/search.html' not in read(site_dir, INDEX_PAGE)
+
+
+def test_failed_page_is_removed_and_retried(tmp_path):
+    site_dir = str(tmp_path / 'site')
+    pages = [page('api', "# api\n\nFirst version."), page('other', "# other")]
+    SiteBuilder(site_dir).build(pages)
+
+    def broken():
+        raise OSError("source unavailable")
+
+    pages[0] = SitePage(page_id='api', title='api', source_hash='changed', load=broken)
+    report = SiteBuilder(site_dir).build(pages)
+    assert report.failed == 1 and 'api' in report.errors
+    assert not os.path.exists(os.path.join(site_dir, 'pages', 'api.html'))
+    assert 'pages/api.html' not in read(site_dir, INDEX_PAGE)
+
+    pages[0] = page('api', "# api\n\nSecond version.")
+    report = SiteBuilder(site_dir).build(pages)
+    assert (report.rendered, report.failed) == (1, 0)
+    assert 'Second version' in read(site_dir, 'pages/api.html')